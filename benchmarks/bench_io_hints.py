@@ -0,0 +1,119 @@
+"""
+Cold-cache full pass over a large file with and without io_hints.
+
+    python benchmarks/bench_io_hints.py --size-gb 4 --dir /scratch
+
+For each mode the test file is dropped from the page cache, a smaller "hot"
+file is read into it (standing in for everything else on the box), and the
+large file is read front to back through io_hints.open_sequential. Reported:
+throughput, and how much of the hot and the large file is still cached
+afterwards (via mincore). With hints on, the large file should leave the
+cache almost empty and the hot file untouched; the eviction difference only
+shows once the large file is bigger than free memory.
+"""
+
+import argparse
+import ctypes
+import mmap
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "ingest_validation_tests"))
+
+from io_hints import hints_supported, open_sequential, read_hints  # noqa: E402
+
+CHUNK = 1024 * 1024
+
+
+def _make_file(path: Path, size: int):
+    if path.exists() and path.stat().st_size == size:
+        return
+    block = os.urandom(CHUNK)
+    with open(path, "wb") as f:
+        for _ in range(size // CHUNK):
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _drop_from_cache(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _cached_fraction(path: Path) -> float:
+    """
+    Fraction of the file's pages resident in the page cache.
+    """
+    size = path.stat().st_size
+    libc = ctypes.CDLL(None, use_errno=True)
+    page = mmap.PAGESIZE
+    pages = (size + page - 1) // page
+    vec = (ctypes.c_ubyte * pages)()
+    with open(path, "r+b") as f:
+        # writable so ctypes can take the mapping's address; nothing is written
+        mapped = mmap.mmap(f.fileno(), size)
+        try:
+            buffer = (ctypes.c_char * size).from_buffer(mapped)
+            address = ctypes.addressof(buffer)
+            if libc.mincore(ctypes.c_void_p(address), ctypes.c_size_t(size), vec) != 0:
+                raise OSError(ctypes.get_errno(), "mincore failed")
+            del buffer
+        finally:
+            mapped.close()
+    return sum(v & 1 for v in vec) / pages
+
+
+def _read_all(path: Path) -> int:
+    total = 0
+    with open_sequential(path) as f:
+        while data := f.read(CHUNK):
+            total += len(data)
+    return total
+
+
+def run(directory: Path, size_gb: float, hot_mb: int):
+    big = directory / "bench_io_hints_big.bin"
+    hot = directory / "bench_io_hints_hot.bin"
+    _make_file(big, int(size_gb * 2**30) // CHUNK * CHUNK)
+    _make_file(hot, hot_mb * 2**20)
+    print(f"{'hints':>6} {'MB/s':>9} {'hot cached':>11} {'big cached':>11}")
+    for enabled in [False, True]:
+        _drop_from_cache(big)
+        _drop_from_cache(hot)
+        with read_hints(False):
+            _read_all(hot)
+        with read_hints(enabled):
+            start = time.perf_counter()
+            nbytes = _read_all(big)
+            elapsed = time.perf_counter() - start
+        print(
+            f"{'on' if enabled else 'off':>6} {nbytes / 2**20 / elapsed:>9.1f}"
+            f" {_cached_fraction(hot):>10.0%} {_cached_fraction(big):>10.0%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-gb", type=float, default=4.0)
+    parser.add_argument("--hot-mb", type=int, default=512)
+    parser.add_argument("--dir", type=Path, default=Path("."))
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    args = parser.parse_args()
+    if not hints_supported():
+        sys.exit("posix_fadvise is not available on this platform")
+    try:
+        run(args.dir, args.size_gb, args.hot_mb)
+    finally:
+        if not args.keep:
+            for name in ["bench_io_hints_big.bin", "bench_io_hints_hot.bin"]:
+                (args.dir / name).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
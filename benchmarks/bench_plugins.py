@@ -0,0 +1,357 @@
+"""
+Throughput of each plugin's per-file check on synthetic inputs.
+
+    python benchmarks/bench_plugins.py --scale small --dir /scratch/ivt-bench
+    python benchmarks/bench_plugins.py --scale small --save baseline.json
+    python benchmarks/bench_plugins.py --scale small --compare baseline.json
+
+Each benchmark runs the check in-process, in a fresh interpreter so peak
+RSS is its own, and reports MB/s, files/s and peak RSS. Only the gzip
+backends use more than one core (a background inflate thread, or
+gzip_backend.INFLATE_THREADS for BGZF); gzip_stdlib is their baseline.
+fastq_gz, fastq_bz2 and fastq_zst validate the same records compressed each way.
+Inputs are generated with tests/synthetic_upload.py under --dir/<scale> on first
+use and reused afterwards (they reach tens of GB / a million files at the large
+scale). --compare exits non-zero if any benchmark lost more than
+--tolerance of its throughput or grew its peak RSS by more than that
+against the saved baseline; baselines are only comparable on the same
+machine and scale.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "ingest_validation_tests"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tests.synthetic_upload import codex_tree, tiffs, write_fastq  # noqa: E402
+
+CHUNK = 1024 * 1024
+
+SCALES = {
+    "small": {
+        "fastq_mb": 64,
+        "gz_mb": 64,
+        "tiff_files": 10,
+        "ometiff_files": 10,
+        "codex_cycles": 4,
+        "codex_tiles": 10,
+        "glob_files": 1000,
+    },
+    "medium": {
+        "fastq_mb": 2048,
+        "gz_mb": 2048,
+        "tiff_files": 200,
+        "ometiff_files": 1000,
+        "codex_cycles": 20,
+        "codex_tiles": 500,
+        "glob_files": 100_000,
+    },
+    "large": {
+        "fastq_mb": 32768,
+        "gz_mb": 32768,
+        "tiff_files": 2000,
+        "ometiff_files": 10_000,
+        "codex_cycles": 40,
+        "codex_tiles": 25_000,
+        "glob_files": 1_000_000,
+    },
+}
+"""dict: per-scale size of each benchmark's synthetic input
+"""
+
+FASTQ_RECORD_BYTES = 370
+"""int: approximate size of one generated 150bp FASTQ record
+"""
+
+TIFF_SHAPE = (4, 2048, 2048)
+"""tuple: (pages, height, width) of each uint16 TIFF written for the tiff benchmark
+"""
+
+COMPRESSED_FORMATS = ["gz", "bz2", "zst"]
+"""list: suffixes of the fastq_<suffix> benchmarks' inputs
+"""
+
+GLOB_PATTERNS = [
+    "**/*.gz",
+    "**/*.[tT][iI][fF]",
+    "**/*.[tT][iI][fF][fF]",
+    "**/*.[oO][mM][eE].[tT][iI][fF]",
+    "**/*.fastq",
+]
+"""list: the globs plugins run over an upload
+"""
+
+
+def _empty_files(directory: Path, count: int, names: list[str], per_dir: int = 1000):
+    for i in range(count):
+        subdirectory = directory / f"d{i // per_dir:04d}"
+        if not i % per_dir:
+            subdirectory.mkdir(parents=True, exist_ok=True)
+        (subdirectory / f"f{i:07d}{names[i % len(names)]}").touch()
+
+
+def _generate(name: str, directory: Path, scale: dict):
+    if name in ["fastq_stream", "fastq_vectorized", "fastq_qc", "fastq_count", "fastq_sample"]:
+        write_fastq(directory / "data.fastq", scale["fastq_mb"] * CHUNK // FASTQ_RECORD_BYTES)
+    elif name == "fastq_pairs":
+        for read in [1, 2]:
+            write_fastq(
+                directory / f"data_L001_R{read}_001.fastq",
+                scale["fastq_mb"] * CHUNK // FASTQ_RECORD_BYTES // 2,
+                read=read,
+            )
+    elif name.removeprefix("fastq_") in COMPRESSED_FORMATS:
+        write_fastq(
+            directory / f"data.fastq.{name.removeprefix('fastq_')}",
+            scale["gz_mb"] * CHUNK // FASTQ_RECORD_BYTES,
+        )
+    elif name in ["gz_engine", "gzip_stdlib", "gzip_threaded"]:
+        # not *.fastq.gz, which the gzip plugin leaves to the FASTQ plugin
+        write_fastq(directory / "data.txt.gz", scale["gz_mb"] * CHUNK // FASTQ_RECORD_BYTES)
+    elif name == "gzip_bgzf":
+        write_fastq(
+            directory / "data.txt.gz", scale["gz_mb"] * CHUNK // FASTQ_RECORD_BYTES, bgzf=True
+        )
+    elif name == "tiff_check":
+        tiffs(directory, scale["tiff_files"], shape=TIFF_SHAPE, compression="zlib")
+    elif name in ["ome_tiff_check", "ome_tiff_fields"]:
+        tiffs(directory, scale["ometiff_files"], shape=(2, 256, 256), ome=True)
+    elif name == "codex_common_errors":
+        codex_tree(
+            directory, scale["codex_cycles"], tiles=scale["codex_tiles"] // scale["codex_cycles"]
+        )
+    elif name == "glob":
+        _empty_files(directory, scale["glob_files"], [".gz", ".tif", ".ome.tif", ".fastq", ".txt"])
+
+
+def _files(directory: Path) -> list[Path]:
+    return sorted(
+        path for path in directory.glob("**/*") if path.is_file() and path.name != ".generated"
+    )
+
+
+def _run(name: str, directory: Path):
+    """
+    The measured work; returns (bytes, files) processed.
+    """
+    files = _files(directory)
+    if name == "fastq_stream":
+        from fastq_validator_logic import FASTQValidatorLogic
+
+        with open(files[0]) as f:
+            FASTQValidatorLogic().validate_fastq_stream(f)
+    elif name == "fastq_vectorized":
+        from fastq_validator_logic import FASTQValidatorLogic
+
+        with open(files[0], "rb") as f:
+            FASTQValidatorLogic().validate_fastq_byte_stream(f)
+    elif name == "fastq_qc":
+        from fastq_qc import FastqQC
+        from fastq_validator_logic import FASTQValidatorLogic
+
+        validator = FASTQValidatorLogic()
+        validator._qc = FastqQC()
+        with open(files[0], "rb") as f:
+            validator.validate_fastq_byte_stream(f)
+        validator._qc.summary()
+    elif name == "fastq_count":
+        from fastq_validator_logic import count_fastq_lines
+
+        assert count_fastq_lines(files[0])[1]
+    elif name == "fastq_sample":
+        from fastq_validator_logic import FASTQValidatorLogic
+
+        # MB/s of the whole file: how fast triage gets through it (the head, tail and 8
+        # windows of fastq_validator_logic.SAMPLE_BLOCK_BYTES are validated)
+        validator = FASTQValidatorLogic(sample_blocks=8)
+        validator.validate_fastq_file(files[0])
+        assert validator.sampled and not validator.errors
+    elif name.removeprefix("fastq_") in COMPRESSED_FORMATS:
+        from fastq_validator_logic import FASTQValidatorLogic
+
+        validator = FASTQValidatorLogic()
+        validator.validate_fastq_file(files[0])
+        assert not validator.errors
+        # MB/s of the FASTQ data rather than of each format's compressed size
+        return validator._file_record_counts[str(files[0])] * FASTQ_RECORD_BYTES, 1
+    elif name == "fastq_pairs":
+        from fastq_validator_logic import check_read_pairs
+
+        assert check_read_pairs(files) == []
+    elif name == "gz_engine":
+        from gz_validator import Engine
+
+        assert Engine()(files[0]) is None
+    elif name.startswith("gzip_"):
+        from archive_path import open_gzip
+
+        with open_gzip(files[0], backend=name.removeprefix("gzip_")) as f:
+            while f.read(CHUNK):
+                pass
+    elif name == "tiff_check":
+        from tiff_validator import _check_tiff_file
+
+        for file in files:
+            assert _check_tiff_file(file) is None
+    elif name == "ome_tiff_check":
+        from validator import check_ome_tiff_file
+
+        for file in files:
+            check_ome_tiff_file(file)
+    elif name == "ome_tiff_fields":
+        from ome_tiff_field_validator import OmeTiffFieldValidator
+
+        validator = OmeTiffFieldValidator([directory], "CODEX", verbose=False)
+        validator.get_schemas()
+        for file in files:
+            assert validator.errors_by_schema(file) is None
+    elif name == "codex_common_errors":
+        from codex_common_errors_validator import CodexCommonErrorsValidator
+
+        CodexCommonErrorsValidator([directory], "CODEX", verbose=False)._collect_errors()
+    elif name == "glob":
+        for pattern in GLOB_PATTERNS:
+            for _ in directory.glob(pattern):
+                pass
+    return sum(file.stat().st_size for file in files), len(files)
+
+
+BENCHMARKS = [
+    "fastq_stream",
+    "fastq_vectorized",
+    "fastq_qc",
+    "fastq_count",
+    "fastq_sample",
+    "fastq_pairs",
+    "fastq_gz",
+    "fastq_bz2",
+    "fastq_zst",
+    "gz_engine",
+    "gzip_stdlib",
+    "gzip_threaded",
+    "gzip_bgzf",
+    "tiff_check",
+    "ome_tiff_check",
+    "ome_tiff_fields",
+    "codex_common_errors",
+    "glob",
+]
+"""list: benchmark names, in run order
+"""
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return (
+        max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        )
+        / 1024
+    )
+
+
+def _child(name: str, directory: Path) -> dict:
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        nbytes, nfiles = _run(name, directory)
+        seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "mb_per_s": nbytes / 2**20 / seconds,
+        "files_per_s": nfiles / seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run(names: list[str], directory: Path, scale_name: str) -> dict:
+    scale = SCALES[scale_name]
+    results = {}
+    for name in names:
+        data = directory / scale_name / name
+        done = data / ".generated"
+        if not done.exists():
+            print(f"generating {name} input under {data}", file=sys.stderr)
+            data.mkdir(parents=True, exist_ok=True)
+            _generate(name, data, scale)
+            done.touch()
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--dir", str(data)],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        results[name] = json.loads(output)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Benchmarks that regressed by more than `tolerance` against the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        if (before := baseline.get(name)) is None:
+            continue
+        for metric, unit in [("mb_per_s", "MB/s"), ("files_per_s", "files/s")]:
+            if result[metric] < before[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{name}: {result[metric]:.1f} {unit} vs {before[metric]:.1f} baseline"
+                )
+        if result["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak RSS {result['peak_rss_mb']:.0f} MB vs"
+                f" {before['peak_rss_mb']:.0f} baseline"
+            )
+    return regressions
+
+
+def _print(results: dict, baseline: dict):
+    print(f"{'benchmark':<20} {'MB/s':>9} {'files/s':>10} {'peak RSS MB':>12} {'speedup':>8}")
+    for name, result in results.items():
+        ratio = ""
+        if name in baseline:
+            ratio = f"{baseline[name]['seconds'] / result['seconds']:.2f}x"
+        print(
+            f"{name:<20} {result['mb_per_s']:>9.1f} {result['files_per_s']:>10.1f}"
+            f" {result['peak_rss_mb']:>12.0f} {ratio:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--dir", type=Path, default=Path("bench-data"))
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--save", type=Path, help="write results as a baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--child", choices=BENCHMARKS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(_child(args.child, args.dir)))
+        return
+    results = run(args.only, args.dir, args.scale)
+    baseline = {}
+    if args.compare:
+        saved = json.loads(args.compare.read_text())
+        if saved["scale"] != args.scale:
+            sys.exit(f"{args.compare} was recorded at scale {saved['scale']}")
+        baseline = saved["results"]
+    _print(results, baseline)
+    if args.save:
+        args.save.write_text(json.dumps({"scale": args.scale, "results": results}, indent=2))
+    if regressions := compare(results, baseline, args.tolerance):
+        sys.exit("Regressions:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+import io
+import os
+import re
+import stat
+import struct
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import IO, Iterator
+
+from compression import COMPRESSED_SUFFIXES, open_decompressing
+from io_hints import open_sequential
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+_ZIP_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+class ArchiveMemberError(TypeError):
+    """
+    Raised when a path inside an archive is used where a file on disk is needed
+    """
+
+    pass
+
+
+class _MemberFile(io.RawIOBase):
+    """
+    Read-only, seekable view of a byte range of an archive file.
+    Used for members stored without compression (zip STORED, plain tar),
+    so that random access is a plain pread instead of decompression.
+    """
+
+    def __init__(self, archive: Path, offset: int, size: int, name: str):
+        self.name = name
+        self._fd = os.open(archive, os.O_RDONLY)
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        length = max(0, min(len(buffer), self._size - self._pos))
+        if not length:
+            return 0
+        data = os.pread(self._fd, length, self._offset + self._pos)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if self._pos < 0:
+            raise ValueError("Negative seek position")
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            os.close(self._fd)
+        super().close()
+
+
+class _ArchiveIndex:
+    """
+    Member listing for one archive, built from the zip central directory
+    or the tar headers without decompressing any member data.
+    """
+
+    def __init__(self, archive: Path):
+        self.archive = archive
+        self.files: dict[str, zipfile.ZipInfo | tarfile.TarInfo] = {}
+        self.dirs: set[str] = {""}
+        self.zip: zipfile.ZipFile | None = None
+        self.tar: tarfile.TarFile | None = None
+        # plain (uncompressed) tars allow direct access to member data
+        self.tar_seekable = False
+        if zipfile.is_zipfile(archive):
+            self.zip = zipfile.ZipFile(archive)
+            members = [(info.filename, info.is_dir(), info) for info in self.zip.infolist()]
+        else:
+            try:
+                self.tar = tarfile.open(archive, "r:")
+                self.tar_seekable = True
+            except tarfile.ReadError:
+                self.tar = tarfile.open(archive, "r:*")
+            members = [(info.name, info.isdir(), info) for info in self.tar.getmembers()]
+        for name, is_dir, info in members:
+            name = name.strip("/")
+            if name.startswith("./"):
+                name = name[2:]
+            if is_dir:
+                self.dirs.add(name)
+            else:
+                self.files[name] = info
+            parent = PurePosixPath(name).parent
+            while str(parent) != ".":
+                self.dirs.add(str(parent))
+                parent = parent.parent
+
+    def open(self, member: str) -> IO[bytes]:
+        info = self.files[member]
+        name = f"{self.archive}/{member}"
+        if isinstance(info, zipfile.ZipInfo):
+            assert self.zip
+            if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                with open(self.archive, "rb") as f:
+                    f.seek(info.header_offset)
+                    signature, name_len, extra_len = _ZIP_LOCAL_HEADER.unpack(
+                        f.read(_ZIP_LOCAL_HEADER.size)
+                    )
+                if signature != _ZIP_LOCAL_HEADER_SIGNATURE:
+                    raise zipfile.BadZipFile(f"Bad local header for {name}")
+                offset = info.header_offset + _ZIP_LOCAL_HEADER.size + name_len + extra_len
+                return io.BufferedReader(_MemberFile(self.archive, offset, info.file_size, name))
+            return self.zip.open(info)
+        assert self.tar
+        if self.tar_seekable:
+            return io.BufferedReader(_MemberFile(self.archive, info.offset_data, info.size, name))
+        member_file = self.tar.extractfile(info)
+        if member_file is None:
+            raise IsADirectoryError(name)
+        return member_file
+
+
+# Per-process cache; file handles must not be shared across forked pool workers.
+_indexes: dict[tuple[int, str], _ArchiveIndex] = {}
+
+
+def _get_index(archive: Path) -> _ArchiveIndex:
+    key = (os.getpid(), str(archive))
+    if key not in _indexes:
+        _indexes[key] = _ArchiveIndex(archive)
+    return _indexes[key]
+
+
+def _glob_to_regex(pattern: str) -> re.Pattern:
+    """
+    Translate a pathlib-style glob (with "**" meaning zero or more directories)
+    into a regex over "/"-separated member names.
+    """
+    regex = ""
+    segments = pattern.strip("/").split("/")
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            regex += r"(?:[^/]+/)*" if not last else r"(?:[^/]+/)*[^/]+"
+            continue
+        j = 0
+        while j < len(segment):
+            char = segment[j]
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif char == "[" and (close := segment.find("]", j + 2)) != -1:
+                body = segment[j + 1 : close].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex += f"[{body}]"
+                j = close
+            else:
+                regex += re.escape(char)
+            j += 1
+        if not last:
+            regex += "/"
+    return re.compile(regex)
+
+
+class ArchivePath:
+    """
+    Read-only, pathlib-like path to a file or directory inside a .zip or .tar
+    archive, e.g. ArchivePath("upload.zip", "upload/raw/cyc001_reg001").
+
+    Supports the subset of the Path API used by the plugins (glob, iterdir,
+    is_file/is_dir/exists, open/read_text/read_bytes, relative_to, parent,
+    name/stem/suffix). Member lookups use the archive's central directory, and
+    members stored without compression can be opened for random access.
+    Instances are picklable and reopen the archive lazily in each process.
+    Members have no path on disk: code that needs one (open(), os functions,
+    external tools) gets an ArchiveMemberError from os.fspath.
+    """
+
+    def __init__(self, archive: str | Path, member: str = ""):
+        self.archive = Path(archive)
+        member = str(PurePosixPath(member.strip("/")))
+        self.member = "" if member == "." else member
+
+    def __str__(self) -> str:
+        return f"{self.archive}/{self.member}" if self.member else str(self.archive)
+
+    def __repr__(self) -> str:
+        return f"ArchivePath({str(self.archive)!r}, {self.member!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ArchivePath):
+            return NotImplemented
+        return (self.archive, self.member) == (other.archive, other.member)
+
+    def __lt__(self, other) -> bool:
+        return str(self) < str(other)
+
+    def __hash__(self) -> int:
+        return hash((self.archive, self.member))
+
+    def __fspath__(self) -> str:
+        raise ArchiveMemberError(
+            f"{self} is inside an archive, and this check needs a file on disk; "
+            "extract the upload to check it"
+        )
+
+    def __truediv__(self, other: str | PurePosixPath) -> "ArchivePath":
+        return self.joinpath(other)
+
+    def joinpath(self, *others: str | PurePosixPath) -> "ArchivePath":
+        return ArchivePath(self.archive, str(PurePosixPath(self.member, *others)))
+
+    @property
+    def _pure(self) -> PurePosixPath:
+        return PurePosixPath(str(self))
+
+    @property
+    def name(self) -> str:
+        return self._pure.name
+
+    @property
+    def stem(self) -> str:
+        return self._pure.stem
+
+    @property
+    def suffix(self) -> str:
+        return self._pure.suffix
+
+    @property
+    def suffixes(self) -> list[str]:
+        return self._pure.suffixes
+
+    @property
+    def parts(self) -> tuple[str, ...]:
+        return self._pure.parts
+
+    @property
+    def parent(self) -> "ArchivePath | Path":
+        if not self.member:
+            return self.archive.parent
+        parent = PurePosixPath(self.member).parent
+        return ArchivePath(self.archive, "" if parent == PurePosixPath(".") else str(parent))
+
+    def as_posix(self) -> str:
+        return str(self)
+
+    def is_absolute(self) -> bool:
+        return self.archive.is_absolute()
+
+    def absolute(self) -> "ArchivePath":
+        return ArchivePath(self.archive.absolute(), self.member)
+
+    def relative_to(self, other: "ArchivePath | Path | str") -> PurePosixPath:
+        if isinstance(other, ArchivePath) and other.archive == self.archive:
+            if not other.member:
+                return PurePosixPath(self.member)
+            return PurePosixPath(self.member).relative_to(other.member)
+        return self._pure.relative_to(str(other))
+
+    @property
+    def _index(self) -> _ArchiveIndex:
+        return _get_index(self.archive)
+
+    def exists(self) -> bool:
+        return self.is_file() or self.is_dir()
+
+    def is_file(self) -> bool:
+        return self.member in self._index.files
+
+    def is_dir(self) -> bool:
+        return self.member in self._index.dirs
+
+    def stat(self) -> os.stat_result:
+        archive_stat = self.archive.stat()
+        if self.is_dir():
+            mode, size = stat.S_IFDIR | 0o555, 0
+        elif self.is_file():
+            info = self._index.files[self.member]
+            mode = stat.S_IFREG | 0o444
+            size = info.file_size if isinstance(info, zipfile.ZipInfo) else info.size
+        else:
+            raise FileNotFoundError(str(self))
+        # st_ino/st_dev are zeroed: members have no identity of their own
+        return os.stat_result(
+            (
+                mode,
+                0,
+                0,
+                1,
+                archive_stat.st_uid,
+                archive_stat.st_gid,
+                size,
+                archive_stat.st_atime,
+                archive_stat.st_mtime,
+                archive_stat.st_ctime,
+            )
+        )
+
+    def _members_below(self) -> Iterator[str]:
+        prefix = f"{self.member}/" if self.member else ""
+        for name in sorted(self._index.dirs | set(self._index.files)):
+            if name and name.startswith(prefix):
+                yield name[len(prefix) :]
+
+    def iterdir(self) -> Iterator["ArchivePath"]:
+        if not self.is_dir():
+            raise NotADirectoryError(str(self))
+        for relative in self._members_below():
+            if "/" not in relative:
+                yield self / relative
+
+    def glob(self, pattern: str) -> Iterator["ArchivePath"]:
+        if not self.is_dir():
+            return
+        regex = _glob_to_regex(pattern)
+        if pattern.strip("/") == "**":
+            yield self
+        for relative in self._members_below():
+            if regex.fullmatch(relative):
+                yield self / relative
+
+    def rglob(self, pattern: str) -> Iterator["ArchivePath"]:
+        return self.glob(f"**/{pattern}")
+
+    def open(
+        self,
+        mode: str = "r",
+        encoding: str | None = None,
+        errors: str | None = None,
+        newline: str | None = None,
+    ) -> IO:
+        if set(mode) - set("rbt"):
+            raise ValueError(f"ArchivePath is read-only; invalid mode {mode!r}")
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        binary = self._index.open(self.member)
+        if "b" in mode:
+            return binary
+        return io.TextIOWrapper(binary, encoding=encoding, errors=errors, newline=newline)
+
+    def read_bytes(self) -> bytes:
+        with self.open("rb") as f:
+            return f.read()
+
+    def read_text(self, encoding: str | None = None, errors: str | None = None) -> str:
+        with self.open("r", encoding=encoding, errors=errors) as f:
+            return f.read()
+
+
+def to_path(path: str | Path | ArchivePath) -> Path | ArchivePath:
+    """
+    Return an ArchivePath if any component of `path` is an existing archive
+    file (e.g. "uploads/abc.zip/abc/raw"), otherwise a Path.
+    """
+    if isinstance(path, ArchivePath):
+        return path
+    path = Path(path)
+    if not any(part.lower().endswith(ARCHIVE_SUFFIXES) for part in path.parts):
+        return path
+    for candidate in [path, *path.parents]:
+        if candidate.name.lower().endswith(ARCHIVE_SUFFIXES) and candidate.is_file():
+            member = path.relative_to(candidate)
+            return ArchivePath(candidate, "" if member == Path(".") else member.as_posix())
+    return path
+
+
+def open_gzip(path: Path | ArchivePath, mode: str = "rb", backend: str = "stdlib") -> IO:
+    """
+    gzip.open for both filesystem and archive paths; the member is streamed
+    straight from the archive rather than extracted first, and local files are
+    read with sequential-read hints (see io_hints). backend is one of
+    gzip_backend.GZIP_BACKENDS.
+    """
+    return _open_decompressing(path, ".gz", mode, backend)
+
+
+def open_compressed(path: Path | ArchivePath, mode: str = "rb", backend: str = "stdlib") -> IO:
+    """
+    open_gzip for any of compression.COMPRESSED_SUFFIXES, by the suffix of path.
+    """
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.name.endswith(suffix):
+            return _open_decompressing(path, suffix, mode, backend)
+    raise ValueError(f"{path} does not end in one of {', '.join(COMPRESSED_SUFFIXES)}")
+
+
+def _open_decompressing(path: Path | ArchivePath, suffix: str, mode: str, backend: str) -> IO:
+    if isinstance(path, ArchivePath):
+        fileobj = path.open("rb")
+    else:
+        fileobj = open_sequential(path)
+    stream = open_decompressing(fileobj, suffix, backend)
+    if "t" in mode:
+        return io.TextIOWrapper(stream)
+    return stream
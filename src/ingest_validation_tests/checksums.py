@@ -0,0 +1,190 @@
+import hashlib
+import io
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from task_pool import report_product
+
+CHECKSUMS = "checksums"
+"""str: name under which workers report {algorithm: hexdigest} for a file
+"""
+
+DEFAULT_ALGORITHMS = ("md5", "sha256")
+"""tuple[str]: algorithms written to a checksum manifest
+"""
+
+SUMS_FILE_ALGORITHMS = {
+    "md5sums.txt": "md5",
+    "md5sum.txt": "md5",
+    "md5sums": "md5",
+    "sha256sums": "sha256",
+    "sha256sums.txt": "sha256",
+    "sha256sum.txt": "sha256",
+}
+"""dict: lower-cased names of checksum files recognised in an upload, and their algorithm
+"""
+
+_SUMS_LINE = re.compile(r"^(?P<digest>[0-9a-fA-F]+) [ *](?P<path>.+)$")
+_HASH_CHUNK = 1024 * 1024
+
+_algorithms: tuple[str, ...] = ()
+
+
+def hashing_algorithms() -> tuple[str, ...]:
+    return _algorithms
+
+
+@contextmanager
+def hashing(algorithms: tuple[str, ...] | list[str]) -> Iterator[None]:
+    """
+    Hash every file opened through io_hints.open_sequential with these
+    algorithms for the duration of a run; worker processes forked inside the
+    block inherit the setting.
+    """
+    global _algorithms
+    previous = _algorithms
+    _algorithms = tuple(algorithms)
+    try:
+        yield
+    finally:
+        _algorithms = previous
+
+
+class HashingReader(io.RawIOBase):
+    """
+    Raw file wrapper that hashes the file's bytes as a side effect of the
+    reads a check makes anyway. Bytes are hashed in file order: reads that
+    skip ahead first hash the gap, re-reads of hashed bytes are not hashed
+    again, and on close whatever was never read is hashed. A sequential pass
+    is therefore hashed without any extra I/O. The digests are reported to
+    the parent process via task_pool.report_product.
+    """
+
+    def __init__(self, raw: io.RawIOBase, name, algorithms: tuple[str, ...]):
+        self.raw = raw
+        self.name = str(name)
+        self._hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        self._hashed = 0
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._position = self.raw.seek(offset, whence)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def _update(self, data):
+        for hasher in self._hashers.values():
+            hasher.update(data)
+        self._hashed += len(data)
+
+    def _hash_until(self, end: int | None):
+        self.raw.seek(self._hashed)
+        while end is None or self._hashed < end:
+            size = _HASH_CHUNK if end is None else min(_HASH_CHUNK, end - self._hashed)
+            if not (data := self.raw.read(size)):
+                break
+            self._update(data)
+        self.raw.seek(self._position)
+
+    def readinto(self, buffer) -> int | None:
+        if self._position > self._hashed:
+            self._hash_until(self._position)
+        start = self._position
+        nbytes = self.raw.readinto(buffer)
+        if nbytes:
+            self._position = start + nbytes
+            if self._position > self._hashed:
+                with memoryview(buffer) as view:
+                    self._update(view[self._hashed - start : nbytes])
+        return nbytes
+
+    def hexdigests(self) -> dict[str, str]:
+        return {algorithm: hasher.hexdigest() for algorithm, hasher in self._hashers.items()}
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._hash_until(None)
+                report_product(CHECKSUMS, (self.name, self.hexdigests()))
+            finally:
+                self.raw.close()
+        super().close()
+
+
+def find_sums_files(paths: list) -> list:
+    """
+    md5sums.txt / sha256sums style files anywhere under the given paths.
+    """
+    return [
+        file
+        for path in paths
+        for file in path.glob("**/*")
+        if file.name.lower() in SUMS_FILE_ALGORITHMS and file.is_file()
+    ]
+
+
+def read_sums_file(sums_file) -> dict[str, str]:
+    """
+    {normalized path: hexdigest} from a `<digest>  <path>` (md5sum/sha256sum)
+    file; paths are relative to the file's directory.
+    """
+    expected = {}
+    for line in sums_file.read_text().splitlines():
+        if match := _SUMS_LINE.match(line.strip()):
+            path = os.path.normpath(str(sums_file.parent / match.group("path")))
+            expected[path] = match.group("digest").lower()
+    return expected
+
+
+def verify(checksums: dict[str, dict[str, str]], sums_files: list) -> list[str]:
+    """
+    Compare digests computed during validation against the supplied sums
+    files; files that were not hashed in this run are not reported.
+    """
+    computed = {os.path.normpath(path): digests for path, digests in checksums.items()}
+    errors = []
+    for sums_file in sums_files:
+        algorithm = SUMS_FILE_ALGORITHMS[sums_file.name.lower()]
+        for path, digest in read_sums_file(sums_file).items():
+            actual = computed.get(path, {}).get(algorithm)
+            if actual is not None and actual != digest:
+                errors.append(
+                    f"{path}: {algorithm} checksum {actual} does not match "
+                    f"{digest} listed in {sums_file}"
+                )
+    return errors
+
+
+def write_manifest(
+    manifest: str | Path,
+    checksums: dict[str, dict[str, str]],
+    algorithms: tuple[str, ...],
+    relative_to=None,
+):
+    """
+    Append `path  size  <digest per algorithm>` rows (tab-separated, with a
+    header when the manifest is new) for every file hashed in this run.
+    """
+    manifest = Path(manifest)
+    new = not manifest.exists() or not manifest.stat().st_size
+    with open(manifest, "a") as f:
+        if new:
+            f.write("\t".join(["path", "size", *algorithms]) + "\n")
+        for path, digests in sorted(checksums.items()):
+            try:
+                size = str(os.stat(path).st_size)
+            except OSError:
+                size = ""
+            name = os.path.relpath(path, relative_to) if relative_to else path
+            f.write("\t".join([name, size, *(digests.get(a, "") for a in algorithms)]) + "\n")
@@ -102,7 +102,8 @@ class CodexCommonErrorsValidator(Validator):
 
                 # Parse channelnames.txt into a dataframe
                 try:
-                    cn_df = pd.read_csv(str(channelnames_txt_path), header=None)
+                    with channelnames_txt_path.open() as f:
+                        cn_df = pd.read_csv(f, header=None)
                 except Exception:
                     rslt.append(f"Unexpected error reading {channelnames_txt_path}")
                     raise QuitNowException()
@@ -115,14 +116,16 @@ class CodexCommonErrorsValidator(Validator):
                 if report_csv_path.is_file():
                     # Parse channelnames_report.txt into a dataframe
                     try:
-                        rpt_df = pd.read_csv(str(report_csv_path), sep=",", header=None)
+                        with report_csv_path.open() as f:
+                            rpt_df = pd.read_csv(f, sep=",", header=None)
                     except Exception:
                         rslt.append(f"Unexpected error reading {report_csv_path}")
                         raise QuitNowException()
                     if len(rpt_df) == len(cn_df) + 1:
                         # channelnames_report.csv appears to have a header
                         try:
-                            rpt_df = pd.read_csv(str(report_csv_path), sep=",")
+                            with report_csv_path.open() as f:
+                                rpt_df = pd.read_csv(f, sep=",")
                         except Exception:
                             rslt.append(f"Unexpected error reading {report_csv_path}")
                             raise QuitNowException()
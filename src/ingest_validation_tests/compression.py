@@ -0,0 +1,313 @@
+import bz2
+import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import IO, Callable, Iterator
+
+import zstandard
+from gzip_backend import (
+    GZIP_BACKENDS,
+    INFLATE_CHUNK_BYTES,
+    InflatingReader,
+    open_inflating,
+)
+from worker_sizing import available_cpus
+
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".zst")
+"""tuple[str]: suffixes of the compressed files open_decompressing reads (gzip, bzip2,
+Zstandard)
+"""
+
+ZSTD_THREADS = 4
+"""int: most threads decompressing the frames of one Zstandard file (fewer on fewer CPUs)
+"""
+
+ZSTD_FRAME_MAX_BYTES = 16 * 1024 * 1024
+"""int: largest declared content size of a Zstandard frame decompressed whole, on a
+worker thread; larger frames, and frames that do not declare a size, are streamed
+"""
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_TRUNCATED = "Compressed file ended before the end-of-stream marker was reached"
+
+
+def _is_skippable(magic: bytes) -> bool:
+    return magic[1:4] == b"\x2a\x4d\x18" and magic[0] & 0xF0 == 0x50
+
+
+class ZstdFrames:
+    """
+    Follows the frame and block headers of a Zstandard stream as its bytes are
+    fed in, without decompressing: where frames end, and whether the stream
+    stops between frames (zstandard itself returns what it can of a truncated
+    frame without complaint). ends lists the stream offsets where frames have
+    ended, up to the first frame that does not declare a content size of at most
+    ZSTD_FRAME_MAX_BYTES; large is set once that frame has started.
+    """
+
+    def __init__(self):
+        self.ends: list[int] = []
+        self.large = False
+        self._offset = 0
+        self._header = b""
+        # bytes of block contents, checksum or skippable frame still to pass
+        self._skip = 0
+        self._in_frame = False
+        self._ending = False
+        self._checksum = False
+        self._unknown = False
+
+    def _header_size(self) -> int:
+        header = self._header
+        if self._in_frame:
+            return 3
+        if len(header) < 4:
+            return 4
+        if _is_skippable(header):
+            return 8
+        if len(header) < 5:
+            return 5
+        descriptor = header[4]
+        size_flag = descriptor >> 6
+        single_segment = descriptor >> 5 & 1
+        content_size = (0, 2, 4, 8)[size_flag] or single_segment
+        return 5 + (not single_segment) + (0, 1, 2, 4)[descriptor & 3] + content_size
+
+    def _frame_started(self):
+        header = self._header
+        if _is_skippable(header):
+            self._skip = int.from_bytes(header[4:8], "little")
+            self._ending = True
+            return
+        if header[:4] != _ZSTD_MAGIC:
+            # not Zstandard; zstandard will say so
+            self._unknown = self.large = True
+            return
+        descriptor = header[4]
+        size_bytes = (0, 2, 4, 8)[descriptor >> 6] or descriptor >> 5 & 1
+        content_size = None
+        if size_bytes:
+            content_size = int.from_bytes(header[len(header) - size_bytes :], "little")
+            content_size += 256 if size_bytes == 2 else 0
+        if content_size is None or content_size > ZSTD_FRAME_MAX_BYTES:
+            self.large = True
+        self._checksum = bool(descriptor >> 2 & 1)
+        self._in_frame = True
+
+    def _block_started(self):
+        block = int.from_bytes(self._header, "little")
+        # an RLE block (type 1) holds one byte, repeated
+        self._skip = 1 if block >> 1 & 3 == 1 else block >> 3
+        if block & 1:
+            self._skip += 4 * self._checksum
+            self._in_frame = False
+            self._ending = True
+
+    def feed(self, data: bytes):
+        position = 0
+        while not self._unknown:
+            step = min(self._skip, len(data) - position)
+            self._skip -= step
+            position += step
+            self._offset += step
+            if self._skip:
+                break
+            if self._ending:
+                self._ending = False
+                if not self.large:
+                    self.ends.append(self._offset)
+            while len(self._header) < (size := self._header_size()) and position < len(data):
+                take = data[position : position + size - len(self._header)]
+                self._header += take
+                position += len(take)
+                self._offset += len(take)
+            if len(self._header) < self._header_size():
+                break
+            if self._in_frame:
+                self._block_started()
+            else:
+                self._frame_started()
+            self._header = b""
+
+    @property
+    def between_frames(self) -> bool:
+        return self._unknown or not (self._in_frame or self._header or self._skip)
+
+
+def _bz2_streams(read: Callable[[int], bytes], data: bytes = b"") -> Iterator[bytes]:
+    """
+    Decompressed data of consecutive bzip2 streams, from data and then read().
+    Like bz2.BZ2File, data after a stream that does not start a valid one is
+    ignored, and a truncated stream is an EOFError.
+    """
+    decompressor = None
+    streams = 0
+    while True:
+        started = decompressor is None
+        if started:
+            if not data and not (data := read(INFLATE_CHUNK_BYTES)):
+                return
+            decompressor = bz2.BZ2Decompressor()
+        elif decompressor.needs_input and not data:
+            if not (data := read(INFLATE_CHUNK_BYTES)):
+                raise EOFError(_TRUNCATED)
+        try:
+            output = decompressor.decompress(data, INFLATE_CHUNK_BYTES)
+        except OSError:
+            if streams and started:
+                return
+            raise
+        data = b""
+        if decompressor.eof:
+            data = decompressor.unused_data
+            decompressor = None
+            streams += 1
+        if output:
+            yield output
+
+
+class _Source:
+    # read() for zstandard: data first, then fileobj's reads, which frames follows
+    def __init__(self, read: Callable[[int], bytes], frames: ZstdFrames, data: bytes):
+        self._read = read
+        self._frames = frames
+        self._data = data
+
+    def read(self, size: int) -> bytes:
+        if self._data:
+            data, self._data = self._data, b""
+            return data
+        more = self._read(size)
+        self._frames.feed(more)
+        return more
+
+
+def _zstd_stream(
+    read: Callable[[int], bytes], frames: ZstdFrames, data: bytes = b""
+) -> Iterator[bytes]:
+    """
+    Decompressed data of Zstandard frames, from data (which frames has already
+    been fed) and then read(). zstandard stops quietly at the end of its input,
+    so a stream that ends inside a frame is an EOFError here, as a truncated
+    member is for gzip.GzipFile.
+    """
+    source = _Source(read, frames, data)
+    decompressor = zstandard.ZstdDecompressor()
+    with decompressor.stream_reader(
+        source, read_size=INFLATE_CHUNK_BYTES, read_across_frames=True, closefd=False
+    ) as reader:
+        while output := reader.read(INFLATE_CHUNK_BYTES):
+            yield output
+    if not frames.between_frames:
+        raise EOFError(_TRUNCATED)
+
+
+def _decompress_frames(frames: list[bytes]) -> list[bytes]:
+    # each frame's output on its own, so downstream holds one frame's worth at a time
+    decompressor = zstandard.ZstdDecompressor()
+    return [decompressor.decompress(frame) for frame in frames if not _is_skippable(frame)]
+
+
+def _zstd(read: Callable[[int], bytes], threads: int) -> Iterator[bytes]:
+    """
+    Decompressed data of a Zstandard file: runs of whole frames (as pzstd and
+    the seekable format write) are decompressed on `threads` threads, and
+    yielded in order. From the first frame that is not small enough to
+    decompress whole (see ZSTD_FRAME_MAX_BYTES), the rest is left to
+    _zstd_stream.
+    """
+    frames = ZstdFrames()
+    pending: deque = deque()
+    data = b""
+    start = 0
+    eof = False
+    with ThreadPoolExecutor(threads) as executor:
+        while True:
+            while not frames.large and not eof and len(pending) <= threads:
+                more = read(INFLATE_CHUNK_BYTES)
+                eof = not more
+                frames.feed(more)
+                data += more
+                if frames.ends:
+                    cuts = [end - start for end in frames.ends]
+                    batch = [data[begin:end] for begin, end in zip([0, *cuts], cuts)]
+                    data = data[cuts[-1] :]
+                    start = frames.ends[-1]
+                    frames.ends.clear()
+                    pending.append(executor.submit(_decompress_frames, batch))
+            if not pending:
+                break
+            for output in pending.popleft().result():
+                if output:
+                    yield output
+    yield from _zstd_stream(read, frames, data)
+
+
+class _ChunkReader(io.RawIOBase):
+    # the data produced by chunks, decompressed as it is read, on the reader's thread
+    def __init__(self, fileobj: IO[bytes], chunks: Callable[[], Iterator[bytes]]):
+        self.fileobj = fileobj
+        self._chunks = chunks()
+        self._chunk = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk)
+        nbytes = min(len(buffer), len(self._chunk))
+        buffer[:nbytes] = self._chunk[:nbytes]
+        self._chunk = self._chunk[nbytes:]
+        return nbytes
+
+    def close(self):
+        if not self.closed:
+            self._chunks.close()
+            self.fileobj.close()
+        super().close()
+
+
+def open_decompressing(
+    fileobj: IO[bytes], suffix: str, backend: str = "auto", threads: int | None = None
+) -> IO[bytes]:
+    """
+    Binary stream of the decompressed contents of fileobj (which it closes),
+    compressed as files ending in suffix, one of COMPRESSED_SUFFIXES. backend is
+    one of gzip_backend.GZIP_BACKENDS, meaning the same for every format:
+    "stdlib" decompresses as the stream is read, "threaded" on a background
+    thread, and "bgzf" on several threads where the file allows (BGZF blocks,
+    Zstandard frames of known size; bzip2 is "threaded"). A truncated file is an
+    EOFError, as gzip.GzipFile's.
+    """
+    if suffix == ".gz":
+        return open_inflating(fileobj, backend, threads=threads)
+    if suffix not in COMPRESSED_SUFFIXES:
+        raise ValueError(
+            f"Unknown compression {suffix}; expected one of {', '.join(COMPRESSED_SUFFIXES)}"
+        )
+    if backend not in GZIP_BACKENDS:
+        raise ValueError(
+            f"Unknown gzip backend {backend}; expected one of {', '.join(GZIP_BACKENDS)}"
+        )
+    cpus = available_cpus()
+    if backend == "auto":
+        backend = "stdlib" if cpus < 2 else "bgzf"
+    if suffix == ".bz2":
+        chunks = partial(_bz2_streams, fileobj.read)
+    elif backend == "bgzf":
+        chunks = partial(_zstd, fileobj.read, threads or min(ZSTD_THREADS, cpus))
+    else:
+        chunks = partial(_zstd_stream, fileobj.read, ZstdFrames())
+    if backend == "stdlib":
+        raw = _ChunkReader(fileobj, chunks)
+    else:
+        raw = InflatingReader(fileobj, chunks)
+    reader = io.BufferedReader(raw, INFLATE_CHUNK_BYTES)
+    # compressed bytes read so far, for progress in on-disk bytes (as gzip.GzipFile)
+    reader.fileobj = fileobj
+    return reader
@@ -0,0 +1,87 @@
+import hashlib
+import os
+from pathlib import Path
+
+from archive_path import ArchivePath
+
+PARTIAL_HASH_BYTES = 64 * 1024
+"""int: bytes hashed from each of the start, middle and end of a file for content dedup
+"""
+
+
+def _stat(file: Path | ArchivePath) -> os.stat_result | None:
+    try:
+        return file.stat() if isinstance(file, ArchivePath) else os.stat(file)
+    except OSError:
+        return None
+
+
+def partial_hash(file: Path | ArchivePath, size: int) -> str | None:
+    """
+    Hash of the file's size and of PARTIAL_HASH_BYTES from its start, middle
+    and end; cheap to compute, and equal for identical copies.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    try:
+        with file.open("rb") if isinstance(file, ArchivePath) else open(file, "rb") as f:
+            for offset in sorted({0, max(0, size // 2), max(0, size - PARTIAL_HASH_BYTES)}):
+                f.seek(offset)
+                digest.update(f.read(PARTIAL_HASH_BYTES))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def group_duplicates(files: list, by_content: bool = False) -> dict:
+    """
+    Collapse files that are the same file (hardlinks, symlinks: same st_dev
+    and st_ino) and, with by_content, files with equal size and partial_hash.
+    Returns {representative: [other paths]} in input order; every input file
+    appears exactly once. Archive members have no inode and are only
+    collapsed by content.
+    """
+    groups: dict = {}
+    by_key: dict = {}
+    stats = {}
+    for file in files:
+        if file in groups:
+            groups[file].append(file)
+            continue
+        stats[file] = stat = _stat(file)
+        key = (stat.st_dev, stat.st_ino) if stat and stat.st_ino else None
+        if key is not None and key in by_key:
+            groups[by_key[key]].append(file)
+            continue
+        groups[file] = []
+        if key is not None:
+            by_key[key] = file
+    if by_content:
+        by_size: dict[int, list] = {}
+        for file in groups:
+            if stat := stats[file]:
+                by_size.setdefault(stat.st_size, []).append(file)
+        by_hash: dict = {}
+        for size, same_size in by_size.items():
+            if len(same_size) < 2:
+                continue
+            for file in same_size:
+                if (digest := partial_hash(file, size)) is None:
+                    continue
+                if digest in by_hash:
+                    representative = by_hash[digest]
+                    groups[representative].extend([file, *groups.pop(file)])
+                else:
+                    by_hash[digest] = file
+    return groups
+
+
+def fan_out(result, original, duplicate):
+    """
+    The result of checking `original`, restated for `duplicate`: mentions of
+    the original path in (lists of) error strings are replaced.
+    """
+    if isinstance(result, str):
+        return result.replace(str(original), str(duplicate))
+    if isinstance(result, (list, tuple)):
+        return type(result)(fan_out(rslt, original, duplicate) for rslt in result)
+    return result
@@ -0,0 +1,195 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+QC_SUFFIX = ".qc.json"
+"""str: appended to a FASTQ file's path (relative to its upload) to name its QC summary
+"""
+
+PHRED_OFFSET = 33
+"""int: quality byte of Phred score 0 (Sanger / Illumina 1.8+)
+"""
+
+BASES = "ACGTN"
+"""str: bases counted by position; anything else is counted as "other"
+"""
+
+_BATCH_RECORDS = 4096
+
+# base code per byte: index in BASES, or len(BASES) for anything else
+_BASE_CODES = np.full(256, len(BASES), dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    _BASE_CODES[ord(_base)] = _code
+
+
+def _gather(array: np.ndarray, starts: np.ndarray, lengths: np.ndarray):
+    """
+    The bytes of lines (given by starts and lengths) in array, one after
+    another, and each byte's position in its line.
+    """
+    total = int(lengths.sum())
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(total, dtype=np.int64) - np.repeat(offsets, lengths)
+    return array[np.repeat(starts, lengths) + positions], positions
+
+
+def _add(total: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # total + counts, growing total along its first axis as needed
+    if len(counts) > len(total):
+        total = np.concatenate(
+            [total, np.zeros((len(counts) - len(total), *total.shape[1:]), total.dtype)]
+        )
+    total[: len(counts)] += counts
+    return total
+
+
+class FastqQC:
+    """
+    Read statistics of one FASTQ file, accumulated while it is validated:
+    read count and length distribution, base composition and mean quality by
+    position, and the quality score histogram. Counters are NumPy arrays
+    updated a chunk of records at a time; QCs of parts of a file add up with
+    merge.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.length_counts = np.zeros(0, dtype=np.int64)
+        # [position, base code]
+        self.base_counts = np.zeros((0, len(BASES) + 1), dtype=np.int64)
+        # by position: sum of quality scores, and how many there are
+        self.quality_sums = np.zeros(0, dtype=np.int64)
+        self.quality_positions = np.zeros(0, dtype=np.int64)
+        self.quality_counts = np.zeros(256, dtype=np.int64)
+        self._pending: list[tuple[bytes, bytes]] = []
+
+    def add_records(
+        self,
+        array: np.ndarray,
+        sequence_starts: np.ndarray,
+        sequence_lengths: np.ndarray,
+        quality_starts: np.ndarray,
+        quality_lengths: np.ndarray,
+    ):
+        """
+        Count whole records in array (uint8), given where their sequence and
+        quality lines start and how long they are.
+        """
+        self.records += len(sequence_starts)
+        self.length_counts = _add(self.length_counts, np.bincount(sequence_lengths))
+        if not len(sequence_lengths):
+            return
+        length = int(sequence_lengths[0])
+        if (sequence_lengths == length).all() and (quality_lengths == length).all():
+            self._add_uniform(array, sequence_starts, quality_starts, length)
+            return
+        bases, positions = _gather(array, sequence_starts, sequence_lengths)
+        if len(bases):
+            codes = positions * (len(BASES) + 1) + _BASE_CODES[bases]
+            counts = np.bincount(codes, minlength=(positions.max() + 1) * (len(BASES) + 1))
+            self.base_counts = _add(self.base_counts, counts.reshape(-1, len(BASES) + 1))
+        qualities, positions = _gather(array, quality_starts, quality_lengths)
+        self.quality_counts += np.bincount(qualities, minlength=256)
+        if len(qualities):
+            sums = np.bincount(positions, weights=qualities).astype(np.int64)
+            counts = np.bincount(positions)
+            self.quality_sums = _add(self.quality_sums, sums - PHRED_OFFSET * counts)
+            self.quality_positions = _add(self.quality_positions, counts)
+
+    def _add_uniform(
+        self, array: np.ndarray, sequence_starts: np.ndarray, quality_starts: np.ndarray, length
+    ):
+        # add_records for reads all of one length: lines are rows of a 2D array
+        columns = np.arange(length)
+        bases = array[sequence_starts[:, None] + columns]
+        counts = np.empty((length, len(BASES) + 1), dtype=np.int64)
+        for code, base in enumerate(BASES.encode()):
+            counts[:, code] = (bases == base).sum(axis=0)
+        counts[:, -1] = len(sequence_starts) - counts[:, :-1].sum(axis=1)
+        self.base_counts = _add(self.base_counts, counts)
+        qualities = array[quality_starts[:, None] + columns]
+        self.quality_counts += np.bincount(qualities.ravel(), minlength=256)
+        sums = qualities.sum(axis=0, dtype=np.int64) - PHRED_OFFSET * len(quality_starts)
+        self.quality_sums = _add(self.quality_sums, sums)
+        self.quality_positions = _add(
+            self.quality_positions, np.full(length, len(quality_starts), dtype=np.int64)
+        )
+
+    def add_record(self, sequence: bytes, quality: bytes):
+        """
+        Count one record (lines without their newlines); records are batched
+        and counted by add_records.
+        """
+        self._pending.append((sequence, quality))
+        if len(self._pending) == _BATCH_RECORDS:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        sequences, qualities = zip(*self._pending)
+        self._pending = []
+        data = b"".join(sequences) + b"".join(qualities)
+        sequence_lengths = np.array([len(line) for line in sequences], dtype=np.int64)
+        quality_lengths = np.array([len(line) for line in qualities], dtype=np.int64)
+        sequence_starts = np.cumsum(sequence_lengths) - sequence_lengths
+        quality_starts = np.cumsum(quality_lengths) - quality_lengths + sequence_lengths.sum()
+        self.add_records(
+            np.frombuffer(data, dtype=np.uint8),
+            sequence_starts,
+            sequence_lengths,
+            quality_starts,
+            quality_lengths,
+        )
+
+    def merge(self, other: "FastqQC"):
+        self.flush()
+        other.flush()
+        self.records += other.records
+        self.length_counts = _add(self.length_counts, other.length_counts)
+        self.base_counts = _add(self.base_counts, other.base_counts)
+        self.quality_sums = _add(self.quality_sums, other.quality_sums)
+        self.quality_positions = _add(self.quality_positions, other.quality_positions)
+        self.quality_counts += other.quality_counts
+
+    def summary(self) -> dict:
+        """
+        The statistics as plain JSON-serializable values.
+        """
+        self.flush()
+        totals = self.base_counts.sum(axis=0)
+        bases = int(totals.sum())
+        by_base = dict(zip(BASES, totals.tolist()))
+        acgt = sum(by_base[base] for base in "ACGT")
+        qualities = self.quality_counts[PHRED_OFFSET:127]
+        return {
+            "records": self.records,
+            "bases": bases,
+            "length_distribution": {
+                str(length): int(count) for length, count in enumerate(self.length_counts) if count
+            },
+            "base_composition": {
+                base: self.base_counts[:, code].tolist()
+                for code, base in enumerate([*BASES, "other"])
+            },
+            "n_rate": by_base["N"] / bases if bases else 0.0,
+            "gc_content": (by_base["G"] + by_base["C"]) / acgt if acgt else 0.0,
+            "quality_histogram": {
+                str(score): int(count) for score, count in enumerate(qualities) if count
+            },
+            "mean_quality_by_position": (self.quality_sums / self.quality_positions)
+            .round(2)
+            .tolist(),
+        }
+
+
+def write_qc_summary(qc_dir: str | Path, name: str, qc: FastqQC) -> Path:
+    """
+    Write qc's summary as qc_dir/<name>.qc.json (name may include directories).
+    """
+    path = Path(qc_dir) / f"{name}{QC_SUFFIX}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(qc.summary(), f, indent=1)
+    return path
@@ -1,4 +1,6 @@
-from fastq_validator_logic import FASTQValidatorLogic
+from pathlib import Path
+
+from fastq_validator_logic import MAX_ERRORS_PER_FILE, FASTQValidatorLogic
 from validator import Validator
 
 
@@ -6,8 +8,69 @@ class FASTQValidator(Validator):
     description = "Check FASTQ files for basic syntax and consistency."
     cost = 15.0
     version = "1.0"
+    hashes_files = True
+
+    def __init__(
+        self,
+        *args,
+        fastq_engine: str = "vectorized",
+        gzip_backend: str = "auto",
+        check_pairs: bool = False,
+        fastq_qc_dir: str | Path | None = None,
+        fastq_max_errors: int | None = MAX_ERRORS_PER_FILE,
+        fastq_count_first: bool = False,
+        fastq_fail_fast: bool = False,
+        fastq_sample_blocks: int | None = None,
+        **kwargs,
+    ):
+        """
+        fastq_engine: "vectorized" (default) or "reference"; see fastq_validator_logic.ENGINES
+        gzip_backend: how .fastq.gz files are decompressed; see gzip_backend.GZIP_BACKENDS
+        check_pairs: also compare the read IDs of paired files, record by record
+        fastq_qc_dir: directory to write a QC summary (fastq_qc.FastqQC) of each file to
+        fastq_max_errors: errors reported per file before the rest are only counted
+        (None for no limit)
+        fastq_count_first: compare the files' line counts before validating them
+        fastq_fail_fast: as fastq_count_first, and skip validation if counts do not match
+        fastq_sample_blocks: for triage, validate only the head, the tail and this many
+        random windows of each file (see FASTQValidatorLogic.validate_fastq_files_in_path);
+        the files sampled, with their coverage, are listed in self.sampled and logged;
+        the errors returned are only the errors found
+        """
+        super().__init__(*args, **kwargs)
+        self.fastq_engine = fastq_engine
+        self.gzip_backend = gzip_backend
+        self.check_pairs = check_pairs
+        self.fastq_qc_dir = fastq_qc_dir
+        self.fastq_max_errors = fastq_max_errors
+        self.fastq_count_first = fastq_count_first
+        self.fastq_fail_fast = fastq_fail_fast
+        self.fastq_sample_blocks = fastq_sample_blocks
+        # fastq_validator_logic.SampleCoverage by file
+        self.sampled: dict = {}
 
     def _collect_errors(self) -> list[str | None]:
-        validator = FASTQValidatorLogic(verbose=True)
-        validator.validate_fastq_files_in_path(self.paths, self.threads)
+        validator = FASTQValidatorLogic(
+            verbose=True,
+            engine=self.fastq_engine,
+            gzip_backend=self.gzip_backend,
+            check_pairs=self.check_pairs,
+            qc_dir=self.fastq_qc_dir,
+            max_errors=self.fastq_max_errors,
+            count_first=self.fastq_count_first,
+            fail_fast=self.fastq_fail_fast,
+            sample_blocks=self.fastq_sample_blocks,
+        )
+        validator.validate_fastq_files_in_path(
+            self.paths, self.threads, self.pool_options, self.progress_callback
+        )
+        self.progress = validator.progress
+        self.checksums.update(validator.checksums)
+        self.peak_worker_rss_mb = validator.peak_worker_rss_mb
+        self.sampled = validator.sampled
+        for file, sample in sorted(self.sampled.items()):
+            self._log(
+                f"{file} was only sampled: {sample.windows} windows, "
+                f"{sample.sampled_bytes} of {sample.total_bytes} bytes validated"
+            )
         return self._return_result(validator.errors, validator.files_were_found)
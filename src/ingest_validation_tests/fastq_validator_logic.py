@@ -1,23 +1,143 @@
 import argparse
 import gzip
+import io
 import logging
+import mmap
+import os
+import random
 import re
-from collections import defaultdict, namedtuple
-from itertools import chain
-from multiprocessing import Manager, Pool
-from multiprocessing.managers import ListProxy
-from os import cpu_count
+from collections import Counter, defaultdict, namedtuple
+from contextlib import ExitStack
+from functools import partial
+from itertools import chain, islice
 from pathlib import Path
-from typing import Callable, TextIO
+from typing import BinaryIO, Callable, Iterator, TextIO
 
 import fastq_utils
+import numpy as np
+from archive_path import ArchivePath, open_compressed, to_path
+from checksums import CHECKSUMS, hashing, hashing_algorithms
+from compression import COMPRESSED_SUFFIXES
+from fastq_qc import FastqQC, write_qc_summary
+from gzip_backend import GZIP_BACKENDS
+from io_hints import device_of, hints_enabled, open_sequential
+from progress import Progress
+from task_pool import TaskFailure, TaskPool, report_progress
 from typing_extensions import Self
+from worker_sizing import available_cpus, default_worker_count
 
 filename_pattern = namedtuple("filename_pattern", ["before_read", "read", "after_read"])
 
+# one part of a large plain FASTQ file validated on its own (see FASTQValidatorLogic.scan_range)
+FileRange = namedtuple("FileRange", ["file", "start", "stop", "index", "count"])
+
+# a read of a split file to hash it whole, as its ranges are not read in order: the file
+# is read twice (md5 and sha256 of ranges cannot be combined into the file's digest)
+FileHash = namedtuple("FileHash", ["file"])
+
+# what a worker returns for a whole file; record_count is None if it could not be counted,
+# qc is its FastqQC when collected, coverage its SampleCoverage if only a sample was validated
+FileResult = namedtuple(
+    "FileResult", ["file", "record_count", "errors", "qc", "coverage"], defaults=[None, None]
+)
+
+# how much of a file sampling validated: windows, their bytes, and all the file's
+# (decompressed) bytes
+SampleCoverage = namedtuple("SampleCoverage", ["windows", "sampled_bytes", "total_bytes"])
+
+# lines in a FileRange, and the (line, lines) the reference checks must see, relative
+# to the range's first line; lines is None if the file has to be validated whole.
+# error_counts are errors by type past the per-file limit, counted but not kept
+RangeScan = namedtuple(
+    "RangeScan",
+    ["file_range", "lines", "suspects", "error_counts", "qc"],
+    defaults=[None, None],
+)
+
+FASTQ_PATTERN = re.compile(r"(.*)(\.(fq|fastq)(\.(gz|bz2|zst))?)$")
+"""re.Pattern: FASTQ file names; fastq_utils.FASTQ_PATTERN, plus bzip2 and Zstandard
+"""
+
+PROGRESS_INTERVAL_LINES = 2**16
+"""int: lines between intra-file progress reports from validate_fastq_stream
+"""
+
+ENGINES = ("vectorized", "reference")
+"""tuple[str]: FASTQValidatorLogic engines. "reference" validates line by line in
+text mode (validate_fastq_stream); "vectorized" checks whole chunks with NumPy
+(validate_fastq_byte_stream) and reports identical errors.
+"""
+
+VECTOR_CHUNK_BYTES = 2**20
+"""int: bytes the vectorized engine validates, and reports progress, at a time
+"""
+
+SPLIT_MIN_BYTES = 2**30
+"""int: plain FASTQ files at least this large are validated in ranges by several workers
+"""
+
+SPLIT_RANGE_BYTES = 2**28
+"""int: size of each range of a split FASTQ file
+"""
+
+SPLIT_RESYNC_BYTES = 2**24
+"""int: bytes mapped past the end of a range to find the record that starts the next one
+"""
+
+MAX_ERRORS_PER_FILE = 100
+"""int: errors reported for each FASTQ file; later ones are only counted, by type
+"""
+
+PAIR_MISMATCH_LIMIT = 10
+"""int: read ID mismatches reported for a group of files before comparing stops
+"""
+
+SAMPLE_BLOCK_BYTES = 2**22
+"""int: size of each window of a FASTQ file validated when sampling
+"""
+
+SAMPLE_STREAM_PERIOD_BYTES = 2**28
+"""int: decompressed bytes from the start of one sampled window of a compressed (or
+archived) FASTQ stream to the next
+"""
+
+# byte classes for the vectorized engine: bytes not allowed on sequence / quality lines,
+# and whitespace that rstrip() removes before the reference checks
+_SEQUENCE_BAD = 1
+_QUALITY_BAD = 2
+_WHITESPACE = 4
+
+
+def _byte_classes() -> bytes:
+    classes = bytearray([_SEQUENCE_BAD] * 256)
+    for char in b"ACGNT\n":
+        classes[char] = 0
+    for char in [*range(33), *range(127, 256)]:
+        if char != ord("\n"):
+            classes[char] |= _QUALITY_BAD
+    for char in b" \t\x0b\x0c\x1c\x1d\x1e\x1f":
+        classes[char] |= _WHITESPACE
+    return bytes(classes)
+
+
+_BYTE_CLASSES = _byte_classes()
+
+
+class _NeedsReference(Exception):
+    pass
+
+
+def _error_type(error: str) -> str:
+    # an error message without its particulars, e.g. the characters or line numbers
+    return re.sub(r"\d+", "N", error.split(":", 1)[0])
+
+
+# fastq_utils.collect_fastq_files_by_directory's search, for FASTQ_PATTERN
+_, _, _find_fastq_files = fastq_utils.create_match_find_funcs(FASTQ_PATTERN)
+
 
 def is_valid_filename(filename: str) -> bool:
-    return bool(fastq_utils.FASTQ_PATTERN.fullmatch(filename))
+    return bool(FASTQ_PATTERN.fullmatch(filename))
 
 
 def get_filename(pattern: filename_pattern) -> str:
@@ -29,7 +149,7 @@ def get_prefix_read_type_and_set(filename: str) -> filename_pattern | None:
     Looking for fastq filenames with a particular format to compare record counts.
 
     Expected pattern:
-        - <filepath><arbitrary_text>_<lane:L#+>_<read_type:I,R,read>#_<set_num:#+>.<fastq,fastq.gz,fq>
+        - <filepath><arbitrary_text>_<lane:L#+>_<read_type:I,R,read>#_<set_num:#+>.<fastq,fastq.gz,fastq.bz2,fastq.zst,fq>
         - e.g. path/arbitrary_string_L001_R1_001.fastq
     Minimum required elements: lane (must occur before read), read
     May also include: arbitrary text, set_num
@@ -53,7 +173,7 @@ def get_prefix_read_type_and_set(filename: str) -> filename_pattern | None:
             - If we need set number, lane, etc., consider switching to a series
               of regex patterns
     """
-    if not bool(fastq_utils.FASTQ_PATTERN.fullmatch(filename)):
+    if not bool(FASTQ_PATTERN.fullmatch(filename)):
         return
 
     pattern = re.compile(
@@ -66,8 +186,8 @@ def get_prefix_read_type_and_set(filename: str) -> filename_pattern | None:
         )
 
 
-def printable_filenames(files: list | ListProxy | Path | str, newlines: bool = True):
-    if type(files) is list or type(files) is ListProxy:
+def printable_filenames(files: list | Path | str, newlines: bool = True):
+    if type(files) is list:
         file_list = [str(file) for file in files]
         if newlines:
             return "\n".join(file_list)
@@ -78,8 +198,234 @@ def printable_filenames(files: list | ListProxy | Path | str, newlines: bool = T
         return files
 
 
-def _open_fastq_file(file: Path) -> TextIO:
-    return gzip.open(file, "rt") if file.name.endswith(".gz") else file.open()
+def _open_fastq_file(
+    file: Path | ArchivePath, binary: bool = False, gzip_backend: str = "stdlib"
+) -> TextIO | BinaryIO:
+    mode = "rb" if binary else "rt"
+    if file.name.endswith(COMPRESSED_SUFFIXES):
+        return open_compressed(file, mode, gzip_backend)
+    return file.open(mode) if isinstance(file, ArchivePath) else open_sequential(file, mode)
+
+
+def normalize_read_id(line: bytes) -> bytes:
+    """
+    The read ID on a record's line 1, as mates share it: the first word, without
+    the leading '@' or a trailing /1, /2 (older Illumina and SRA style).
+    """
+    words = line[1:].split(None, 1)
+    read_id = words[0] if words else b""
+    if read_id[-2:-1] == b"/" and read_id[-1:].isdigit():
+        read_id = read_id[:-2]
+    return read_id
+
+
+def check_read_pairs(files: list[Path | ArchivePath], gzip_backend: str = "auto") -> list[str]:
+    """
+    Worker task: read the files of a group (R1/R2, I1/I2...) in lockstep, and
+    report records whose normalized read IDs differ, up to PAIR_MISMATCH_LIMIT.
+    Only line 1 of each record is looked at; the files were validated already.
+    """
+    errors = []
+    pattern = get_filename(get_prefix_read_type_and_set(str(files[0])))
+    # the files were hashed, if at all, when they were validated
+    with hashing(()), ExitStack() as stack:
+        streams = [
+            stack.enter_context(_open_fastq_file(file, binary=True, gzip_backend=gzip_backend))
+            for file in files
+        ]
+        for record, lines in enumerate(zip(*(islice(s, 0, None, 4) for s in streams)), 1):
+            read_ids = [normalize_read_id(line) for line in lines]
+            if read_ids.count(read_ids[0]) == len(read_ids):
+                continue
+            comparison = {
+                str(file): read_id.decode(errors="replace")
+                for file, read_id in zip(files, read_ids)
+            }
+            errors.append(
+                f"Read IDs do not match in record {record} among files matching pattern {pattern}: {comparison}"
+            )
+            if len(errors) == PAIR_MISMATCH_LIMIT:
+                errors.append(
+                    f"Stopped comparing read IDs among files matching pattern {pattern} after {PAIR_MISMATCH_LIMIT} mismatches."
+                )
+                break
+    return errors
+
+
+def count_fastq_lines(
+    file: Path | ArchivePath, gzip_backend: str = "auto"
+) -> tuple[Path | ArchivePath, int | None]:
+    """
+    Worker task: the lines in a FASTQ file, as the validators count them (a
+    last line without a newline counts), found by counting newlines a chunk at
+    a time; None if the file cannot be read through.
+    """
+    lines = 0
+    last = b"\n"
+    try:
+        # the file is hashed, if at all, when it is validated
+        with hashing(()), _open_fastq_file(file, binary=True, gzip_backend=gzip_backend) as f:
+            read = getattr(f, "read1", f.read)
+            while data := read(VECTOR_CHUNK_BYTES):
+                lines += data.count(b"\n")
+                last = data[-1:]
+    except Exception:
+        return file, None
+    return file, lines + (last != b"\n")
+
+
+def _raw_position(fastq_data: TextIO | BinaryIO) -> int | None:
+    """
+    On-disk bytes consumed so far by a stream from _open_fastq_file, if known.
+    """
+    binary = getattr(fastq_data, "buffer", fastq_data)
+    raw = getattr(binary, "fileobj", None) or getattr(binary, "raw", None)
+    try:
+        return raw.tell() if raw is not None else None
+    except (OSError, ValueError):
+        return None
+
+
+def _split(
+    file: Path | ArchivePath, threads: int
+) -> list[Path | ArchivePath | FileRange | FileHash]:
+    """
+    A large plain FASTQ file as FileRanges for parallel validation, or just [file].
+    Compressed files and archive members are read whole. When files are hashed
+    during the run, a FileHash comes first, to hash the split file in one
+    sequential pass alongside its ranges -- a second read of the file, the price
+    of validating it in parallel (files below SPLIT_MIN_BYTES are hashed by the
+    validation read itself).
+    """
+    if (
+        threads < 2
+        or isinstance(file, ArchivePath)
+        or file.name.endswith(COMPRESSED_SUFFIXES)
+        or not is_valid_filename(file.name)
+    ):
+        return [file]
+    try:
+        size = file.stat().st_size
+    except OSError:
+        return [file]
+    if size < SPLIT_MIN_BYTES:
+        return [file]
+    count = -(-size // SPLIT_RANGE_BYTES)
+    return [FileHash(file)] * bool(hashing_algorithms()) + [
+        FileRange(
+            file,
+            index * SPLIT_RANGE_BYTES,
+            min(size, (index + 1) * SPLIT_RANGE_BYTES),
+            index,
+            count,
+        )
+        for index in range(count)
+    ]
+
+
+def _item_file(item: Path | ArchivePath | FileRange | FileHash) -> Path | ArchivePath:
+    return item.file if isinstance(item, (FileRange, FileHash)) else item
+
+
+def _record_start(data: mmap.mmap, offset: int, at_eof: bool) -> int | None:
+    """
+    Resynchronise to the 4-line structure: the first line at or after offset
+    (> 0) that begins with '@' and whose next-but-one line begins with '+'.
+    Without one in the next four lines (a malformed file), the first line
+    start at or after offset. None if data ends, short of the end of the
+    file, before this is decided.
+    """
+    starts: list[int] = []
+    position = offset - 1
+    while len(starts) < 7 and (position := data.find(b"\n", position) + 1):
+        starts.append(position)
+    if len(starts) < 7:
+        if not at_eof:
+            return None
+        starts.append(len(data))
+    for first, third in zip(starts[:4], starts[2:6]):
+        if data[first : first + 1] == b"@" and data[third : third + 1] == b"+":
+            return first
+    return starts[0]
+
+
+class _MappedRange:
+    """
+    data[start:stop] as the binary stream validate_fastq_byte_stream reads.
+    """
+
+    def __init__(self, data: mmap.mmap, start: int, stop: int):
+        self._data = data
+        self._start = start
+        self._position = start
+        self._stop = stop
+        # so _raw_position finds tell() and progress is reported
+        self.raw = self
+
+    def read(self, size: int) -> bytes:
+        chunk = self._data[self._position : min(self._position + size, self._stop)]
+        self._position += len(chunk)
+        return chunk
+
+    def tell(self) -> int:
+        return self._position - self._start
+
+
+def _sample_offsets(size: int, blocks: int, seed: str) -> list[int] | None:
+    """
+    Starts of the SAMPLE_BLOCK_BYTES windows sampled from a file of size bytes:
+    the head, one at a random offset (from seed) in each of `blocks` equal parts
+    of the rest, and the tail. None if they would cover the whole file.
+    """
+    block = SAMPLE_BLOCK_BYTES
+    if size <= (blocks + 2) * block:
+        return None
+    rng = random.Random(seed)
+    part = (size - 2 * block) // max(blocks, 1)
+    middle = [block + index * part + rng.randrange(part - block + 1) for index in range(blocks)]
+    return [0, *middle, size - block]
+
+
+def _file_windows(f: BinaryIO, offsets: list[int]) -> Iterator[tuple[int, bytes, bool]]:
+    """
+    The windows of a seekable file starting at offsets, as _stream_windows.
+    """
+    size = os.fstat(f.fileno()).st_size
+    for offset in offsets:
+        f.seek(max(offset - 1, 0))
+        data = f.read(SAMPLE_BLOCK_BYTES + (offset > 0))
+        yield offset, data, offset + SAMPLE_BLOCK_BYTES >= size
+
+
+def _stream_windows(fastq_data: BinaryIO) -> Iterator[tuple[int, bytes, bool]]:
+    """
+    Windows of a stream read through once, as (offset, data, at_eof), data
+    starting with the byte before offset if there is one: SAMPLE_BLOCK_BYTES
+    every SAMPLE_STREAM_PERIOD_BYTES from the start, then the rest of the
+    stream after the last of them, up to SAMPLE_BLOCK_BYTES (or up to twice
+    that, when the last one is too close to the end to leave a tail of its own).
+    """
+    read = getattr(fastq_data, "read1", fastq_data.read)
+    block = SAMPLE_BLOCK_BYTES
+    buffer = bytearray()
+    start = 0  # stream offset of buffer[0]
+    window = 0  # offset of the next window
+    reported = 0
+    while chunk := read(VECTOR_CHUNK_BYTES):
+        buffer += chunk
+        end = start + len(buffer)
+        while end >= window + 2 * block:
+            yield window, bytes(buffer[max(window - 1, 0) - start : window + block - start]), False
+            window += SAMPLE_STREAM_PERIOD_BYTES
+        # keep what the next window, or the tail, may need
+        keep = max(start, min(window, end - block) - 1)
+        del buffer[: keep - start]
+        start = keep
+        if (position := _raw_position(fastq_data)) is not None:
+            report_progress(position - reported)
+            reported = position
+    tail = max(min(window, start + len(buffer) - block), 0)
+    yield tail, bytes(buffer[max(tail - 1, 0) - start :]), True
 
 
 def _log(message: str, verbose: bool = True) -> str | None:
@@ -88,19 +434,6 @@ def _log(message: str, verbose: bool = True) -> str | None:
         return message
 
 
-class Engine(object):
-    def __init__(self, validate_object):
-        self.validate_object = validate_object
-
-    def __call__(self, fastq_file) -> list[str | None]:
-        errors = []
-        _log(f"Validating matching fastq file {fastq_file}")
-        self.validate_object.validate_fastq_file(fastq_file)
-        for err in self.validate_object.errors:
-            errors.append(err)
-        return errors
-
-
 class FASTQValidatorLogic:
     """Validate FASTQ input files for basic syntax.
 
@@ -118,14 +451,60 @@ class FASTQValidatorLogic:
 
     _FASTQ_LINE_2_VALID_CHARS = "ACGNT"
 
-    def __init__(self, verbose=False):
+    def __init__(
+        self,
+        verbose=False,
+        engine: str = "vectorized",
+        gzip_backend: str = "auto",
+        check_pairs: bool = False,
+        qc_dir: str | Path | None = None,
+        max_errors: int | None = MAX_ERRORS_PER_FILE,
+        count_first: bool = False,
+        fail_fast: bool = False,
+        sample_blocks: int | None = None,
+    ):
+        if engine not in ENGINES:
+            raise ValueError(
+                f"Unknown FASTQ engine {engine}; expected one of {', '.join(ENGINES)}"
+            )
+        if gzip_backend not in GZIP_BACKENDS:
+            raise ValueError(
+                f"Unknown gzip backend {gzip_backend}; expected one of {', '.join(GZIP_BACKENDS)}"
+            )
+        self.engine = engine
+        self.gzip_backend = gzip_backend
+        self.check_pairs = check_pairs
+        self.qc_dir = qc_dir
+        # per file; None for no limit
+        self.max_errors = max_errors
+        self.count_first = count_first or fail_fast
+        self.fail_fast = fail_fast
+        # random windows sampled from each plain file, with its head and tail; None to
+        # validate files in full
+        self.sample_blocks = sample_blocks
+        # SampleCoverage by file, for files only partly validated
+        self.sampled: dict[str, SampleCoverage] = {}
+        # FastqQC by file, when qc_dir is set
+        self.qc: dict[str, FastqQC] = {}
         self.errors: list[str | None] = []
         self.files_were_found = False
-        self.files_by_path = Manager().dict()
-        self._file_record_counts = Manager().dict()
-        self._ungrouped_files = Manager().list()
+        self.files_by_path: dict[Path | ArchivePath, list] = {}
+        self._file_record_counts: dict[str, int] = {}
+        self._ungrouped_files: list[Path] = []
+        self.progress: Progress | None = None
+        self.checksums: dict[str, dict[str, str]] = {}
+        self.peak_worker_rss_mb = 0.0
         self._filename = ""
         self._line_number = 0
+        # set while scanning a FileRange: records for the reference checks, kept for later
+        self._suspects: list[tuple[int, list[str]]] | None = None
+        # the current file's, when collecting QC
+        self._qc: FastqQC | None = None
+        # the current file's, when only a sample of it was validated
+        self._coverage: SampleCoverage | None = None
+        # the current file's errors so far, and those past max_errors by type
+        self._file_errors = 0
+        self._error_counts: Counter = Counter()
 
         self._verbose = verbose
 
@@ -142,6 +521,34 @@ class FASTQValidatorLogic:
         print(message)
         return message
 
+    def _capped(self) -> bool:
+        return self.max_errors is not None and self._file_errors >= self.max_errors
+
+    def _add_errors(self, errors: list[str]):
+        # errors on line self._line_number; past the file's limit, only counted
+        for error in errors:
+            if self._capped():
+                self._error_counts[_error_type(error)] += 1
+            else:
+                self.errors.append(self._format_error(error))
+            self._file_errors += 1
+
+    def _start_file(self):
+        self._file_errors = 0
+        self._error_counts = Counter()
+
+    def _report_error_counts(self):
+        if not self._error_counts:
+            return
+        self._line_number = 0
+        counts = dict(sorted(self._error_counts.items()))
+        self.errors.append(
+            self._format_error(
+                f"{sum(counts.values())} more errors not reported "
+                f"(limit {self.max_errors} per file): {counts}"
+            )
+        )
+
     def _validate_fastq_line_1(self, line: str) -> list[str]:
         if not line or line[0] != "@":
             return ["Line does not begin with '@'."]
@@ -199,18 +606,284 @@ class FASTQValidatorLogic:
     def validate_fastq_stream(self, fastq_data: TextIO) -> int:
         # Returns the number of records read from fastq_data.
         line_count = 0
+        reported = 0
         line: str
+        sequence = ""
         for line_count, line in enumerate(fastq_data):
+            if not line_count % PROGRESS_INTERVAL_LINES and line_count:
+                if (position := _raw_position(fastq_data)) is not None:
+                    report_progress(position - reported)
+                    reported = position
             self._line_number = line_count + 1
-            self.errors.extend(
-                self._format_error(error)
-                for error in self.validate_fastq_record(line.rstrip(), line_count)
-            )
+            self._add_errors(self.validate_fastq_record(line.rstrip(), line_count))
+            if self._qc is not None and line_count % 2:
+                if line_count % 4 == 1:
+                    sequence = line
+                else:
+                    self._qc.add_record(
+                        sequence.removesuffix("\n").encode(), line.removesuffix("\n").encode()
+                    )
             line_count += 1
 
         return line_count
 
-    def validate_fastq_file(self, fastq_file: Path) -> None:
+    def _validate_lines(self, lines: list[str], first_line: int):
+        # the reference checks, for lines the vectorized engine could not clear
+        if self._suspects is not None and not self._capped():
+            # line numbers are relative to a FileRange; reported once the range is placed,
+            # and counted now so the range keeps only records that could be reported
+            self._suspects.append((first_line, lines))
+            for line_count, line in enumerate(lines, first_line):
+                self._line_number = line_count + 1
+                self._file_errors += len(self.validate_fastq_record(line.rstrip(), line_count))
+            return
+        for line_count, line in enumerate(lines, first_line):
+            self._line_number = line_count + 1
+            self._add_errors(self.validate_fastq_record(line.rstrip(), line_count))
+
+    def _validate_records(self, data: bytes, first_line: int) -> int:
+        """
+        Vectorized checks of whole records (data ends with the newline of a
+        4th line); returns the number of lines. Records with anything suspect
+        -- a bad first character, a byte not allowed on its line, mismatched
+        lengths -- are handed to the reference checks, which produce the error
+        messages.
+        """
+        array = np.frombuffer(data, dtype=np.uint8)
+        ends = np.flatnonzero(array == ord("\n"))
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        lengths = ends - starts
+        # per line, the union of its bytes' classes
+        classes = np.frombuffer(data.translate(_BYTE_CLASSES), dtype=np.uint8)
+        line_classes = np.bitwise_or.reduceat(classes, starts)
+        first_chars = array[starts]  # a newline for empty lines
+        # per record, by the type of the reference check's error
+        failed = {
+            "Line does not begin with '@'.": first_chars[0::4] != ord("@"),
+            "Line contains invalid character(s)": (line_classes[1::4] & _SEQUENCE_BAD).astype(
+                bool
+            ),
+            "Line does not begin with '+'.": first_chars[2::4] != ord("+"),
+            "Line contains invalid quality character(s)": (
+                line_classes[3::4] & _QUALITY_BAD
+            ).astype(bool),
+            "Line contains N characters which does not match line N's N characters.": (
+                lengths[3::4] != lengths[1::4]
+            ),
+        }
+        suspect = np.logical_or.reduce(list(failed.values()))
+        if self._qc is not None:
+            self._qc.add_records(array, starts[1::4], lengths[1::4], starts[3::4], lengths[3::4])
+        suspects = np.flatnonzero(suspect)
+        for index, record in enumerate(suspects):
+            if self._capped():
+                self._count_records(
+                    data, first_line, starts, ends, line_classes, failed, suspects[index:]
+                )
+                break
+            text = data[starts[4 * record] : ends[4 * record + 3]].decode("ascii")
+            self._validate_lines(text.split("\n"), first_line + 4 * int(record))
+        self._line_number = first_line + len(ends)
+        return len(ends)
+
+    def _count_records(
+        self,
+        data: bytes,
+        first_line: int,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        line_classes: np.ndarray,
+        failed: dict[str, np.ndarray],
+        records: np.ndarray,
+    ):
+        """
+        Count the errors of records past the file's limit by type, straight from
+        the vectorized checks. Records with whitespace in lines 2 or 4, which
+        the reference checks strip from line ends, are counted by the reference
+        checks.
+        """
+        counted = np.zeros(len(line_classes) // 4, dtype=bool)
+        counted[records] = True
+        # lines 1 and 3 are only checked by their first character
+        whitespace = (line_classes[1::4] | line_classes[3::4]) & _WHITESPACE
+        counted &= ~whitespace.astype(bool)
+        for error_type, records_failed in failed.items():
+            if count := int(np.count_nonzero(records_failed & counted)):
+                self._error_counts[error_type] += count
+                self._file_errors += count
+        for record in records[~counted[records]]:
+            text = data[starts[4 * record] : ends[4 * record + 3]].decode("ascii")
+            self._validate_lines(text.split("\n"), first_line + 4 * int(record))
+
+    def _validate_chunk(
+        self, data: bytes, first_line: int, end: str = "record"
+    ) -> tuple[int, int]:
+        """
+        Validate data from the start of line first_line (0-based); returns the
+        (bytes, lines) consumed. end is where to stop: "record" after the last
+        whole record, "line" after the last newline, "data" at the end of data
+        (a final line without a newline counts, as in text mode).
+        """
+        if not data.isascii() or b"\r" in data:
+            # decoded or split into lines differently in text mode
+            raise _NeedsReference()
+        newlines = data.count(b"\n")
+        lines = newlines - newlines % 4
+        consumed = len(data)
+        for _ in range(newlines % 4 + 1):
+            consumed = data.rfind(b"\n", 0, consumed)
+        consumed += 1  # just past the newline ending the last whole record, or 0
+        if lines:
+            self._validate_records(data[:consumed], first_line)
+        if end != "record":
+            rest = data[consumed:].decode("ascii").split("\n")
+            last = rest.pop()
+            if end == "data" and last:
+                rest.append(last)
+                if len(rest) == 4 and self._qc is not None:
+                    # a last record without a final newline
+                    self._qc.add_record(rest[1].encode(), rest[3].encode())
+            self._validate_lines(rest, first_line + lines)
+            lines += len(rest)
+            consumed = len(data) if end == "data" else len(data) - len(last)
+        return consumed, lines
+
+    def validate_fastq_byte_stream(self, fastq_data: BinaryIO) -> int:
+        """
+        Vectorized validate_fastq_stream over a binary stream: same errors,
+        same line numbers, same count. Raises _NeedsReference for data that
+        only the text-mode reference reads the same way (non-ASCII bytes,
+        CR line endings).
+        """
+        read = getattr(fastq_data, "read1", fastq_data.read)
+        line_count = 0
+        reported = 0
+        pending = b""
+        while True:
+            pieces = [pending]
+            size = len(pending)
+            eof = False
+            try:
+                # read at least once, so a record longer than a chunk still completes
+                while not eof and (size == len(pending) or size < VECTOR_CHUNK_BYTES):
+                    piece = read(VECTOR_CHUNK_BYTES)
+                    pieces.append(piece)
+                    size += len(piece)
+                    eof = not piece
+            except Exception:
+                # the reference engine has checked every complete line read before the error
+                self._validate_chunk(b"".join(pieces), line_count, end="line")
+                raise
+            data = b"".join(pieces)
+            if eof:
+                line_count += self._validate_chunk(data, line_count, end="data")[1]
+                return line_count
+            consumed, lines = self._validate_chunk(data, line_count)
+            line_count += lines
+            pending = data[consumed:]
+            if (position := _raw_position(fastq_data)) is not None:
+                report_progress(position - reported)
+                reported = position
+
+    def _validate_with_engine(
+        self, fastq_file: Path | ArchivePath, engine: str, gzip_backend: str
+    ) -> int:
+        self._line_number = 0
+        self._coverage = None
+        if self.sample_blocks is not None:
+            if fastq_file.name.endswith(COMPRESSED_SUFFIXES) or isinstance(
+                fastq_file, ArchivePath
+            ):
+                with _open_fastq_file(
+                    fastq_file, binary=True, gzip_backend=gzip_backend
+                ) as fastq_data:
+                    return self._validate_windows(fastq_file, _stream_windows(fastq_data), engine)
+            with open(fastq_file, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                seed = f"{fastq_file.name}:{size}"
+                if (offsets := _sample_offsets(size, self.sample_blocks, seed)) is not None:
+                    return self._validate_windows(fastq_file, _file_windows(f, offsets), engine)
+        if engine == "reference":
+            with _open_fastq_file(fastq_file, gzip_backend=gzip_backend) as fastq_data:
+                return self.validate_fastq_stream(fastq_data)
+        with _open_fastq_file(fastq_file, binary=True, gzip_backend=gzip_backend) as fastq_data:
+            return self.validate_fastq_byte_stream(fastq_data)
+
+    def _validate_windows(
+        self,
+        fastq_file: Path | ArchivePath,
+        windows: Iterator[tuple[int, bytes, bool]],
+        engine: str,
+    ) -> int:
+        """
+        Validate the whole records of each window (see _stream_windows), found
+        as scan_range finds them. Line numbers count from a window's first
+        record, which errors locate by its byte offset (name@offset:line).
+        Sets self._coverage unless the windows cover the whole file; returns
+        the lines validated.
+        """
+        lines = windows_read = sampled = end = 0
+        for offset, data, at_eof in windows:
+            first = _record_start(data, 1, at_eof) if offset else 0
+            windows_read += 1
+            sampled += len(data) - (offset > 0)
+            end = offset + len(data) - (offset > 0)
+            if first is None:
+                # no record starts in the window
+                continue
+            records = data[first:]
+            if not at_eof:
+                stop = len(records)
+                for _ in range(records.count(b"\n") % 4 + 1):
+                    stop = records.rfind(b"\n", 0, stop)
+                records = records[: stop + 1]
+            self._filename = fastq_file.name
+            if offset:
+                self._filename += f"@{offset - 1 + first}"
+            self._line_number = 0
+            if engine == "reference":
+                window_lines = self.validate_fastq_stream(io.TextIOWrapper(io.BytesIO(records)))
+            else:
+                window_lines = self.validate_fastq_byte_stream(io.BytesIO(records))
+            if at_eof and offset and window_lines % 4:
+                # the record count comparison that would catch this needs the whole file
+                self._line_number = window_lines
+                self._add_errors(
+                    [f"File ends in the middle of a record, after line {window_lines % 4} of 4."]
+                )
+            lines += window_lines
+            self._filename = fastq_file.name
+            self._line_number = 0
+        if sampled < end:
+            self._coverage = SampleCoverage(windows_read, sampled, end)
+        return lines
+
+    def _validate_with_fallbacks(self, fastq_file: Path | ArchivePath) -> int:
+        """
+        Validate with the configured engine and gzip backend, starting over
+        where another path would read the data differently: with the reference
+        engine for data only it decodes (see _NeedsReference), and with the
+        stdlib gzip backend after any error, which other backends may raise
+        at a different point or as a different type.
+        """
+        errors_before = len(self.errors)
+        engine, gzip_backend = self.engine, self.gzip_backend
+        while True:
+            self._qc = FastqQC() if self.qc_dir else None
+            self._start_file()
+            try:
+                return self._validate_with_engine(fastq_file, engine, gzip_backend)
+            except _NeedsReference:
+                engine = "reference"
+            except Exception:
+                if gzip_backend == "stdlib" or not fastq_file.name.endswith(".gz"):
+                    raise
+                gzip_backend = "stdlib"
+            del self.errors[errors_before:]
+
+    def validate_fastq_file(self, fastq_file: Path | ArchivePath) -> None:
         _log(f"Validating {fastq_file.name}...")
         _log(f"    → {fastq_file.absolute().as_posix()}")
 
@@ -225,12 +898,21 @@ class FASTQValidatorLogic:
         self._filename = fastq_file.name
 
         try:
-            with _open_fastq_file(fastq_file) as fastq_data:
-                records_read = self.validate_fastq_stream(fastq_data)
-                if records_read == 0:
-                    self.errors.append(self._format_error(f"Fastq file {fastq_file} is empty."))
-                    return
-            self._file_record_counts[str(fastq_file)] = records_read
+            records_read = self._validate_with_fallbacks(fastq_file)
+            if records_read == 0:
+                self.errors.append(self._format_error(f"Fastq file {fastq_file} is empty."))
+                return
+            if self._coverage is not None:
+                # a sample's record count and QC are not the file's
+                self.sampled[str(fastq_file)] = self._coverage
+                _log(
+                    f"Validated a sample of {fastq_file.name}: {self._coverage.windows} windows, "
+                    f"{self._coverage.sampled_bytes} of {self._coverage.total_bytes} bytes"
+                )
+            else:
+                self._file_record_counts[str(fastq_file)] = records_read
+                if self._qc is not None:
+                    self.qc[str(fastq_file)] = self._qc
         except gzip.BadGzipFile:
             self.errors.append(self._format_error(f"Bad gzip file: {fastq_file}."))
         except IOError:
@@ -241,56 +923,271 @@ class FASTQValidatorLogic:
             self.errors.append(
                 self._format_error(f"Unexpected error: {e} on data file {fastq_file}.")
             )
+        self._report_error_counts()
 
-    def validate_fastq_files_in_path(self, paths: list[Path], threads: int) -> None:
+    def scan_range(self, file_range: FileRange) -> RangeScan:
+        """
+        Vectorized checks of one range of a split file. The range is mapped,
+        and both its ends are moved to the record starts _record_start finds,
+        so consecutive ranges meet exactly. Line numbers are not known until
+        every earlier range is counted, so records needing the reference
+        checks are returned rather than checked (see _stitch_ranges).
+        """
+        file, start, stop = file_range.file, file_range.start, file_range.stop
+        self._suspects = []
+        self._qc = FastqQC() if self.qc_dir else None
+        self._start_file()
+        try:
+            with open(file, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                # map from before start, so the byte preceding it is visible
+                base = max(0, start - 1) // mmap.ALLOCATIONGRANULARITY * mmap.ALLOCATIONGRANULARITY
+                end = min(size, stop + SPLIT_RESYNC_BYTES)
+                with mmap.mmap(
+                    f.fileno(), end - base, access=mmap.ACCESS_READ, offset=base
+                ) as data:
+                    if hints_enabled() and hasattr(mmap, "MADV_SEQUENTIAL"):
+                        data.madvise(mmap.MADV_SEQUENTIAL)
+                    first = _record_start(data, start - base, end == size) if start else 0
+                    last = _record_start(data, stop - base, end == size)
+                    if first is None or last is None:
+                        # a record longer than SPLIT_RESYNC_BYTES
+                        return RangeScan(file_range, None, [])
+                    lines = self.validate_fastq_byte_stream(
+                        _MappedRange(data, first, max(first, last))
+                    )
+            return RangeScan(file_range, lines, self._suspects, self._error_counts, self._qc)
+        except Exception:
+            # validated whole instead, which reports (or avoids) the error
+            return RangeScan(file_range, None, [])
+        finally:
+            self._suspects = None
+
+    def _stitch_ranges(self, scans: list[RangeScan | TaskFailure]) -> list[str | None] | None:
+        """
+        Errors and record count of a split file from the scans of its ranges,
+        numbered as if the file were read in one pass. None if the file has to
+        be validated whole, because a range could not be scanned, or did not
+        start on a record boundary -- in a malformed file resynchronising can
+        pick the wrong line.
+        """
+        if failures := [scan for scan in scans if isinstance(scan, TaskFailure)]:
+            return [f"{failures[0].item.file} could not be validated: {failures[0].reason}"]
+        file = scans[0].file_range.file
+        first_lines = []
+        line_count = 0
+        for scan in scans:
+            if scan.lines is None or line_count % 4:
+                _log(f"Validating {file} in one pass")
+                return None
+            first_lines.append(line_count)
+            line_count += scan.lines
+        errors_before = len(self.errors)
+        self._filename = file.name
+        self._start_file()
+        for first_line, scan in zip(first_lines, scans):
+            for suspect_line, lines in scan.suspects:
+                self._validate_lines(lines, first_line + suspect_line)
+            # only a range that reached the limit by itself counts errors
+            self._error_counts.update(scan.error_counts)
+        self._report_error_counts()
+        self._line_number = line_count
+        if line_count == 0:
+            self.errors.append(self._format_error(f"Fastq file {file} is empty."))
+        else:
+            self._file_record_counts[str(file)] = line_count
+            if self.qc_dir:
+                self.qc[str(file)] = FastqQC()
+                for scan in scans:
+                    self.qc[str(file)].merge(scan.qc)
+        errors = self.errors[errors_before:]
+        del self.errors[errors_before:]
+        return errors
+
+    def validate_fastq_files_in_path(
+        self,
+        paths: list[Path | ArchivePath],
+        threads: int,
+        pool_options: dict | None = None,
+        progress_callback: Callable[[Progress], None] | None = None,
+    ) -> None:
         """
         - Builds a dict of {data_path: [filepaths]}.
-        - [parallel] Opens, validates, and gets line count of each file in list, and then
-        populates self._file_record_counts as {filepath: record_count}.
+        - [parallel] Opens, validates, and gets line count of each file in list; workers
+        return them, and self._file_record_counts is populated as {filepath: record_count}.
         - If successful, loops through each data_path in the `paths` parameter.
             - Groups files with matching prefix/read_type/set_num values.
             - Compares record_counts across grouped files, logs any that don't match or are ungrouped.
+        - pool_options are passed to TaskPool (task_timeout, memory_limit_mb, etc.);
+        files that time out or crash a worker are reported as errors.
+        - progress_callback receives a progress.Progress for the FASTQ files.
+        - Plain FASTQ files of at least SPLIT_MIN_BYTES are validated in ranges by
+        several workers (see scan_range); errors and counts are the same.
+        - With check_pairs, groups whose counts match are then read again in parallel,
+        one group per worker, to compare mates' read IDs (see check_read_pairs).
+        - With count_first, the files' lines are counted first, and mismatched groups are
+        logged before any file is validated; with fail_fast, they are the only errors
+        returned, and the files are not validated.
+        - Each file reports at most max_errors errors, then a count of the rest by type;
+        it is still read through, so its record count is compared as usual.
+        - With qc_dir, read statistics are gathered in the same pass, and written there as
+        <path relative to its data_path>.qc.json for each file read through (see fastq_qc).
+        - With sample_blocks, only windows of each file are validated: the head, tail and
+        sample_blocks random windows of a plain file, or windows at regular intervals and
+        the tail of a compressed one (see _validate_windows). Sampled files are listed in
+        self.sampled with how much of them was covered; their record counts are unknown,
+        so groups including one are not compared, and no QC summary is written for them.
         """
         for path in paths:
-            fastq_utils_output = fastq_utils.collect_fastq_files_by_directory(path)
+            files_by_directory = defaultdict(list)
+            for fastq_file in _find_fastq_files(path):
+                files_by_directory[fastq_file.relative_to(path).parent].append(fastq_file)
             file_list = []
-            for files in fastq_utils_output.values():
+            for files in files_by_directory.values():
                 file_list.extend(files)
                 _log(f"FASTQValidatorLogic: Added files from {path} to file_list: {files}")
             if file_list:
                 self.files_by_path[path] = file_list
         self.files_were_found = bool(self.files_by_path)
+        if self.count_first and self.files_by_path:
+            mismatches = self._count_first(threads, pool_options)
+            if mismatches and self.fail_fast:
+                self.errors.extend(mismatches)
+                return
         data_found_one = []
-        with Manager() as manager:
-            lock = manager.Lock()
-            pool = Pool(threads)
-            try:
-                # Combine all paths' file lists to parallelize processing more efficiently.
-                full_file_list = list(chain.from_iterable(self.files_by_path.values()))
-                logging.info(
-                    f"Passing file list for paths {printable_filenames(paths, newlines=False)} to engine. File list:"
+        pool = TaskPool(threads, **(pool_options or {}))
+        try:
+            # Combine all paths' file lists to parallelize processing more efficiently.
+            full_file_list = list(chain.from_iterable(self.files_by_path.values()))
+            logging.info(
+                f"Passing file list for paths {printable_filenames(paths, newlines=False)} to engine. File list:"
+            )
+            logging.info(printable_filenames(full_file_list, newlines=True))
+            self.progress = Progress("FASTQValidator", full_file_list, progress_callback)
+            # ranges are scanned with the vectorized engine; samples are small enough as they are
+            split_threads = threads if self.engine == "vectorized" else 1
+            if self.sample_blocks is not None:
+                split_threads = 1
+            items = list(
+                chain.from_iterable(_split(file, split_threads) for file in full_file_list)
+            )
+            # ranges of split files: still running, and results so far
+            ranges_left = Counter(
+                str(item.file) for item in items if isinstance(item, (FileRange, FileHash))
+            )
+            scans: dict[str, list] = {}
+            # split files to validate again in one pass, once the ranges are all in
+            whole_files = []
+            task = partial(
+                validate_fastq_item,
+                engine=self.engine,
+                gzip_backend=self.gzip_backend,
+                qc_dir=self.qc_dir,
+                max_errors=self.max_errors,
+                sample_blocks=self.sample_blocks,
+            )
+            data_output = pool.imap_unordered(
+                task,
+                items,
+                on_progress=lambda item, nbytes: self.progress.advance(_item_file(item), nbytes),
+                on_done=lambda item: self._item_done(item, ranges_left),
+                item_weight=lambda item: (
+                    item.stop - item.start
+                    if isinstance(item, FileRange)
+                    else self.progress.size(_item_file(item))
+                ),
+                item_device=lambda item: device_of(_item_file(item)),
+                on_product=self._record_product,
+            )
+            for output in data_output:
+                failed = output.item if isinstance(output, TaskFailure) else None
+                if isinstance(output, RangeScan) or isinstance(failed, FileRange):
+                    file_range = failed or output.file_range
+                    ranges = scans.setdefault(str(file_range.file), [None] * file_range.count)
+                    ranges[file_range.index] = output
+                    if any(scan is None for scan in ranges):
+                        continue
+                    output = self._stitch_ranges(ranges)
+                    if output is None:
+                        whole_files.append(file_range.file)
+                        continue
+                if isinstance(failed, FileHash):
+                    output = [f"{failed.file} could not be hashed: {output.reason}"]
+                data_found_one.extend(self._output_errors(output))
+            # progress already counted these files in full when their ranges finished
+            for output in pool.imap_unordered(
+                task,
+                whole_files,
+                item_device=device_of,
+                on_product=self._record_product,
+            ):
+                data_found_one.extend(self._output_errors(output))
+        except Exception as e:
+            pool.close()
+            _log(f"Error {e}")
+            self.errors.append(f"Error {e}")
+        else:
+            pool.close()
+            self.peak_worker_rss_mb = pool.peak_worker_rss_mb
+            paired = []
+            for path, files in self.files_by_path.items():
+                # Only want to make groups and check line counts within a given data_path.
+                groups = {
+                    pattern: group
+                    for pattern, group in self._make_groups(files).items()
+                    if not any(str(file) in self.sampled for file in group)
+                }
+                paired.extend(self._find_counts(groups))
+            if self._ungrouped_files:
+                _log(f"Ungrouped files, counts not checked: {self._ungrouped_files}")
+            if self.sampled:
+                _log(
+                    f"Only samples of {len(self.sampled)} files were validated, and their "
+                    f"groups' counts not checked: {sorted(self.sampled)}"
                 )
-                logging.info(printable_filenames(full_file_list, newlines=True))
-                engine = Engine(self)
-                data_output = pool.imap_unordered(engine, full_file_list)
-                [data_found_one.extend(output) for output in data_output if output]
-            except Exception as e:
-                pool.close()
-                pool.join()
-                _log(f"Error {e}")
-                self.errors.append(f"Error {e}")
-            else:
-                pool.close()
-                pool.join()
-                for path, files in self.files_by_path.items():
-                    # Only want to make groups and check line counts within a given data_path.
-                    groups = self._make_groups(files)
-                    self._find_counts(groups, lock)
-                if self._ungrouped_files:
-                    _log(f"Ungrouped files, counts not checked: {self._ungrouped_files}")
+            if self.check_pairs and paired:
+                data_found_one.extend(self._check_pairs(paired, threads, pool_options))
+            if self.qc_dir:
+                self._write_qc()
         if len(data_found_one) > 0:
             self.errors.extend(data_found_one)
 
+    def _output_errors(self, output: FileResult | TaskFailure | list | None) -> list[str | None]:
+        """
+        Errors of a file's worker output, keeping its record count, QC and
+        sampling coverage.
+        """
+        if isinstance(output, FileResult):
+            if output.record_count is not None:
+                self._file_record_counts[str(output.file)] = output.record_count
+            if output.qc is not None:
+                self.qc[str(output.file)] = output.qc
+            if output.coverage is not None:
+                self.sampled[str(output.file)] = output.coverage
+            return output.errors
+        if isinstance(output, TaskFailure):
+            return [f"{output.item} could not be validated: {output.reason}"]
+        return output or []
+
+    def _write_qc(self):
+        for path, files in self.files_by_path.items():
+            for file in files:
+                if (qc := self.qc.get(str(file))) is not None:
+                    write_qc_summary(self.qc_dir, os.path.relpath(str(file), str(path)), qc)
+
+    def _item_done(self, item, ranges_left: Counter):
+        if isinstance(item, (FileRange, FileHash)):
+            ranges_left[str(item.file)] -= 1
+            if ranges_left[str(item.file)]:
+                return
+            item = item.file
+        self.progress.file_done(item)
+
+    def _record_product(self, file, name: str, value):
+        if name == CHECKSUMS:
+            path, digests = value
+            self.checksums[path] = digests
+
     def _make_groups(self, files: list[Path]) -> dict[filename_pattern, list[Path]]:
         groups = defaultdict(list)
         for file in files:
@@ -303,26 +1200,128 @@ class FASTQValidatorLogic:
             group.sort()
         return groups
 
-    def _find_counts(self, groups: dict[filename_pattern, list[Path]], lock):
-        with lock:
-            for pattern, paths in groups.items():
-                if len(paths) == 1:
-                    # This would happen if there was a file that matched the prefix_read_set pattern
-                    # but did not have a counterpart for comparison; this probably should not happen but
-                    # is currently only logged and does not throw an exception
-                    self._ungrouped_files.append(paths[0])
-                    continue
-                comparison = {}
-                for path in paths:
-                    comparison[str(path)] = self._file_record_counts.get(str(path))
-                if not (len(set(comparison.values())) == 1):
-                    self.errors.append(
-                        f"Counts do not match among files matching pattern {get_filename(pattern)}: {comparison}"
-                    )
-                else:
-                    _log(
-                        f"PASSED: Record count comparison for files matching pattern {get_filename(pattern)}: {comparison}"
-                    )
+    def _count_first(self, threads: int, pool_options: dict | None) -> list[str]:
+        """
+        Compare groups by their line counts alone (see count_fastq_lines); returns
+        the mismatches. Groups with a file that could not be read through are
+        left to the full validation, which reports why.
+        """
+        counts = {}
+        files = list(chain.from_iterable(self.files_by_path.values()))
+        # for file sizes only; progress is reported for validation
+        sizes = Progress("FASTQValidator", files)
+        with TaskPool(threads, **(pool_options or {})) as pool:
+            for output in pool.imap_unordered(
+                partial(count_fastq_lines, gzip_backend=self.gzip_backend),
+                files,
+                item_weight=sizes.size,
+                item_device=device_of,
+            ):
+                if not isinstance(output, TaskFailure) and output[1] is not None:
+                    counts[str(output[0])] = output[1]
+        errors_before = len(self.errors)
+        for files in self.files_by_path.values():
+            groups = {
+                pattern: group
+                for pattern, group in self._make_groups(files).items()
+                if all(str(file) in counts for file in group)
+            }
+            self._find_counts(groups, counts)
+        mismatches = self.errors[errors_before:]
+        del self.errors[errors_before:]
+        for mismatch in mismatches:
+            _log(mismatch)
+        # grouped again, with the full counts, after validation
+        self._ungrouped_files = []
+        return mismatches
+
+    def _check_pairs(
+        self, groups: list[list[Path]], threads: int, pool_options: dict | None
+    ) -> list[str]:
+        errors = []
+        # for file sizes only: validation's progress has counted these files as done
+        sizes = Progress("FASTQValidator", list(chain.from_iterable(groups)))
+        with TaskPool(threads, **(pool_options or {})) as pool:
+            for output in pool.imap_unordered(
+                partial(check_read_pairs, gzip_backend=self.gzip_backend),
+                groups,
+                item_weight=lambda files: sum(sizes.size(file) for file in files),
+                item_device=lambda files: device_of(files[0]),
+            ):
+                if isinstance(output, TaskFailure):
+                    output = [
+                        f"Read IDs of {printable_filenames(output.item, newlines=False)} could not be compared: {output.reason}"
+                    ]
+                errors.extend(output)
+        return errors
+
+    def _find_counts(
+        self, groups: dict[filename_pattern, list[Path]], counts: dict[str, int] | None = None
+    ) -> list[list[Path]]:
+        """
+        Report groups whose record counts (by default _file_record_counts) differ;
+        returns the groups whose counts match.
+        """
+        if counts is None:
+            counts = self._file_record_counts
+        matched = []
+        for pattern, paths in groups.items():
+            if len(paths) == 1:
+                # This would happen if there was a file that matched the prefix_read_set pattern
+                # but did not have a counterpart for comparison; this probably should not happen but
+                # is currently only logged and does not throw an exception
+                self._ungrouped_files.append(paths[0])
+                continue
+            comparison = {}
+            for path in paths:
+                comparison[str(path)] = counts.get(str(path))
+            if not (len(set(comparison.values())) == 1):
+                self.errors.append(
+                    f"Counts do not match among files matching pattern {get_filename(pattern)}: {comparison}"
+                )
+            else:
+                _log(
+                    f"PASSED: Record count comparison for files matching pattern {get_filename(pattern)}: {comparison}"
+                )
+                if None not in comparison.values():
+                    matched.append(paths)
+        return matched
+
+
+def validate_fastq_item(
+    item: Path | ArchivePath | FileRange | FileHash,
+    engine: str,
+    gzip_backend: str,
+    qc_dir: str | Path | None = None,
+    max_errors: int | None = MAX_ERRORS_PER_FILE,
+    sample_blocks: int | None = None,
+) -> FileResult | RangeScan | None:
+    """
+    Worker task: validate one file, or scan one range of a split file, with a
+    validator of its own, so nothing from other files is sent or returned.
+    A FileHash only reads its file through, for the checksums reported on close.
+    """
+    if isinstance(item, FileHash):
+        with open_sequential(item.file):
+            return None
+    validate_object = FASTQValidatorLogic(
+        engine=engine,
+        gzip_backend=gzip_backend,
+        qc_dir=qc_dir,
+        max_errors=max_errors,
+        sample_blocks=sample_blocks,
+    )
+    if isinstance(item, FileRange):
+        return validate_object.scan_range(item)
+    _log(f"Validating matching fastq file {item}")
+    validate_object.validate_fastq_file(item)
+    return FileResult(
+        item,
+        validate_object._file_record_counts.get(str(item)),
+        validate_object.errors,
+        validate_object.qc.get(str(item)),
+        validate_object.sampled.get(str(item)),
+    )
 
 
 def main():
@@ -331,18 +1330,50 @@ def main():
         "filepaths", type=Path, nargs="+", help="Files to validate for FASTQ syntax"
     )
     parser.add_argument("coreuse", type=int, help="Number of cores to use")
+    parser.add_argument("--engine", choices=ENGINES, default="vectorized")
+    parser.add_argument("--gzip-backend", choices=GZIP_BACKENDS, default="auto")
+    parser.add_argument(
+        "--check-pairs", action="store_true", help="Compare read IDs of paired files"
+    )
+    parser.add_argument("--qc-dir", type=Path, help="Write a QC summary per file here")
+    parser.add_argument(
+        "--count-first", action="store_true", help="Compare line counts before validating"
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Compare line counts first, and do not validate if any group mismatches",
+    )
+    parser.add_argument(
+        "--sample-blocks",
+        type=int,
+        help="Validate only the head, the tail and this many random windows of each file",
+    )
+    parser.add_argument(
+        "--max-errors",
+        type=int,
+        default=MAX_ERRORS_PER_FILE,
+        help="Errors reported per file, the rest only counted (0 for no limit)",
+    )
 
     args = parser.parse_args()
-    validator = FASTQValidatorLogic(True)
+    validator = FASTQValidatorLogic(
+        True,
+        engine=args.engine,
+        gzip_backend=args.gzip_backend,
+        check_pairs=args.check_pairs,
+        qc_dir=args.qc_dir,
+        max_errors=args.max_errors or None,
+        count_first=args.count_first,
+        fail_fast=args.fail_fast,
+        sample_blocks=args.sample_blocks,
+    )
     if not (threads := args.coreuse):
-        cpus = cpu_count()
-        threads = cpus // 4 if cpus else 1
+        threads = default_worker_count(available_cpus())
     if isinstance(args.filepaths, list):
-        filepaths = [Path(path) for path in args.filepaths]
-    elif isinstance(args.filepaths, Path):
-        filepaths = [args.filepaths]
-    elif isinstance(args.filepaths, str):
-        filepaths = [Path(args.filepaths)]
+        filepaths = [to_path(path) for path in args.filepaths]
+    elif isinstance(args.filepaths, (Path, str)):
+        filepaths = [to_path(args.filepaths)]
     else:
         validator.errors.append(
             f"Validator init received base_paths arg as type {type(args.filepaths)}"
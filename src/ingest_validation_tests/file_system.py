@@ -0,0 +1,251 @@
+import io
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+from archive_path import ArchivePath
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+"""int: granularity of range requests made by CachedRangeFile
+"""
+
+DEFAULT_MAX_GAP = 16 * 1024
+"""int: ranges separated by less than this many bytes are fetched as one request
+"""
+
+
+class FileSystem(ABC):
+    """
+    Minimal fsspec-style file system: subclasses implement size() and
+    _read_range(), and may override _open_handle() to keep a file open across
+    the ranges read through one CachedRangeFile; everything else is shared.
+    Counters of backend requests and bytes read make the I/O pattern of a
+    check observable.
+
+    Usage:
+        fs = LocalFileSystem()
+        header, footer = fs.cat_ranges([path, path], [0, size - 1024], [8192, size])
+        with fs.open(path) as f:
+            tf = tifffile.TiffFile(f)
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_read = 0
+
+    @abstractmethod
+    def size(self, path) -> int:
+        pass
+
+    @abstractmethod
+    def _read_range(self, path, start: int, end: int, handle=None) -> bytes:
+        """
+        Read [start, end) of path, through handle if it is not None.
+        """
+
+    def _open_handle(self, path):
+        """
+        Open a handle for repeated _read_range() calls on path, or return
+        None if reads need none.
+        """
+        return None
+
+    def cat_file(self, path, start: int = 0, end: int | None = None, handle=None) -> bytes:
+        if end is None:
+            end = self.size(path)
+        data = self._read_range(path, start, end, handle)
+        self.requests += 1
+        self.bytes_read += len(data)
+        return data
+
+    def cat_ranges(
+        self,
+        paths: list,
+        starts: list[int],
+        ends: list[int],
+        max_gap: int = DEFAULT_MAX_GAP,
+        handle=None,
+    ) -> list[bytes]:
+        """
+        Read many (path, start, end) ranges, merging ranges of the same file
+        that overlap or lie within max_gap bytes of each other into a single
+        backend request. Results are returned in the order requested; handle,
+        from _open_handle(), is only valid when every path is the same file.
+        """
+        requested = sorted(range(len(paths)), key=lambda i: (str(paths[i]), starts[i], ends[i]))
+        results: list[bytes] = [b""] * len(paths)
+        merged: list[tuple[object, int, int, list[int]]] = []
+        for i in requested:
+            if (
+                merged
+                and str(merged[-1][0]) == str(paths[i])
+                and starts[i] <= merged[-1][2] + max_gap
+            ):
+                path, start, end, members = merged[-1]
+                merged[-1] = (path, start, max(end, ends[i]), members + [i])
+            else:
+                merged.append((paths[i], starts[i], ends[i], [i]))
+        for path, start, end, members in merged:
+            data = self.cat_file(path, start, end, handle)
+            for i in members:
+                results[i] = data[starts[i] - start : ends[i] - start]
+        return results
+
+    def open(
+        self,
+        path,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        readahead_blocks: int = 1,
+    ) -> "CachedRangeFile":
+        return CachedRangeFile(self, path, block_size, readahead_blocks)
+
+
+class LocalFileSystem(FileSystem):
+    """
+    Local files and archive members (see archive_path.ArchivePath). A handle
+    is an open binary file; for a compressed archive member, keeping it open
+    means forward reads continue decompressing where the last range stopped
+    instead of starting again from the beginning of the member.
+    """
+
+    def size(self, path) -> int:
+        if isinstance(path, ArchivePath):
+            return path.stat().st_size
+        return os.stat(path).st_size
+
+    def _open_handle(self, path):
+        if isinstance(path, ArchivePath):
+            return path.open("rb")
+        return open(Path(path), "rb", buffering=0)
+
+    def _read_range(self, path, start: int, end: int, handle=None) -> bytes:
+        if handle is None:
+            with self._open_handle(path) as handle:
+                return self._read_range(path, start, end, handle)
+        if isinstance(path, ArchivePath):
+            handle.seek(start)
+            return handle.read(end - start)
+        return os.pread(handle.fileno(), end - start, start)
+
+
+class MemoryFileSystem(FileSystem):
+    """
+    In-memory files keyed by path string; used in tests and as the reference
+    implementation of the interface.
+    """
+
+    def __init__(self, files: dict[str, bytes] | None = None):
+        super().__init__()
+        self.files = {str(path): data for path, data in (files or {}).items()}
+
+    def size(self, path) -> int:
+        return len(self.files[str(path)])
+
+    def _read_range(self, path, start: int, end: int, handle=None) -> bytes:
+        return self.files[str(path)][start:end]
+
+
+class CachedRangeFile(io.RawIOBase):
+    """
+    Seekable read-only file over a FileSystem that fetches fixed-size blocks
+    on demand, reads ahead `readahead_blocks` blocks on every miss and keeps
+    up to `max_blocks` blocks in an LRU cache. Header-only TIFF checks touch a
+    handful of blocks, so only a few KB are read from a multi-GB file. One
+    backend handle is kept open for the file's lifetime; close it when done.
+    """
+
+    def __init__(
+        self,
+        fs: FileSystem,
+        path,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        readahead_blocks: int = 1,
+        max_blocks: int = 64,
+    ):
+        self.fs = fs
+        self.path = path
+        self.name = str(path)
+        self.block_size = block_size
+        self.readahead_blocks = readahead_blocks
+        self.max_blocks = max_blocks
+        self._size = fs.size(path)
+        self._pos = 0
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._handle = fs._open_handle(path)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if self._pos < 0:
+            raise ValueError("Negative seek position")
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def prefetch(self, ranges: list[tuple[int, int]]):
+        """
+        Fetch all blocks covering the given (start, end) byte ranges in as few
+        backend requests as possible.
+        """
+        blocks = set()
+        for start, end in ranges:
+            start, end = max(0, start), min(self._size, end)
+            if end > start:
+                blocks.update(range(start // self.block_size, (end - 1) // self.block_size + 1))
+        self._fetch_blocks(sorted(blocks))
+
+    def _fetch_blocks(self, block_numbers: list[int]):
+        missing = [n for n in block_numbers if n not in self._blocks]
+        if not missing:
+            return
+        starts = [n * self.block_size for n in missing]
+        ends = [min(self._size, start + self.block_size) for start in starts]
+        datas = self.fs.cat_ranges(
+            [self.path] * len(missing), starts, ends, max_gap=0, handle=self._handle
+        )
+        for n, data in zip(missing, datas):
+            self._blocks[n] = data
+        while len(self._blocks) > max(self.max_blocks, len(block_numbers)):
+            self._blocks.popitem(last=False)
+
+    def readinto(self, buffer) -> int:
+        length = max(0, min(len(buffer), self._size - self._pos))
+        if not length:
+            return 0
+        first = self._pos // self.block_size
+        last = (self._pos + length - 1) // self.block_size
+        if any(n not in self._blocks for n in range(first, last + 1)):
+            last_block = (self._size - 1) // self.block_size
+            self._fetch_blocks(
+                list(range(first, min(last + self.readahead_blocks, last_block) + 1))
+            )
+        copied = 0
+        for n in range(first, last + 1):
+            block = self._blocks[n]
+            self._blocks.move_to_end(n)
+            block_start = self._pos + copied - n * self.block_size
+            chunk = block[block_start : block_start + length - copied]
+            buffer[copied : copied + len(chunk)] = chunk
+            copied += len(chunk)
+        self._pos += copied
+        return copied
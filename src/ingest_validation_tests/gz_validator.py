@@ -1,51 +1,70 @@
-import gzip
 import re
-from multiprocessing import Pool
 
+from archive_path import open_compressed
+from task_pool import report_progress
 from validator import Validator
 
+# how error messages name each format
+_FORMATS = {".gz": "gzipped", ".bz2": "bzip2-compressed", ".zst": "zstd-compressed"}
+
 
 def _log(message: str):
     print(message)
 
 
 class Engine(object):
+    def __init__(self, gzip_backend: str = "auto"):
+        self.gzip_backend = gzip_backend
+
     def __call__(self, filename):
-        excluded = r".*/*fastq.gz"
+        excluded = r".*/*fastq.(gz|bz2|zst)"
         if re.search(excluded, filename.as_posix()):
             return
         try:
             _log(f"Threaded {filename}")
-            with gzip.open(filename) as g_f:
+            with open_compressed(filename, backend=self.gzip_backend) as g_f:
+                position = 0
                 while True:
                     buf = g_f.read(1024 * 1024)
                     if not buf:
                         break
+                    # compressed bytes consumed, to match the on-disk size
+                    consumed = g_f.fileobj.tell()
+                    report_progress(consumed - position)
+                    position = consumed
         except Exception as e:
-            _log(f"{filename} is not a valid gzipped file {e}")
-            return f"{filename} is not a valid gzipped file"
+            kind = _FORMATS[filename.suffix]
+            _log(f"{filename} is not a valid {kind} file {e}")
+            return f"{filename} is not a valid {kind} file"
 
 
 class GZValidator(Validator):
-    description = "Recursively checking gzipped files for damage using multiprocessing pools"
+    description = (
+        "Recursively checking gzipped, bzip2 and zstd files for damage using multiprocessing pools"
+    )
     cost = 5.0
     version = "1.0"
+    hashes_files = True
+
+    def __init__(self, *args, gzip_backend: str = "auto", **kwargs):
+        """
+        gzip_backend: how files are decompressed; see gzip_backend.GZIP_BACKENDS
+        """
+        super().__init__(*args, **kwargs)
+        self.gzip_backend = gzip_backend
 
     def _collect_errors(self) -> list[str | None]:
         data_output2 = []
         file_list = []
         for path in self.paths:
-            for glob_expr in ["**/*.gz"]:
+            for glob_expr in ["**/*.gz", "**/*.bz2", "**/*.zst"]:
                 file_list.extend(path.glob(glob_expr))
-        pool = Pool(self.threads)
         try:
-            engine = Engine()
-            data_output = pool.imap_unordered(engine, file_list)
+            engine = Engine(self.gzip_backend)
+            data_output = self._map_files(engine, file_list)
         except Exception as e:
             _log(f"Error {e}")
-            data_output2.extend(f"Error: {e}")
+            data_output2.append(f"Error: {e}")
         else:
             [data_output2.append(output) for output in data_output if output]
-        pool.close()
-        pool.join()
         return self._return_result(data_output2, file_list)
@@ -0,0 +1,272 @@
+import gzip
+import io
+import queue
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import IO, Callable, Iterator
+
+from worker_sizing import available_cpus
+
+try:
+    from isal import isal_zlib
+except ImportError:
+    isal_zlib = None
+
+try:
+    from zlib_ng import zlib_ng
+except ImportError:
+    zlib_ng = None
+
+GZIP_BACKENDS = ("auto", "stdlib", "threaded", "bgzf")
+"""tuple[str]: ways open_gzip can decompress. "stdlib" is gzip.GzipFile; "threaded"
+inflates on a background thread, overlapped with the reader; "bgzf" inflates the
+blocks of a BGZF file (bgzip, samtools) on several threads at once, and is
+"threaded" for other files; "auto" is "bgzf", or "stdlib" on a single CPU where
+there is nothing to overlap with.
+"""
+
+INFLATE_LIBRARIES = {
+    name: module
+    for name, module in [("isal", isal_zlib), ("zlib-ng", zlib_ng), ("zlib", zlib)]
+    if module is not None
+}
+"""dict: zlib-compatible inflate implementations available here, fastest first;
+python-isal and zlib-ng are optional
+"""
+
+INFLATE_THREADS = 4
+"""int: most threads inflating the blocks of one BGZF file (fewer on fewer CPUs)
+"""
+
+INFLATE_CHUNK_BYTES = 1024 * 1024
+"""int: compressed bytes read, and most decompressed bytes produced, at a time
+"""
+
+_BGZF_HEADER = 18
+_QUEUED_CHUNKS = 2
+
+
+def inflate_library(name: str | None = None):
+    """
+    The named inflate implementation, or the fastest one available.
+    """
+    if name is None:
+        return next(iter(INFLATE_LIBRARIES.values()))
+    if name not in INFLATE_LIBRARIES:
+        raise ValueError(
+            f"Inflate library {name} is not available; have {', '.join(INFLATE_LIBRARIES)}"
+        )
+    return INFLATE_LIBRARIES[name]
+
+
+def bgzf_block_size(header: bytes) -> int | None:
+    """
+    Size of the BGZF block starting with header (at least 18 bytes of it),
+    or None if it does not start a BGZF block.
+    """
+    if (
+        len(header) < _BGZF_HEADER
+        or header[:4] != b"\x1f\x8b\x08\x04"
+        or header[12:16] != b"BC\x02\x00"
+    ):
+        return None
+    return int.from_bytes(header[16:18], "little") + 1
+
+
+def _members(
+    read: Callable[[int], bytes], library, data: bytes = b"", members: int = 0
+) -> Iterator[bytes]:
+    """
+    Decompressed data of consecutive gzip members, from data and then read()
+    (after `members` already read). Like gzip.GzipFile, zero padding after a
+    member is skipped, anything else that is not a gzip header is a
+    BadGzipFile, and a truncated member an EOFError.
+    """
+    decompressor = None
+    full = False
+    while True:
+        if decompressor is None:
+            if members:
+                data = data.lstrip(b"\x00")
+            if len(data) < 2:
+                if more := read(INFLATE_CHUNK_BYTES):
+                    data += more
+                    continue
+                if data:
+                    raise gzip.BadGzipFile(f"Not a gzipped file ({data!r})")
+                return
+            if data[:2] != b"\x1f\x8b":
+                raise gzip.BadGzipFile(f"Not a gzipped file ({data[:2]!r})")
+            decompressor = library.decompressobj(16 + zlib.MAX_WBITS)
+        # a full output buffer may leave output pending without input left
+        if not data and not full:
+            if not (data := read(INFLATE_CHUNK_BYTES)):
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+        output = decompressor.decompress(data, INFLATE_CHUNK_BYTES)
+        full = len(output) == INFLATE_CHUNK_BYTES
+        if decompressor.eof:
+            data = decompressor.unused_data
+            decompressor = None
+            members += 1
+        else:
+            data = decompressor.unconsumed_tail
+        if output:
+            yield output
+
+
+def _inflate_blocks(library, blocks: list[bytes]) -> bytes:
+    return b"".join(library.decompress(block, 16 + zlib.MAX_WBITS) for block in blocks)
+
+
+def _bgzf(
+    read: Callable[[int], bytes], library, threads: int, data: bytes = b""
+) -> Iterator[bytes]:
+    """
+    Decompressed data of a BGZF file: runs of whole blocks are inflated on
+    `threads` threads, and yielded in order. Whatever does not parse as BGZF
+    blocks (a plain gzip member, a truncated block) is left to _members.
+    """
+    pending: deque = deque()
+    members = 0
+    bgzf = True
+    eof = False
+    with ThreadPoolExecutor(threads) as executor:
+        while True:
+            while bgzf and not eof and len(pending) <= threads:
+                more = read(INFLATE_CHUNK_BYTES)
+                eof = not more
+                data += more
+                blocks = []
+                start = 0
+                while (size := bgzf_block_size(data[start : start + _BGZF_HEADER])) and (
+                    start + size <= len(data)
+                ):
+                    blocks.append(data[start : start + size])
+                    start += size
+                data = data[start:]
+                if blocks:
+                    pending.append(executor.submit(_inflate_blocks, library, blocks))
+                    members += len(blocks)
+                elif len(data) >= _BGZF_HEADER and bgzf_block_size(data) is None:
+                    bgzf = False
+            if not pending:
+                break
+            if output := pending.popleft().result():
+                yield output
+    yield from _members(read, library, data, members)
+
+
+class InflatingReader(io.RawIOBase):
+    """
+    Decompressed data, produced by `chunks` on a background thread so
+    inflating overlaps with whatever consumes it. Errors raised while
+    inflating are raised by the read that reaches them, after all the data
+    before them. fileobj is the compressed stream, as for gzip.GzipFile.
+    """
+
+    def __init__(self, fileobj: IO[bytes], chunks: Callable[[], Iterator[bytes]]):
+        self.fileobj = fileobj
+        self._queue: queue.Queue = queue.Queue(_QUEUED_CHUNKS)
+        self._stopping = threading.Event()
+        self._chunk = memoryview(b"")
+        self._done: BaseException | bool = False
+        self._thread = threading.Thread(target=self._produce, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stopping.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self, chunks: Callable[[], Iterator[bytes]]):
+        iterator = chunks()
+        try:
+            for chunk in iterator:
+                if not self._put(chunk):
+                    return
+            self._put(None)
+        except BaseException as e:
+            self._put(e)
+        finally:
+            iterator.close()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            if self._done is True:
+                return 0
+            if self._done:
+                raise self._done
+            item = self._queue.get()
+            if item is None:
+                self._done = True
+            elif isinstance(item, BaseException):
+                self._done = item
+            else:
+                self._chunk = memoryview(item)
+        nbytes = min(len(buffer), len(self._chunk))
+        buffer[:nbytes] = self._chunk[:nbytes]
+        self._chunk = self._chunk[nbytes:]
+        return nbytes
+
+    def close(self):
+        if not self.closed:
+            self._stopping.set()
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.fileobj.close()
+        super().close()
+
+
+def open_inflating(
+    fileobj: IO[bytes],
+    backend: str = "auto",
+    library: str | None = None,
+    threads: int | None = None,
+) -> IO[bytes]:
+    """
+    Binary stream of the decompressed contents of the gzip data in fileobj
+    (which it closes), using one of GZIP_BACKENDS and, for all but "stdlib",
+    one of INFLATE_LIBRARIES. Errors are the same types as gzip.GzipFile's for
+    missing or bad headers and truncation; damaged deflate data raises the
+    inflate library's error.
+    """
+    if backend not in GZIP_BACKENDS:
+        raise ValueError(
+            f"Unknown gzip backend {backend}; expected one of {', '.join(GZIP_BACKENDS)}"
+        )
+    cpus = available_cpus()
+    if backend == "auto" and cpus < 2:
+        backend = "stdlib"
+    if backend == "stdlib":
+        gzip_file = gzip.GzipFile(fileobj=fileobj, mode="rb")
+        # GzipFile closes myfileobj on close; hand it the underlying handle
+        gzip_file.myfileobj = gzip_file.fileobj
+        return gzip_file
+    inflate = inflate_library(library)
+    header = b""
+    if backend != "threaded":
+        header = fileobj.read(_BGZF_HEADER)
+        if bgzf_block_size(header) is None:
+            backend = "threaded"
+    if backend == "threaded":
+        chunks = partial(_members, fileobj.read, inflate, header)
+    else:
+        threads = threads or min(INFLATE_THREADS, cpus)
+        chunks = partial(_bgzf, fileobj.read, inflate, threads, header)
+    reader = io.BufferedReader(InflatingReader(fileobj, chunks), INFLATE_CHUNK_BYTES)
+    # compressed bytes read so far, for progress in on-disk bytes (as gzip.GzipFile)
+    reader.fileobj = fileobj
+    return reader
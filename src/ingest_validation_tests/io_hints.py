@@ -0,0 +1,126 @@
+import io
+import os
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+from checksums import HashingReader, hashing_algorithms
+
+READ_BUFFER_SIZE = 1024 * 1024
+"""int: buffer size for sequential passes; larger reads let kernel read-ahead keep up
+"""
+
+DROP_BEHIND_BYTES = 64 * 1024 * 1024
+"""int: consumed bytes are dropped from the page cache in runs of this size
+"""
+
+_enabled = os.environ.get("IVT_IO_HINTS", "1") != "0"
+
+
+def hints_supported() -> bool:
+    return hasattr(os, "posix_fadvise")
+
+
+def hints_enabled() -> bool:
+    return _enabled and hints_supported()
+
+
+@contextmanager
+def read_hints(enabled: bool | None) -> Iterator[None]:
+    """
+    Turn read hints on or off for the duration of a validation run (None
+    leaves the current setting). Worker processes forked inside the block
+    inherit the setting. The IVT_IO_HINTS=0 environment variable turns them
+    off by default.
+    """
+    global _enabled
+    previous = _enabled
+    if enabled is not None:
+        _enabled = enabled
+    try:
+        yield
+    finally:
+        _enabled = previous
+
+
+def device_of(file) -> int | None:
+    """
+    st_dev of the file, or of its archive for archive members; None if unknown.
+    """
+    try:
+        return os.stat(getattr(file, "archive", file)).st_dev
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+class SequentialFile(io.FileIO):
+    """
+    Read-only file for a single front-to-back pass. It advises
+    POSIX_FADV_SEQUENTIAL (Linux doubles read-ahead), and drops each consumed
+    run of DROP_BEHIND_BYTES with POSIX_FADV_DONTNEED. A multi-GB pass then
+    no longer evicts everything else from the page cache. Seeks (e.g. to a
+    TIFF IFD) start a new run; nothing is dropped ahead of the read position.
+    """
+
+    def __init__(self, path, drop_behind: int = DROP_BEHIND_BYTES):
+        super().__init__(path, "rb")
+        self.drop_behind = drop_behind
+        self._run_start = 0
+        self._position = 0
+        os.posix_fadvise(self.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    def _drop_run(self):
+        if self._position > self._run_start:
+            os.posix_fadvise(
+                self.fileno(),
+                self._run_start,
+                self._position - self._run_start,
+                os.POSIX_FADV_DONTNEED,
+            )
+        self._run_start = self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        position = super().seek(offset, whence)
+        if position != self._position:
+            self._drop_run()
+            self._run_start = self._position = position
+        return position
+
+    def readinto(self, buffer) -> int | None:
+        nbytes = super().readinto(buffer)
+        if nbytes:
+            self._position += nbytes
+            if self._position - self._run_start >= self.drop_behind:
+                self._drop_run()
+        return nbytes
+
+    def read(self, size: int = -1) -> bytes:
+        # FileIO.read does not go through readinto
+        if size is None or size < 0:
+            return self.readall()
+        buffer = bytearray(size)
+        return bytes(buffer[: self.readinto(buffer) or 0])
+
+    def readall(self) -> bytes:
+        data = super().readall()
+        self._position += len(data)
+        return data
+
+    def close(self):
+        if not self.closed:
+            self._drop_run()
+        super().close()
+
+
+def open_sequential(path, mode: str = "rb") -> IO:
+    """
+    open() for a full read pass over a local file, with read hints applied
+    when enabled and supported, and the bytes hashed while they are read when
+    a checksums.hashing() run is active ("rb" or "rt" only).
+    """
+    raw: io.RawIOBase = SequentialFile(path) if hints_enabled() else io.FileIO(path, "rb")
+    if algorithms := hashing_algorithms():
+        raw = HashingReader(raw, path, algorithms)
+    binary = io.BufferedReader(raw, buffer_size=READ_BUFFER_SIZE)
+    if "t" in mode:
+        return io.TextIOWrapper(binary)
+    return binary
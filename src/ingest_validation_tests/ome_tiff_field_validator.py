@@ -1,17 +1,18 @@
 import itertools
 import re
 from functools import partial
-from multiprocessing import Pool
 from pathlib import Path
 
 import xmlschema
-from validator import Validator, check_ome_tiff_file, ome_tiff_globs
+from products import OME_XML
+from validator import Validator, check_ome_tiff_file, get_xml_schema, ome_tiff_globs
 
 
 class OmeTiffFieldValidator(Validator):
     description = "Recursively test all ome-tiff files for an assay-specific list of fields"
     cost = 1.0
     version = "1.0"
+    consumes = [OME_XML]
     schemas = {}
     """
     To add a new schema, first create a derivative XSD schema based on the OME XML schema
@@ -44,7 +45,7 @@ class OmeTiffFieldValidator(Validator):
             for regex_str in regex:
                 if re.fullmatch(regex_str, self.assay_type):
                     try:
-                        xml_schema = xmlschema.XMLSchema(schema)
+                        xml_schema = get_xml_schema(schema)
                     except xmlschema.XMLSchemaException or SyntaxError:
                         raise Exception(f"Schema {schema} is invalid.")
                     self.schemas[schema] = xml_schema
@@ -65,22 +66,30 @@ class OmeTiffFieldValidator(Validator):
         if not filenames_to_test:
             return []
 
-        pool = Pool(self.threads)
         rslt_list = [
             rslt
-            for rslt in pool.imap_unordered(partial(self.errors_by_schema), filenames_to_test)
+            for rslt in self._map_files(
+                partial(self.errors_by_schema),
+                filenames_to_test,
+                on_failure=lambda failure: [
+                    f"{failure.item} could not be validated: {failure.reason}"
+                ],
+                reads_contents=False,
+            )
             if rslt is not None
         ]
-        pool.close()
-        pool.join()
         return self._return_result(
             list(itertools.chain.from_iterable(rslt_list)) if rslt_list else None,
             filenames_to_test,
         )
 
     def errors_by_schema(self, file: Path) -> list[str] | None:
+        upstream = self.products.get(OME_XML, file) if self.products else None
+        if upstream is not None and upstream.error:
+            # already rejected (and reported) by the plugin that produced it
+            return None
         try:
-            xml_document = check_ome_tiff_file(file)
+            xml_document = check_ome_tiff_file(file, products=self.products)
         except Exception as e:
             return [str(e)]
         compiled_errors = []
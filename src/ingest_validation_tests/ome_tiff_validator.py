@@ -1,11 +1,12 @@
-from multiprocessing import Pool
+from functools import partial
 
+from products import OME_XML, ProductStore
 from validator import Validator, check_ome_tiff_file, ome_tiff_globs
 
 
-def _check_ome_tiff_file(file):
+def _check_ome_tiff_file(file, products: ProductStore | None = None):
     try:
-        check_ome_tiff_file(file)
+        check_ome_tiff_file(file, products=products)
     except Exception as e:
         return str(e)
 
@@ -14,9 +15,9 @@ class OmeTiffValidator(Validator):
     description = "Recursively test all ome-tiff files for validity"
     cost = 1.0
     version = "1.0"
+    produces = [OME_XML]
 
     def _collect_errors(self) -> list[str | None]:
-        pool = Pool(self.threads)
         filenames_to_test = []
         for glob_expr in ome_tiff_globs:
             for path in self.paths:
@@ -25,9 +26,11 @@ class OmeTiffValidator(Validator):
 
         rslt_list: list[str | None] = list(
             rslt
-            for rslt in pool.imap_unordered(_check_ome_tiff_file, filenames_to_test)
+            for rslt in self._map_files(
+                partial(_check_ome_tiff_file, products=self.products),
+                filenames_to_test,
+                reads_contents=False,
+            )
             if rslt is not None
         )
-        pool.close()
-        pool.join()
         return self._return_result(rslt_list, filenames_to_test)
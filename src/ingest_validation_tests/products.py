@@ -0,0 +1,100 @@
+import atexit
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from archive_path import ArchivePath
+
+OME_XML = "ome_xml"
+"""str: product name; OmeXml of a file's first IFD, and the base OME schema check result
+"""
+
+OmeXml = namedtuple("OmeXml", ["xml", "error"])
+"""OME-XML text (None if unreadable) and the error reported for the file (None if valid).
+"""
+
+
+class ProductStore:
+    """
+    Intermediate per-file results shared between plugins of one validation
+    run, e.g. the OME-XML parsed by OmeTiffValidator and reused by
+    OmeTiffFieldValidator and ImageSizeValidator.
+
+    Products are pickled under `directory`, keyed by product name, path, size
+    and mtime, so pool workers of any plugin can read and write them.
+
+    Plugins created without a store share the process-wide default() store,
+    so the usual loop over validation_class_iter() reuses products with no
+    extra setup. Long-lived callers should pass a store per run instead (the
+    validation service does), so products are dropped when the run ends.
+
+    Usage:
+        with ProductStore.temporary() as products:
+            for plugin_class in validation_class_iter():
+                plugin_class(base_paths, assay_type, products=products).collect_errors()
+    """
+
+    _default: "ProductStore | None" = None
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._cache: dict[str, Any] = {}
+
+    @classmethod
+    @contextmanager
+    def temporary(cls) -> Iterator["ProductStore"]:
+        with tempfile.TemporaryDirectory(prefix="ivt-products-") as directory:
+            yield cls(directory)
+
+    @classmethod
+    def default(cls) -> "ProductStore":
+        """
+        The store shared by every plugin created in this process without one;
+        its directory is removed when the process exits.
+        """
+        if cls._default is None:
+            directory = tempfile.mkdtemp(prefix="ivt-products-")
+            owner = os.getpid()
+
+            def remove():
+                # forked processes inherit the hook; only the creator cleans up
+                if os.getpid() == owner:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+            atexit.register(remove)
+            cls._default = cls(directory)
+        return cls._default
+
+    def _key(self, name: str, file: Path | ArchivePath) -> str:
+        try:
+            stat = file.stat() if isinstance(file, ArchivePath) else os.stat(file)
+            identity = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            identity = ""
+        return hashlib.sha1(f"{name}\0{file}\0{identity}".encode()).hexdigest()
+
+    def get(self, name: str, file: Path | ArchivePath, default=None):
+        key = self._key(name, file)
+        if key in self._cache:
+            return self._cache[key]
+        try:
+            with open(self.directory / key, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        self._cache[key] = value
+        return value
+
+    def put(self, name: str, file: Path | ArchivePath, value):
+        key = self._key(name, file)
+        self._cache[key] = value
+        temporary = self.directory / f".{key}.{os.getpid()}"
+        with open(temporary, "wb") as f:
+            pickle.dump(value, f)
+        os.replace(temporary, self.directory / key)
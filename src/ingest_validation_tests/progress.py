@@ -0,0 +1,118 @@
+import time
+from pathlib import Path
+from typing import Callable
+
+from archive_path import ArchivePath
+
+
+def _file_size(file: Path | ArchivePath | str) -> int:
+    try:
+        return (file if isinstance(file, ArchivePath) else Path(file)).stat().st_size
+    except OSError:
+        return 0
+
+
+class Progress:
+    """
+    Files and bytes done/total for one plugin run, with a throughput-based ETA.
+
+    Bytes are on-disk bytes: workers report how far into a file they have
+    read (see task_pool.report_progress) and a file counts in full once its
+    result is in. The callback is invoked at most every `min_interval` seconds,
+    plus once when the last file finishes.
+
+    Usage:
+        def show(progress):
+            print(progress.as_dict())
+
+        v = ValidatorSubclass(<base_paths>, <assay_type>, progress_callback=show)
+        v.collect_errors()
+    """
+
+    def __init__(
+        self,
+        plugin: str,
+        files: list,
+        callback: Callable[["Progress"], None] | None = None,
+        min_interval: float = 1.0,
+    ):
+        self.plugin = plugin
+        self.callback = callback
+        self.min_interval = min_interval
+        self._sizes = {str(file): _file_size(file) for file in files}
+        self._reported: dict[str, int] = {}
+        self.files_total = len(files)
+        self.files_done = 0
+        self.bytes_total = sum(self._sizes.values())
+        self.bytes_done = 0
+        self.started = time.monotonic()
+        self._last_notified = 0.0
+        self._notify(force=True)
+
+    def size(self, file) -> int:
+        """
+        On-disk size of a file not yet done (0 once done or if unknown).
+        """
+        return self._sizes.get(str(file), 0)
+
+    def advance(self, file, nbytes: int):
+        """
+        Record nbytes more read from file; never counts past the file's size.
+        """
+        key = str(file)
+        already = self._reported.get(key, 0)
+        nbytes = max(0, min(nbytes, self._sizes.get(key, 0) - already))
+        self._reported[key] = already + nbytes
+        self.bytes_done += nbytes
+        self._notify()
+
+    def file_done(self, file):
+        key = str(file)
+        self.bytes_done += self._sizes.get(key, 0) - self._reported.pop(key, 0)
+        self._sizes.pop(key, None)
+        self.files_done += 1
+        self._notify(force=self.files_done == self.files_total)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """
+        Bytes per second so far.
+        """
+        elapsed = self.elapsed
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """
+        Estimated seconds remaining, from bytes/s (or files/s if sizes are unknown).
+        """
+        if self.files_done == self.files_total:
+            return 0.0
+        if self.bytes_total and self.bytes_done:
+            return (self.bytes_total - self.bytes_done) / self.throughput
+        if self.files_done:
+            return (self.files_total - self.files_done) * self.elapsed / self.files_done
+        return None
+
+    def as_dict(self) -> dict:
+        return {
+            "plugin": self.plugin,
+            "files_done": self.files_done,
+            "files_total": self.files_total,
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "bytes_per_second": round(self.throughput, 1),
+            "eta_seconds": None if self.eta is None else round(self.eta, 1),
+        }
+
+    def _notify(self, force: bool = False):
+        if not self.callback:
+            return
+        now = time.monotonic()
+        if force or now - self._last_notified >= self.min_interval:
+            self._last_notified = now
+            self.callback(self)
@@ -3,7 +3,7 @@ from functools import cached_property
 from urllib.parse import urljoin, urlsplit
 
 import requests
-from validator import Validator
+from validator import Validator, get_http_session
 
 
 class PublicationMetadataValidator(Validator):
@@ -134,7 +134,7 @@ class PublicationMetadataValidator(Validator):
                 self.errors.append(f"Bad {doi_type} '{doi}'.")
 
     def _make_request(self, url: str) -> requests.Response:
-        return requests.get(url)
+        return get_http_session().get(url)
 
     @property
     def ingest_ui_link(self) -> str:
@@ -152,7 +152,7 @@ class PublicationMetadataValidator(Validator):
             self.app_context["entities_url"],
             f"{self.uuid}?exclude=direct_ancestors.files",
         )
-        response = requests.get(url, headers=headers)
+        response = get_http_session().get(url, headers=headers)
         response.raise_for_status()
         return response.json()
 
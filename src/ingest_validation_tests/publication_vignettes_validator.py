@@ -125,7 +125,7 @@ class PublicationVignettesValidator(Validator):
 
     def validate_vitessce_config(self, json_path, path) -> list:
         rslt = []
-        with open(json_path) as f:
+        with json_path.open() as f:
             dct = json.load(f)
             for _, val in self.url_search_iter(dct):
                 match = re.match(self.base_url_re, val)
@@ -9,6 +9,7 @@ from textwrap import dedent
 
 import pandas as pd
 import xmlschema
+from archive_path import ArchivePath, to_path
 from validator import Validator, get_non_global_paths_by_row, get_rel_filename_str
 
 # pipeline uses 0.9.2 but that does not include no-tiles arg
@@ -114,7 +115,7 @@ class QpTiffChannelValidator(Validator):
                 "csv": r"lab_processed\/images\/.*channels\.csv",
                 "qptiff": r"raw\/images\/[^\/]*qptiff",
             }.items():
-                paths_for_type = [Path(path) for path in row_paths if re.search(regex, str(path))]
+                paths_for_type = [path for path in row_paths if re.search(regex, str(path))]
                 non_global_files[row_num][file_type] = paths_for_type
         # fill in any missing files with global values or log errors
         all_files = {}
@@ -133,9 +134,9 @@ class QpTiffChannelValidator(Validator):
     def _shared_upload_get_global_files(self, base_path: Path) -> dict[str, Path | None]:
         errors = []
         csv_list = [
-            file for file in Path(base_path / "global").glob("lab_processed/images/*channels.csv")
+            file for file in (base_path / "global").glob("lab_processed/images/*channels.csv")
         ]
-        qptiff_list = [file for file in Path(base_path / "global").glob("raw/images/*qptiff")]
+        qptiff_list = [file for file in (base_path / "global").glob("raw/images/*qptiff")]
         for file_type, file_list in {"csv": csv_list, "qptiff": qptiff_list}.items():
             # should not be more than one of each file
             if len(file_list) > 1:
@@ -201,7 +202,8 @@ class QpTiffChannelValidator(Validator):
         and make sure columns are in order.
         """
 
-        df = pd.read_csv(filename)
+        with filename.open() as f:
+            df = pd.read_csv(f)
         # pipeline uses column position to determine channel & cell/nucleus segmentation
         if column_order_errors := self._check_column_order(df, filename):
             # validation can't continue if columns out of order
@@ -285,8 +287,14 @@ class QpTiffChannelComparisonValidator(QpTiffChannelValidator):
 
 
 class Engine:
+    # Set once the bioformats2raw image is known to be present, so that
+    # long-running processes (see validation_service) only shell out to
+    # docker the first time an Engine is created.
+    dependencies_checked = False
+
     def __init__(self):
-        self.check_dependencies()
+        if not Engine.dependencies_checked:
+            self.check_dependencies()
 
     def __call__(
         self, data_path: Path | int, file_dict: dict[str, Path], tmp_dir: Path
@@ -313,7 +321,8 @@ class Engine:
 
     def get_csv_channels(self, csv_path: Path) -> set[str]:
         # get channels from CSV channel_id field
-        channels = pd.read_csv(csv_path)
+        with to_path(csv_path).open() as f:
+            channels = pd.read_csv(f)
         channels_list = channels.iloc[:, 0].tolist()
         channels_list.sort()
         return set([str(channel) for channel in channels_list])
@@ -324,7 +333,7 @@ class Engine:
         try:
             return self.get_ome_xml_channels(ome_xml_path)
         except Exception as e:
-            if isinstance(data_path, Path):
+            if not isinstance(data_path, int):
                 data_desc = get_rel_filename_str(data_path, qptiff_path)
             else:
                 data_desc = f"data row {data_path}"
@@ -336,10 +345,10 @@ class Engine:
         phenocycler pipeline (v1.4.8); major changes to how QPTIFFs are converted
         in the pipeline may desync this validation.
         """
-        if isinstance(data_path, Path):
-            prefix = data_path.stem
-        else:
+        if isinstance(data_path, int):
             prefix = str(data_path)
+        else:
+            prefix = data_path.stem
         output_dirname = f"{prefix}_{qptiff_path.stem}_converted"
         ome_xml_path = Path(self.tmp_dir / output_dirname / "OME/METADATA.ome.xml")
         if Path(self.tmp_dir / output_dirname).exists():
@@ -397,6 +406,7 @@ class Engine:
         )
         if len(docker_images) == 2:
             print(f"Found docker image {docker_images[1]}.")
+            Engine.dependencies_checked = True
         elif len(docker_images) > 2:
             # found header and more than one image result
             raise Exception(f"More than one '{self.image_name}': {docker_images}")
@@ -430,7 +440,9 @@ class Engine:
         except subprocess.CalledProcessError:
             raise Exception("Failed to create Docker image.")
 
-    def run_docker_bioformats2raw(self, qptiff_path: Path, output_dirname: str):
+    def run_docker_bioformats2raw(self, qptiff_path: Path | ArchivePath, output_dirname: str):
+        # bioformats2raw reads the QPTIFF from a mounted directory
+        qptiff_path = Path(qptiff_path)
         docker_input_mount = "/input"
         docker_output_mount = "/output"
         bioformats2raw_command = [
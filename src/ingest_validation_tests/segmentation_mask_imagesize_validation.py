@@ -1,13 +1,18 @@
 from pathlib import Path
 
+from archive_path import to_path
+from file_system import FileSystem
+from products import OME_XML, ProductStore
 from tests_utils import GetParentData
 from validator import Validator, check_ome_tiff_file
 
 
-def get_ometiff_size(file) -> str | dict:
+def get_ometiff_size(
+    file, fs: FileSystem | None = None, products: ProductStore | None = None
+) -> str | dict:
     try:
         try:
-            xml_document = check_ome_tiff_file(file)
+            xml_document = check_ome_tiff_file(file, fs=fs, products=products)
         except Exception as e:
             return str(e)
         xml_image_data = (
@@ -37,6 +42,7 @@ class ImageSizeValidator(Validator):
     cost = 1.0
     version = "1.0"
     required = ["segmentation mask"]
+    consumes = [OME_XML]
     files_to_find = [
         "**/segmentation_masks/*.ome.tif",
         "**/segmentation_masks/*.ome.tiff",
@@ -59,9 +65,9 @@ class ImageSizeValidator(Validator):
             filenames_to_test = []
             parent_filenames_to_test = []
             try:
-                data_path = Path(row["data_path"])
+                data_path = to_path(row["data_path"])
                 if not data_path.is_absolute():
-                    data_path = Path(self.paths[0]).parent / data_path
+                    data_path = self.paths[0].parent / row["data_path"]
 
                 for glob_expr in self.files_to_find:
                     for file in data_path.glob(glob_expr):
@@ -82,8 +88,12 @@ class ImageSizeValidator(Validator):
                     len(parent_filenames_to_test) == 1
                 ), f"Too many or too few files Base Images ({[self.rel_filename_str(path) for path in parent_filenames_to_test]})"
 
-                segmentation_mask_size = get_ometiff_size(filenames_to_test[0])
-                base_image_size = get_ometiff_size(parent_filenames_to_test[0])
+                segmentation_mask_size = get_ometiff_size(
+                    filenames_to_test[0], products=self.products
+                )
+                base_image_size = get_ometiff_size(
+                    parent_filenames_to_test[0], products=self.products
+                )
                 assert (
                     segmentation_mask_size == base_image_size
                 ), "Files and base image size do not match"
@@ -45,7 +45,7 @@ class SegmentationMaskValidator(Validator):
         return xlsx_files
 
     def validate_file(self, file_path: Path) -> str | list[str] | None:
-        with open(file_path, "rb") as f:
+        with file_path.open("rb") as f:
             file = {"input_file": f}
             response = requests.post(
                 "https://api.stage.metadatavalidator.metadatacenter.org/service/validate-structured-xlsx",
@@ -0,0 +1,397 @@
+import os
+import resource
+import time
+from collections import defaultdict, deque, namedtuple
+from multiprocessing import Process
+from multiprocessing.connection import Connection, Pipe, wait
+from typing import Callable, Iterable, Iterator
+
+TaskFailure = namedtuple("TaskFailure", ["item", "reason"])
+"""A task that did not return: timed out, crashed its worker or raised.
+"""
+
+ADAPT_INTERVAL = 2.0
+"""float: seconds of throughput measurement between worker count changes (adaptive mode)
+"""
+
+ADAPT_MIN_GAIN = 1.05
+"""float: throughput ratio a worker must add to be kept (adaptive mode); below it, the
+difference is within what a measurement window varies by
+"""
+
+_progress_conn: Connection | None = None
+"""Connection to the parent while running inside a TaskPool worker.
+"""
+
+
+def report_progress(nbytes: int):
+    """
+    Report nbytes more of the current task's file read. Called from inside
+    per-file checks; does nothing outside a TaskPool worker.
+    """
+    if _progress_conn is not None and nbytes > 0:
+        _progress_conn.send(("progress", nbytes))
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        # peak rather than current RSS, but better than nothing (KB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def report_product(name: str, value):
+    """
+    Send a named per-item result (e.g. a file's checksums) to the parent
+    alongside the task's return value. Does nothing outside a TaskPool worker.
+    """
+    if _progress_conn is not None:
+        _progress_conn.send(("product", name, value))
+
+
+def _worker_main(conn: Connection, func: Callable, memory_limit_mb: int | None):
+    global _progress_conn
+    _progress_conn = conn
+    if memory_limit_mb:
+        limit = int(memory_limit_mb * 2**20)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        index, item = message
+        try:
+            outcome = ("ok", func(item))
+        except MemoryError:
+            outcome = ("error", f"exceeded worker memory limit of {memory_limit_mb} MB")
+        except Exception as e:
+            outcome = ("error", f"{e.__class__.__name__}: {e}")
+        conn.send(("done", index, outcome, _current_rss_mb(), _peak_rss_mb()))
+
+
+class _Worker:
+    def __init__(self, func: Callable, memory_limit_mb: int | None):
+        self.conn, child_conn = Pipe()
+        self.process = Process(
+            target=_worker_main, args=(child_conn, func, memory_limit_mb), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.task: tuple[int, object] | None = None
+        self.started = 0.0
+        self.completed = 0
+
+    def submit(self, index: int, item):
+        self.task = (index, item)
+        self.started = time.monotonic()
+        self.conn.send((index, item))
+
+    def retire(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class _PendingItems:
+    """
+    Items waiting for a worker, queued per device. An item is only handed out
+    while its device has fewer running items than its limit; items with no
+    device (or no limit) are never held back. Among eligible devices the
+    earliest item goes first, so without limits this is a plain FIFO.
+    """
+
+    def __init__(
+        self,
+        items: Iterable,
+        item_device: Callable[[object], object] | None,
+        limit_for: Callable[[object], int | None],
+    ):
+        self._queues: dict[object, deque] = {}
+        self._devices: dict[int, object] = {}
+        self._running: dict[object, int] = defaultdict(int)
+        self._limit_for = limit_for
+        self._count = 0
+        for index, item in enumerate(items):
+            device = item_device(item) if item_device else None
+            self._queues.setdefault(device, deque()).append((index, item))
+            self._devices[index] = device
+            self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def pop(self) -> tuple[int, object] | None:
+        eligible = [
+            queue
+            for device, queue in self._queues.items()
+            if queue
+            and ((limit := self._limit_for(device)) is None or self._running[device] < limit)
+        ]
+        if not eligible:
+            return None
+        index, item = min(eligible, key=lambda queue: queue[0][0]).popleft()
+        self._running[self._devices[index]] += 1
+        self._count -= 1
+        return index, item
+
+    def release(self, index: int):
+        self._running[self._devices.pop(index)] -= 1
+
+
+class TaskPool:
+    """
+    Process pool with a watchdog, for per-file validation work.
+
+    Compared to multiprocessing.Pool:
+        - task_timeout: a task running longer than this many seconds has its
+          worker killed and is reported as a TaskFailure; the run continues.
+        - memory_limit_mb: RLIMIT_AS applied in each worker; MemoryError is
+          reported as a TaskFailure.
+        - max_tasks_per_child / max_worker_rss_mb: workers are replaced after
+          N tasks or once their RSS exceeds the threshold after a task.
+        - a worker that dies mid-task (segfault, OOM kill) is replaced and the
+          task reported as a TaskFailure instead of hanging the pool.
+        - on_progress / on_done callbacks receive per-item progress reported by
+          workers through report_progress(), and each finished item;
+          on_product receives values sent with report_product().
+        - adaptive: start with all `processes` workers active and drop one at a
+          time while each worker dropped cost less than ADAPT_MIN_GAIN of the
+          throughput, as when storage is saturated; the first drop that costs
+          more is undone. Never slower than a fixed pool to start with, and
+          work that scales keeps every worker. Throughput is item_weight(item)
+          per second (e.g. file size), including bytes reported mid-item, or
+          items per second without item_weight.
+        - device_limits / max_readers_per_device: cap how many items on the
+          same device (see io_hints.device_of) run at once, e.g. 2 for an NFS
+          mount and 16 for local NVMe; other devices' items fill the free
+          workers. device_limits is keyed by st_dev or by any path on the
+          device (such as its mount point).
+        - peak_worker_rss_mb: the highest peak RSS any worker reported, which
+          includes what the worker shares with the parent it was forked from.
+
+    Usage:
+        with TaskPool(4, task_timeout=3600) as pool:
+            for result in pool.imap_unordered(check_file, files):
+                if isinstance(result, TaskFailure):
+                    ...
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        task_timeout: float | None = None,
+        memory_limit_mb: int | None = None,
+        max_tasks_per_child: int | None = None,
+        max_worker_rss_mb: float | None = None,
+        adaptive: bool = False,
+        device_limits: dict[int | str, int] | None = None,
+        max_readers_per_device: int | None = None,
+    ):
+        self.processes = max(1, processes)
+        self.task_timeout = task_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_worker_rss_mb = max_worker_rss_mb
+        self.adaptive = adaptive
+        self.active_limit = self.processes
+        self.device_limits = {
+            key if isinstance(key, int) else os.stat(key).st_dev: max(1, limit)
+            for key, limit in (device_limits or {}).items()
+        }
+        self.max_readers_per_device = max_readers_per_device
+        self.workers_started = 0
+        self.peak_worker_rss_mb = 0.0
+        self._workers: list[_Worker] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for worker in self._workers:
+            worker.retire()
+        self._workers = []
+
+    def _start_worker(self, func: Callable) -> _Worker:
+        worker = _Worker(func, self.memory_limit_mb)
+        self.workers_started += 1
+        self._workers.append(worker)
+        return worker
+
+    def _discard(self, worker: _Worker, kill: bool = False):
+        self._workers.remove(worker)
+        worker.kill() if kill else worker.retire()
+
+    def _reset_window(self):
+        self._window_start = time.monotonic()
+        self._window_weight = 0.0
+
+    def _measure(self, weight: float):
+        """
+        Step the number of active workers down on measured throughput.
+        """
+        self._window_weight += weight
+        elapsed = time.monotonic() - self._window_start
+        if (
+            not self.adaptive
+            or self._settled
+            or elapsed < ADAPT_INTERVAL
+            or not self._window_weight
+        ):
+            return
+        rate = self._window_weight / elapsed
+        if self._settling:
+            # workers starting up, or items started at the previous width finishing
+            self._settling = False
+        elif self._last_rate and rate * ADAPT_MIN_GAIN < self._last_rate:
+            # the worker dropped last was adding throughput: put it back and stay
+            self.active_limit += 1
+            self._settled = True
+        elif self.active_limit > 1:
+            self._last_rate = rate
+            self.active_limit -= 1
+            self._settling = True
+        else:
+            self._settled = True
+        self._reset_window()
+
+    def _device_limit(self, device) -> int | None:
+        if device is None:
+            return None
+        limit = self.device_limits.get(device, self.max_readers_per_device)
+        return max(1, limit) if limit else None
+
+    def imap_unordered(
+        self,
+        func: Callable,
+        items: Iterable,
+        on_progress: Callable[[object, int], None] | None = None,
+        on_done: Callable[[object], None] | None = None,
+        item_weight: Callable[[object], float] | None = None,
+        item_device: Callable[[object], object] | None = None,
+        on_product: Callable[[object, str, object], None] | None = None,
+    ) -> Iterator:
+        """
+        Yield func(item) for each item as results arrive, or a TaskFailure
+        for items that timed out, crashed their worker or raised.
+        on_progress(item, nbytes) is called for every report_progress() made
+        by a worker, on_done(item) once per item before its result is yielded.
+        item_weight(item) (e.g. file size) is used to measure throughput in
+        adaptive mode; item_device(item) groups items for the per-device limits.
+        on_product(item, name, value) is called for every report_product().
+        """
+        if not (self.device_limits or self.max_readers_per_device):
+            item_device = None
+        pending = _PendingItems(items, item_device, self._device_limit)
+        self.close()
+        self.active_limit = self.processes
+        self._settled = False
+        self._settling = True
+        self._last_rate = 0.0
+        self._reset_window()
+        reported: dict[int, int] = {}
+        idle: list[_Worker] = []
+        while pending or any(worker.task for worker in self._workers):
+            while pending and sum(1 for w in self._workers if w.task) < self.active_limit:
+                if (task := pending.pop()) is None:
+                    # every waiting item's device is at its limit
+                    break
+                worker = idle.pop() if idle else self._start_worker(func)
+                worker.submit(*task)
+            busy = [worker for worker in self._workers if worker.task]
+            timeout = None
+            if self.task_timeout:
+                now = time.monotonic()
+                timeout = max(
+                    0.0, min(worker.started + self.task_timeout - now for worker in busy)
+                )
+            ready = wait(
+                [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                timeout=timeout,
+            )
+            for worker in busy:
+                message = None
+                try:
+                    while worker.conn in ready and worker.conn.poll():
+                        message = worker.conn.recv()
+                        index, item = worker.task  # type: ignore
+                        if message[0] == "product":
+                            if on_product:
+                                on_product(item, message[1], message[2])
+                            message = None
+                            continue
+                        if message[0] != "progress":
+                            break
+                        if on_progress:
+                            on_progress(item, message[1])
+                        if item_weight:
+                            reported[index] = reported.get(index, 0) + message[1]
+                            self._measure(message[1])
+                        message = None
+                except (EOFError, OSError):
+                    # died after (or while) sending; handled as a crash below
+                    pass
+                if message:
+                    _, index, (status, value), rss_mb, peak_rss_mb = message
+                    self.peak_worker_rss_mb = max(self.peak_worker_rss_mb, peak_rss_mb)
+                    item = worker.task[1]  # type: ignore
+                    worker.task = None
+                    worker.completed += 1
+                    pending.release(index)
+                    if item_weight:
+                        self._measure(max(0, item_weight(item) - reported.pop(index, 0)))
+                    else:
+                        self._measure(1)
+                    if on_done:
+                        on_done(item)
+                    yield value if status == "ok" else TaskFailure(item, value)
+                    if pending and (
+                        (self.max_tasks_per_child and worker.completed >= self.max_tasks_per_child)
+                        or (self.max_worker_rss_mb and rss_mb > self.max_worker_rss_mb)
+                    ):
+                        # a fresh worker is started on demand
+                        self._discard(worker)
+                    else:
+                        idle.append(worker)
+                    continue
+                if worker.task and not worker.process.is_alive():
+                    failure = f"worker exited unexpectedly (exit code {worker.process.exitcode})"
+                elif (
+                    worker.task
+                    and self.task_timeout
+                    and time.monotonic() - worker.started >= self.task_timeout
+                ):
+                    failure = f"timed out after {self.task_timeout}s"
+                else:
+                    continue
+                index, item = worker.task  # type: ignore
+                reported.pop(index, None)
+                worker.task = None
+                pending.release(index)
+                self._discard(worker, kill=True)
+                if on_done:
+                    on_done(item)
+                yield TaskFailure(item, failure)
+        self.close()
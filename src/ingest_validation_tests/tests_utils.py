@@ -1,4 +1,5 @@
 import requests
+from validator import get_http_session
 
 
 class GetParentData:
@@ -12,7 +13,7 @@ class GetParentData:
         headers = self.app_context.get("request_headers", {})
         headers.update({"Authorization": "Bearer " + self.token})
         try:
-            response = requests.get(url, headers=headers)
+            response = get_http_session().get(url, headers=headers)
             response.raise_for_status()
             self.uuid = response.json().get("uuid")
         except requests.exceptions.HTTPError as err:
@@ -30,7 +31,7 @@ class GetParentData:
             )
             headers = self.app_context.get("request_headers", {})
             try:
-                response = requests.get(url, headers=headers)
+                response = get_http_session().get(url, headers=headers)
                 response.raise_for_status()
                 return response.json().get("path")
             except requests.exceptions.HTTPError as err:
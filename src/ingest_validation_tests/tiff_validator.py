@@ -1,12 +1,9 @@
-from multiprocessing import Pool
-
-import tifffile
-from validator import Validator
+from validator import Validator, open_tiff
 
 
 def _check_tiff_file(path: str) -> str | None:
     try:
-        with tifffile.TiffFile(path) as tfile:
+        with open_tiff(path, sequential=True) as tfile:
             for page in tfile.pages:
                 _ = page.asarray()  # force decompression
         return None
@@ -19,9 +16,10 @@ class TiffValidator(Validator):
     description = "Recursively test all tiff files (including ome.tiffs) for validity"
     cost = 1.0
     version = "1.0"
+    task_memory_mb = 2048  # whole decoded pages are held in memory
+    hashes_files = True
 
     def _collect_errors(self) -> list[str | None]:
-        pool = Pool(self.threads)
         filenames_to_test = []
         for glob_expr in [
             "**/*.[tT][iI][fF]",
@@ -33,12 +31,10 @@ class TiffValidator(Validator):
         try:
             rslt_list: list[str | None] = list(
                 rslt
-                for rslt in pool.imap_unordered(_check_tiff_file, filenames_to_test)
+                for rslt in self._map_files(_check_tiff_file, filenames_to_test)
                 if rslt is not None
             )
         except Exception as e:
             self._log(f"Error {e}")
             rslt_list = [f"Error {e}"]
-        pool.close()
-        pool.join()
         return self._return_result(rslt_list, filenames_to_test)
@@ -0,0 +1,250 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import signal
+import socket
+import socketserver
+import time
+import traceback
+from pathlib import Path
+from typing import Iterator
+
+from products import ProductStore
+from validator import (
+    OME_XSD_PATH,
+    get_http_session,
+    get_xml_schema,
+    order_by_dependencies,
+    validation_class_iter,
+)
+
+
+class JobTimeout(BaseException):
+    """
+    Raised in a job process when its wall-clock limit expires. A BaseException,
+    so the plugins' own `except Exception` handlers cannot swallow it
+    """
+
+    pass
+
+
+def warm_caches(check_docker: bool = True) -> list:
+    """
+    Load everything that would otherwise be redone for every upload:
+    plugin modules, compiled XSDs, the shared HTTP session and (unless
+    check_docker is False) the bioformats2raw image check. Called once in the
+    daemon before any job is forked, so every job inherits the results
+    copy-on-write. A failed image check is logged, and each job checks again.
+    The daemon itself never sends a request, so the session it hands down
+    holds no connections: each job opens its own, and they close when the
+    job's process exits.
+    """
+    plugin_classes = validation_class_iter()
+    get_xml_schema(OME_XSD_PATH)
+    for plugin_class in plugin_classes:
+        for schema_path in getattr(plugin_class, "schema_regex_mapping", {}):
+            get_xml_schema(schema_path)
+    get_http_session()
+    if check_docker:
+        import qptiff_channel_validator
+
+        try:
+            qptiff_channel_validator.Engine()
+        except Exception as e:
+            print(f"Docker dependency check failed, will retry per job: {e}")
+    return plugin_classes
+
+
+def apply_limits(limits: dict) -> None:
+    """
+    Apply per-job resource limits to the current (job) process.
+    Pool workers started by plugins inherit the memory and CPU limits.
+        memory_mb: address space cap (RLIMIT_AS)
+        cpu_seconds: CPU time cap (RLIMIT_CPU)
+        wall_seconds: wall-clock cap, raises JobTimeout, which ends the job
+    """
+    if memory_mb := limits.get("memory_mb"):
+        memory_bytes = int(memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    if cpu_seconds := limits.get("cpu_seconds"):
+        resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_seconds), int(cpu_seconds)))
+    if wall_seconds := limits.get("wall_seconds"):
+
+        def _timeout(signum, frame):
+            raise JobTimeout(f"Job exceeded wall-clock limit of {wall_seconds}s")
+
+        signal.signal(signal.SIGALRM, _timeout)
+        signal.alarm(int(wall_seconds))
+
+
+def run_job(job: dict, plugin_classes: list | None = None) -> Iterator[dict]:
+    """
+    Run the requested plugins against a job and yield one event per plugin.
+
+    Job fields:
+        base_paths: list of directories to validate (required)
+        assay_type: assay type string (required)
+        contains: optional list, passed through to the plugins
+        plugins: optional list of plugin class names; default all
+        plugin_kwargs: optional dict of extra Validator keyword arguments
+
+    Plugins run in dependency order and share one ProductStore, so e.g. OME-XML
+    parsed by OmeTiffValidator is reused by the plugins that consume it.
+
+    Yields dicts with an "event" key of "result", "error" or "done".
+    """
+    if plugin_classes is None:
+        plugin_classes = validation_class_iter()
+    if wanted := job.get("plugins"):
+        plugin_classes = [cls for cls in plugin_classes if cls.__name__ in wanted]
+    plugin_classes = order_by_dependencies(plugin_classes)
+    plugin_kwargs = job.get("plugin_kwargs", {})
+    # per-file results shared between the plugins of this job
+    with ProductStore.temporary() as products:
+        for plugin_class in plugin_classes:
+            start = time.monotonic()
+            try:
+                validator = plugin_class(
+                    job["base_paths"],
+                    job["assay_type"],
+                    contains=job.get("contains", []),
+                    verbose=job.get("verbose", False),
+                    products=products,
+                    **plugin_kwargs,
+                )
+                errors = validator.collect_errors()
+            except Exception as e:
+                yield {
+                    "event": "error",
+                    "plugin": plugin_class.__name__,
+                    "message": f"{e.__class__.__name__}: {e}",
+                    "traceback": traceback.format_exc(),
+                }
+                continue
+            yield {
+                "event": "result",
+                "plugin": plugin_class.__name__,
+                "version": plugin_class.version,
+                "errors": errors,
+                "seconds": round(time.monotonic() - start, 3),
+            }
+    yield {"event": "done"}
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """
+    Reads a single JSON job line and streams JSON-lines events back.
+    Runs in a forked child, so limits applied here never reach the daemon.
+    """
+
+    def handle(self):
+        try:
+            job = json.loads(self.rfile.readline())
+            self._send({"event": "accepted", "pid": os.getpid()})
+            apply_limits(self.server.default_limits | job.get("limits", {}))
+            for event in run_job(job, self.server.plugin_classes):
+                self._send(event)
+        except JobTimeout as e:
+            # workers of the pool the job was waiting on are still running
+            for child in multiprocessing.active_children():
+                child.terminate()
+            self._send({"event": "error", "message": str(e)})
+        except Exception as e:
+            self._send({"event": "error", "message": f"{e.__class__.__name__}: {e}"})
+        finally:
+            signal.alarm(0)
+
+    def _send(self, event: dict):
+        self.wfile.write((json.dumps(event, default=str) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+class ValidationServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Long-running validation daemon listening on a Unix socket.
+
+    Usage:
+        server = ValidationServer("/run/ivt.sock", default_limits={"memory_mb": 8192})
+        server.serve_forever()
+        for event in submit_job("/run/ivt.sock", {"base_paths": [...], "assay_type": "CODEX"}):
+            ...
+
+    Each job runs in its own forked process: plugin modules, compiled schemas,
+    the HTTP session and the docker image check loaded by warm_caches are
+    inherited, while worker pools and HTTP connections are created inside the
+    job so that the job's resource limits apply to them.
+    """
+
+    def __init__(
+        self,
+        socket_path: str | Path,
+        default_limits: dict | None = None,
+        max_jobs: int = 4,
+        check_docker: bool = True,
+    ):
+        self.socket_path = Path(socket_path)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self.default_limits = default_limits or {}
+        self.max_children = max_jobs
+        self.plugin_classes = warm_caches(check_docker=check_docker)
+        super().__init__(str(self.socket_path), JobHandler)
+
+    def server_close(self):
+        super().server_close()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+
+def submit_job(socket_path: str | Path, job: dict) -> Iterator[dict]:
+    """
+    Send a job to a running ValidationServer and yield its events as they arrive.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps(job, default=str) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as events:
+            for line in events:
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run plugin validation as a daemon.")
+    parser.add_argument("socket", type=Path, help="Unix socket path to listen on")
+    parser.add_argument("--max-jobs", type=int, default=4, help="Concurrent jobs")
+    parser.add_argument("--memory-mb", type=int, help="Default per-job address space limit")
+    parser.add_argument("--cpu-seconds", type=int, help="Default per-job CPU time limit")
+    parser.add_argument("--wall-seconds", type=int, help="Default per-job wall-clock limit")
+    parser.add_argument(
+        "--skip-docker-check",
+        action="store_true",
+        help="Do not check for the bioformats2raw image at startup",
+    )
+
+    args = parser.parse_args()
+    default_limits = {
+        key: value
+        for key, value in {
+            "memory_mb": args.memory_mb,
+            "cpu_seconds": args.cpu_seconds,
+            "wall_seconds": args.wall_seconds,
+        }.items()
+        if value
+    }
+    server = ValidationServer(
+        args.socket,
+        default_limits=default_limits,
+        max_jobs=args.max_jobs,
+        check_docker=not args.skip_docker_check,
+    )
+    print(f"Listening on {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
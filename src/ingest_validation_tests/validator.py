@@ -1,13 +1,35 @@
 import inspect
 import os
 import sys
+from contextlib import contextmanager
 from csv import DictReader
+from functools import lru_cache, partial
 from importlib import util
-from os import cpu_count
 from pathlib import Path
+from typing import Any, Callable, Iterator
 
+import requests
 import tifffile
 import xmlschema
+from archive_path import ArchivePath, to_path
+from checksums import (
+    CHECKSUMS,
+    DEFAULT_ALGORITHMS,
+    SUMS_FILE_ALGORITHMS,
+    find_sums_files,
+    hashing,
+    verify,
+    write_manifest,
+)
+from dedup import fan_out, group_duplicates
+from file_system import FileSystem, LocalFileSystem
+from io_hints import device_of, open_sequential, read_hints
+from products import OME_XML, OmeXml, ProductStore
+from progress import Progress
+from task_pool import TaskFailure, TaskPool
+from worker_sizing import available_cpus, default_worker_count
+
+OME_XSD_PATH = Path(__file__).resolve().parent / "ome_tiff_schemas/2016-06_ome.xsd"
 
 
 class Validator:
@@ -25,9 +47,28 @@ class Validator:
 
     required: list = []
 
+    produces: list[str] = []
+    """list[str]: names of per-file products (see products.py) this plugin stores
+    for later plugins
+    """
+
+    consumes: list[str] = []
+    """list[str]: products this plugin reuses; plugins producing them run first
+    """
+
+    hashes_files: bool = False
+    """bool: this plugin reads whole files through io_hints.open_sequential, so it can
+    checksum them in the same pass
+    """
+
+    task_memory_mb: float = 256
+    """float: rough peak memory of one worker checking one file, used to cap
+    the automatic worker count to what fits in the container's memory limit
+    """
+
     def __init__(
         self,
-        base_paths: list[Path],
+        base_paths: list[Path | str],
         assay_type: str,
         contains: list = [],
         verbose: bool = True,
@@ -35,18 +76,61 @@ class Validator:
         globus_token: str = "",
         app_context: dict[str, str] = {},
         coreuse: int | None = None,
+        task_timeout: float | None = None,
+        memory_limit_mb: int | None = None,
+        max_tasks_per_child: int | None = None,
+        max_worker_rss_mb: float | None = None,
+        progress_callback: Callable[[Progress], None] | None = None,
+        adaptive_workers: bool = False,
+        io_hints: bool | None = None,
+        device_limits: dict[int | str, int] | None = None,
+        max_readers_per_device: int | None = None,
+        dedup_files: bool = True,
+        dedup_content: bool = False,
+        products: ProductStore | None = None,
+        checksum_manifest: str | Path | None = None,
+        checksum_algorithms: tuple[str, ...] = DEFAULT_ALGORITHMS,
+        verify_checksums: bool = True,
         **kwargs,
     ):
         """
         Arguments:
-            base_paths: list of directories (root paths of the directory trees to be validated)
+            base_paths: list of directories (root paths of the directory trees to be validated);
+                paths may point into a .zip/.tar archive, e.g. upload.zip/upload
             assay_type: assay type string to be checked against self.required and self.contains
             contains: information from upstream SchemaVersion, only provided by multi-assay uploads
             verbose: controls printing in self._log
             schema_rows: SchemaVersion.rows data from ingest-validation-tools
             globus_token: Globus auth token
             app_context: contains project and env-specific urls, headers
-            coreuse: optionally pass in desired number of threads
+            coreuse: optionally pass in desired number of threads; by default a quarter
+                of the CPUs allowed by affinity and cgroup quota, capped by the cgroup
+                memory limit divided by task_memory_mb (or memory_limit_mb)
+            task_timeout: seconds a single file may take before its worker is killed
+            memory_limit_mb: address space limit (RLIMIT_AS) for each worker process
+            max_tasks_per_child: replace each worker after this many files
+            max_worker_rss_mb: replace a worker whose RSS exceeds this after a file
+            progress_callback: called with a progress.Progress (files/bytes done and
+                total, throughput, ETA) while this plugin checks files
+            adaptive_workers: drop workers one at a time while throughput holds, for
+                uploads on storage that saturates (see TaskPool); off by default
+            io_hints: turn sequential-read/page-cache hints for full-file passes on or
+                off for this run (see io_hints); default: on unless IVT_IO_HINTS=0
+            device_limits: max files read at once per device, keyed by st_dev or by a
+                path on the device (e.g. {"/mnt/nfs": 2, "/scratch": 16})
+            max_readers_per_device: limit for devices not listed in device_limits
+            dedup_files: check hardlinked/symlinked copies of a file (same st_dev and
+                st_ino) once and report the result for every path
+            dedup_content: also treat files with equal size and partial hash (see
+                dedup.partial_hash) as copies
+            products: store of per-file intermediate results shared by the plugins of
+                one run (see products.ProductStore and order_by_dependencies); default:
+                the process-wide ProductStore.default()
+            checksum_manifest: file to append path/size/digest rows to for every file
+                this plugin reads in full (plugins with hashes_files only)
+            checksum_algorithms: hashlib algorithms written to checksum_manifest
+            verify_checksums: check files against any md5sums.txt/sha256sums in the
+                upload while reading them (plugins with hashes_files only)
 
         Usage:
             v = ValidatorSubclass(<base_paths>, <assay_type>, ...)
@@ -54,9 +138,9 @@ class Validator:
 
         """
         if isinstance(base_paths, list):
-            self.paths = [Path(path) for path in base_paths]
-        elif isinstance(base_paths, (Path, str)):
-            self.paths = [Path(base_paths)]
+            self.paths = [to_path(path) for path in base_paths]
+        elif isinstance(base_paths, (Path, str, ArchivePath)):
+            self.paths = [to_path(base_paths)]
         else:
             # No plugin will run, halt validation
             raise Exception(f"Validator init received base_paths arg as type {type(base_paths)}")
@@ -68,8 +152,32 @@ class Validator:
             self.schema_rows = schema.rows
         self.token = globus_token
         self.app_context = app_context
-        num_cpus = cpu_count()
-        self.threads = coreuse if coreuse else num_cpus // 4 if (num_cpus and num_cpus >= 4) else 1
+        num_cpus = available_cpus()
+        self.threads = (
+            coreuse
+            if coreuse
+            else default_worker_count(num_cpus, memory_limit_mb or self.task_memory_mb)
+        )
+        self.pool_options = {
+            "adaptive": adaptive_workers,
+            "task_timeout": task_timeout,
+            "memory_limit_mb": memory_limit_mb,
+            "max_tasks_per_child": max_tasks_per_child,
+            "max_worker_rss_mb": max_worker_rss_mb,
+            "device_limits": device_limits,
+            "max_readers_per_device": max_readers_per_device,
+        }
+        self.progress_callback = progress_callback
+        self.io_hints = io_hints
+        self.dedup_files = dedup_files
+        self.dedup_content = dedup_content
+        self.products = products if products is not None else ProductStore.default()
+        self.checksum_manifest = checksum_manifest
+        self.checksum_algorithms = tuple(checksum_algorithms)
+        self.verify_checksums = verify_checksums
+        self.checksums: dict[str, dict[str, str]] = {}
+        self.progress: Progress | None = None
+        self.peak_worker_rss_mb = 0.0
         self._log(f"Threading at {self.__class__.__name__} with {self.threads}")
 
     def collect_errors(self, **kwargs) -> list[str | None]:
@@ -81,7 +189,40 @@ class Validator:
         if not self.plugin_valid:
             return []
         self._log(f"Update: threading at {self.__class__.__name__} with {self.threads}")
-        return self._collect_errors()
+        with read_hints(self.io_hints):
+            if self.hashes_files and (self.checksum_manifest or self.verify_checksums):
+                return self._collect_errors_with_checksums()
+            return self._collect_errors()
+
+    def _collect_errors_with_checksums(self) -> list[str | None]:
+        """
+        Run _collect_errors with every file read hashed on the way, then
+        append to the checksum manifest and report files whose digests do not
+        match a supplied md5sums.txt/sha256sums.
+        """
+        sums_files = find_sums_files(self.paths) if self.verify_checksums else []
+        algorithms = set(self.checksum_algorithms if self.checksum_manifest else ())
+        algorithms.update(SUMS_FILE_ALGORITHMS[file.name.lower()] for file in sums_files)
+        if not algorithms:
+            return self._collect_errors()
+        self.checksums = {}
+        with hashing(sorted(algorithms)):
+            errors = self._collect_errors()
+        if self.checksum_manifest:
+            write_manifest(
+                self.checksum_manifest, self.checksums, self.checksum_algorithms, self.paths[0]
+            )
+        if mismatches := verify(self.checksums, sums_files):
+            self._log("Checksum mismatches found.")
+            errors = [error for error in errors if error is not None] + mismatches
+        return errors
+
+    def _record_product(self, copies: dict, file, name: str, value):
+        if name == CHECKSUMS:
+            path, digests = value
+            self.checksums[path] = digests
+            for copy in copies.get(file, []):
+                self.checksums[str(copy)] = digests
 
     @property
     def plugin_valid(self) -> bool:
@@ -122,12 +263,63 @@ class Validator:
         self._log("Plugin not relevant. Not run.")
         return []
 
+    def _map_files(
+        self,
+        func: Callable,
+        files: list,
+        on_failure: Callable[[TaskFailure], Any] | None = None,
+        reads_contents: bool = True,
+    ) -> list:
+        """
+        Run func over files in a TaskPool sized by self.threads and return the
+        results in completion order. Files that time out, crash their worker or
+        raise are turned into results by on_failure (default: an error string
+        naming the file), so one bad file never hangs or aborts the plugin.
+        Checks that read whole files are subject to the per-device reader
+        limits; header-only checks (reads_contents=False) run at full width.
+        Copies of a file (see dedup_files/dedup_content) are checked once and
+        the result repeated for each copy, with its path substituted.
+        """
+        if on_failure is None:
+            on_failure = _default_failure_message
+        files = list(files)
+        if self.dedup_files or self.dedup_content:
+            copies = group_duplicates(files, by_content=self.dedup_content)
+        else:
+            copies = {file: [] for file in files}
+        if len(copies) < len(files):
+            self._log(f"Checking {len(copies)} distinct files for {len(files)} paths")
+        self.progress = Progress(self.__class__.__name__, list(copies), self.progress_callback)
+        finished = []
+
+        def on_done(file):
+            finished.append(file)
+            self.progress.file_done(file)  # type: ignore
+
+        results = []
+        with TaskPool(self.threads, **self.pool_options) as pool:
+            for rslt in pool.imap_unordered(
+                func,
+                list(copies),
+                on_progress=self.progress.advance,
+                on_done=on_done,
+                item_weight=self.progress.size,
+                item_device=device_of if reads_contents else None,
+                on_product=partial(self._record_product, copies),
+            ):
+                file = finished.pop()
+                rslt = on_failure(rslt) if isinstance(rslt, TaskFailure) else rslt
+                results.append(rslt)
+                results.extend(fan_out(rslt, file, copy) for copy in copies[file])
+        self.peak_worker_rss_mb = max(self.peak_worker_rss_mb, pool.peak_worker_rss_mb)
+        return results
+
     def _log(self, message):
         if self.verbose:
             print(message)
             return message
 
-    def rel_filename_str(self, filename: Path) -> str:
+    def rel_filename_str(self, filename: Path | ArchivePath) -> str:
         return get_rel_filename_str(self.paths[0], filename)
 
     @property
@@ -138,6 +330,10 @@ class Validator:
         raise Exception("no uuid was found in the path to the current working directory")
 
 
+def _default_failure_message(failure: TaskFailure) -> str:
+    return f"{failure.item} could not be validated: {failure.reason}"
+
+
 def get_non_global_paths_by_row(rows: list[dict], base_path: Path) -> dict[str | int, str]:
     """
     Create dict of non-global paths by row for a shared upload.
@@ -150,7 +346,7 @@ def get_non_global_paths_by_row(rows: list[dict], base_path: Path) -> dict[str |
         files = []
         non_global_files = row.get("non_global_files", "")
         filepaths = [
-            Path(base_path / f"non_global/{file.strip()}") for file in non_global_files.split(";")
+            base_path / f"non_global/{file.strip()}" for file in non_global_files.split(";")
         ]
         for file in filepaths:
             if not file.exists():
@@ -172,17 +368,103 @@ def read_tsv(path: Path, encoding: str = "utf-8") -> list[dict]:
     return rows
 
 
-def check_ome_tiff_file(file: str | Path) -> xmlschema.XmlDocument:
-    try:
+@lru_cache(maxsize=None)
+def get_xml_schema(schema_path: str | Path) -> xmlschema.XMLSchema:
+    """
+    Compile an XSD once per process. Compiling the OME schema takes far
+    longer than validating a typical document against it, so callers
+    should always go through this cache rather than passing a path to
+    xmlschema directly.
+    """
+    return xmlschema.XMLSchema(schema_path)
+
+
+@lru_cache(maxsize=None)
+def get_http_session() -> requests.Session:
+    """
+    Shared session so that repeated requests to the same hosts reuse
+    connections instead of renegotiating TLS for every call.
+    """
+    return requests.Session()
+
+
+@contextmanager
+def open_tiff(
+    file: str | Path | ArchivePath,
+    fs: FileSystem | None = None,
+    header_only: bool = False,
+    sequential: bool = False,
+) -> Iterator[tifffile.TiffFile]:
+    """
+    Open a TIFF on disk or inside an archive; archive members are handed to
+    tifffile as seekable handles rather than extracted.
+
+    With header_only (or an explicit fs), reads go through a block cache with
+    read-ahead, so parsing the IFD chain and tags costs a few small range
+    requests instead of buffered reads of the whole file.
+
+    With sequential, a local file is read with sequential-read hints and
+    consumed pages are dropped from the page cache (see io_hints); use it for
+    passes that decode every page.
+    """
+    if header_only or fs is not None:
+        with (fs or LocalFileSystem()).open(file) as fh, tifffile.TiffFile(fh) as tf:
+            yield tf
+    elif isinstance(file, ArchivePath):
+        with file.open("rb") as fh, tifffile.TiffFile(fh) as tf:
+            yield tf
+    elif sequential:
+        with open_sequential(file) as fh, tifffile.TiffFile(fh) as tf:
+            yield tf
+    else:
         with tifffile.TiffFile(file) as tf:
-            xml_document = xmlschema.XmlDocument(tf.ome_metadata, schema=Path(__file__).resolve().parent / "ome_tiff_schemas/2016-06_ome.xsd")  # type: ignore
+            yield tf
+
+
+def _parse_ome_xml(
+    file: str | Path | ArchivePath, fs: FileSystem | None = None
+) -> tuple[xmlschema.XmlDocument | None, OmeXml]:
+    xml = None
+    try:
+        # only the first IFD and its ImageDescription are needed
+        with open_tiff(file, fs=fs, header_only=True) as tf:
+            xml = tf.ome_metadata
+            xml_document = xmlschema.XmlDocument(xml, schema=get_xml_schema(OME_XSD_PATH))  # type: ignore
             if xml_document.schema and not xml_document.schema.is_valid(xml_document):
                 raise Exception(f"{file} is not a valid OME.TIFF file: schema not valid")
             elif not xml_document.schema:
                 raise Exception(f"Can't read OME XML from file {file}.")
     except Exception as excp:
         print(f"{file} is not a valid OME.TIFF file: {excp}")
-        raise Exception(f"{file} is not a valid OME.TIFF file: {excp}")
+        return None, OmeXml(xml, f"{file} is not a valid OME.TIFF file: {excp}")
+    return xml_document, OmeXml(xml, None)
+
+
+def check_ome_tiff_file(
+    file: str | Path | ArchivePath,
+    fs: FileSystem | None = None,
+    products: ProductStore | None = None,
+) -> xmlschema.XmlDocument:
+    """
+    Parse and validate a file's OME-XML against the base OME schema; raise
+    with a message naming the file if it is not a valid OME-TIFF.
+
+    With a ProductStore, the result is shared with later plugins: a file
+    already checked in this run is neither re-read nor re-validated.
+    """
+    ome_xml = products.get(OME_XML, file) if products else None
+    xml_document = None
+    if ome_xml is None:
+        xml_document, ome_xml = _parse_ome_xml(file, fs)
+        if products:
+            products.put(OME_XML, file, ome_xml)
+    if ome_xml.error:
+        raise Exception(ome_xml.error)
+    if xml_document is None:
+        # validated when the product was stored
+        xml_document = xmlschema.XmlDocument(
+            ome_xml.xml, schema=get_xml_schema(OME_XSD_PATH), validation="skip"
+        )
     return xml_document
 
 
@@ -219,10 +501,42 @@ def validation_class_iter() -> list[Validator]:
     sorted_classes = []
     for _, _, val_class in sort_me:
         sorted_classes.append(val_class)
-    return sorted_classes
+    return order_by_dependencies(sorted_classes)
+
+
+def order_by_dependencies(classes: list) -> list:
+    """
+    Reorder plugin classes so that every plugin runs after the plugins
+    producing what it consumes; otherwise the given (cost) order is kept.
+    """
+    producers: dict[str, list] = {}
+    for cls in classes:
+        for product in cls.produces:
+            producers.setdefault(product, []).append(cls)
+    ordered: list = []
+    visiting: set = set()
+
+    def visit(cls):
+        if cls in ordered:
+            return
+        if cls in visiting:
+            raise Exception(f"Plugin dependency cycle involving {cls.__name__}")
+        visiting.add(cls)
+        for product in cls.consumes:
+            for producer in producers.get(product, []):
+                if producer is not cls:
+                    visit(producer)
+        visiting.discard(cls)
+        ordered.append(cls)
+
+    for cls in classes:
+        visit(cls)
+    return ordered
 
 
-def get_rel_filename_str(comparison_path: Path | int, filename: Path) -> str:
+def get_rel_filename_str(
+    comparison_path: Path | ArchivePath | int, filename: Path | ArchivePath
+) -> str:
     """
     In the case of shared uploads, comparison_path may be an int (row number).
     """
@@ -0,0 +1,128 @@
+import math
+import os
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+"""Path: mount point of the cgroup hierarchy (v2 unified, or v1 per-controller dirs)
+"""
+
+CORES_PER_WORKER = 4
+"""int: plugins run one after another but each spawns its own pool; keep a
+quarter of the available cores per pool, as before
+"""
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def _own_cgroups(proc_cgroup: Path) -> dict[str, str]:
+    """
+    Map controller name ("" for cgroup v2) to this process's cgroup path.
+    """
+    cgroups = {}
+    for line in (_read(proc_cgroup) or "").splitlines():
+        _, controllers, cgroup_path = line.split(":", 2)
+        for controller in controllers.split(",") if controllers else [""]:
+            cgroups[controller] = cgroup_path
+    return cgroups
+
+
+def _candidate_dirs(root: Path, controller_dirs: list[str], cgroup_path: str) -> list[Path]:
+    """
+    This process's cgroup dir and its ancestors, for each place the controller
+    may be mounted. Inside a container with its own cgroup namespace the path is
+    usually "/", so the mount point itself is always included.
+    """
+    dirs = []
+    relative = Path(cgroup_path.lstrip("/"))
+    for controller_dir in controller_dirs:
+        base = root / controller_dir if controller_dir else root
+        for parent in [relative, *relative.parents]:
+            if (candidate := base / parent) not in dirs:
+                dirs.append(candidate)
+    return dirs
+
+
+def cgroup_cpu_limit(
+    root: Path = CGROUP_ROOT, proc_cgroup: Path = Path("/proc/self/cgroup")
+) -> int | None:
+    """
+    Whole CPUs allowed by the CFS quota (cgroup v2 cpu.max or v1
+    cpu.cfs_quota_us / cpu.cfs_period_us), rounded up; None if unlimited.
+    """
+    cgroups = _own_cgroups(proc_cgroup)
+    limits = []
+    for directory in _candidate_dirs(root, [""], cgroups.get("", "/")):
+        if (cpu_max := _read(directory / "cpu.max")) and not cpu_max.startswith("max"):
+            quota, period = cpu_max.split()
+            limits.append(int(quota) / int(period))
+    v1_path = cgroups.get("cpu", "/")
+    for directory in _candidate_dirs(root, ["cpu", "cpu,cpuacct"], v1_path):
+        quota = _read(directory / "cpu.cfs_quota_us")
+        period = _read(directory / "cpu.cfs_period_us")
+        if quota and period and int(quota) > 0:
+            limits.append(int(quota) / int(period))
+    return max(1, math.ceil(min(limits))) if limits else None
+
+
+def cgroup_memory_limit_mb(
+    root: Path = CGROUP_ROOT, proc_cgroup: Path = Path("/proc/self/cgroup")
+) -> float | None:
+    """
+    Memory limit of this process's cgroup (v2 memory.max or v1
+    memory.limit_in_bytes) in MB; None if unlimited.
+    """
+    cgroups = _own_cgroups(proc_cgroup)
+    limits = []
+    for directory in _candidate_dirs(root, [""], cgroups.get("", "/")):
+        if (memory_max := _read(directory / "memory.max")) and memory_max != "max":
+            limits.append(int(memory_max))
+    for directory in _candidate_dirs(root, ["memory"], cgroups.get("memory", "/")):
+        if limit := _read(directory / "memory.limit_in_bytes"):
+            # v1 reports "unlimited" as a huge page-aligned number
+            if int(limit) < 2**62:
+                limits.append(int(limit))
+    return min(limits) / 2**20 if limits else None
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may actually use: the affinity mask, capped by the
+    cgroup CPU quota. os.cpu_count() reports the host's cores instead.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    if quota := cgroup_cpu_limit():
+        cpus = min(cpus, quota)
+    return cpus
+
+
+def available_memory_mb() -> float | None:
+    """
+    Memory this process may use: physical memory, capped by the cgroup limit.
+    """
+    try:
+        physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+    except (ValueError, OSError):
+        physical = None
+    limit = cgroup_memory_limit_mb()
+    if physical and limit:
+        return min(physical, limit)
+    return physical or limit
+
+
+def default_worker_count(cpus: int | None, task_memory_mb: float | None = None) -> int:
+    """
+    Worker processes for one plugin's pool: a quarter of the usable CPUs,
+    and no more than fit in memory at task_memory_mb each.
+    """
+    workers = cpus // CORES_PER_WORKER if (cpus and cpus >= CORES_PER_WORKER) else 1
+    if task_memory_mb and (memory_mb := available_memory_mb()):
+        workers = min(workers, int(memory_mb // task_memory_mb))
+    return max(1, workers)
@@ -0,0 +1,13 @@
+import pytest
+from products import ProductStore
+
+
+@pytest.fixture(autouse=True)
+def fresh_default_products(monkeypatch):
+    """
+    Plugins created without a ProductStore share ProductStore.default();
+    give every test its own, so each test is a separate validation run.
+    """
+    with ProductStore.temporary() as products:
+        monkeypatch.setattr(ProductStore, "_default", products)
+        yield products
@@ -0,0 +1,452 @@
+"""
+Generate a synthetic upload at a chosen scale, optionally with injected faults.
+
+    python tests/synthetic_upload.py /scratch/upload --fastq-groups 8 --fastq-records 1000000 \\
+        --tiffs 20 --ome-tiffs 20 --fault truncate=2 --fault bad_quality=1
+
+Layout (each part only when requested):
+    raw/fastq/<sample>_S1_L001_R{1,2}_001.fastq[.gz]  paired FASTQ groups
+    raw/images/*.tif, *.ome.tif                       tiled/compressed/pyramidal (OME-)TIFFs
+    raw/images/*.qptiff, lab_processed/images/*.qptiff.channels.csv
+    raw/channelnames.txt, raw/cyc*_reg*_*/            a CODEX tree
+    vignettes/vignette_*/, data/                      publication vignettes
+
+The faults injected are printed as `path<TAB>fault` lines, and returned by
+make_upload, so tests can check that exactly those files are reported.
+"""
+
+import argparse
+import bz2
+import gzip
+import json
+import random
+import struct
+import zlib
+from collections import namedtuple
+from functools import partial
+from pathlib import Path
+
+Fault = namedtuple("Fault", ["path", "kind"])
+"""A file made invalid by inject_faults, and how.
+"""
+
+FAULTS = {
+    "truncate": "file cut at half its length",
+    "bitflip": "one bit flipped mid-data, in compressed files only",
+    "bad_quality": "a FASTQ quality character outside '!'..'~'",
+    "count_mismatch": "last record dropped from one FASTQ of a pair",
+}
+"""dict: fault kinds inject_faults understands, and what each does
+"""
+
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+"""bytes: the empty block that ends a BGZF file
+"""
+
+_FASTQ_QUALITIES = b"#,:F"
+_BASES = bytes(b"ACGT"[i % 4] if i else ord("N") for i in range(256))
+_RECORDS_PER_BLOCK = 4096
+_BGZF_BLOCK_INPUT = 65280
+
+
+def _fastq_block(rng: random.Random, first: int, count: int, read: int, length: int) -> bytes:
+    bases = rng.randbytes(count * length).translate(_BASES)
+    qualities = rng.randbytes(count * length).translate(
+        bytes(_FASTQ_QUALITIES[i % len(_FASTQ_QUALITIES)] for i in range(256))
+    )
+    records = []
+    for i in range(count):
+        span = slice(i * length, (i + 1) * length)
+        records.append(
+            b"@A12345:123:A12BCDEFG:1:%d:%d:1000 %d:N:0:NACTGACTGA+CTGACTGACT\n%s\n+\n%s\n"
+            % (
+                1101 + (first + i) // 100000,
+                (first + i) % 100000,
+                read,
+                bases[span],
+                qualities[span],
+            )
+        )
+    return b"".join(records)
+
+
+def bgzf_compress(data: bytes, level: int = 1) -> bytes:
+    """
+    data as BGZF blocks (as written by bgzip), without the end-of-file block.
+    """
+    blocks = []
+    for start in range(0, len(data), _BGZF_BLOCK_INPUT):
+        piece = data[start : start + _BGZF_BLOCK_INPUT]
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        deflated = compressor.compress(piece) + compressor.flush()
+        header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+        size = len(header) + 2 + len(deflated) + 8
+        trailer = struct.pack("<II", zlib.crc32(piece), len(piece))
+        blocks.append(header + struct.pack("<H", size - 1) + deflated + trailer)
+    return b"".join(blocks)
+
+
+def write_fastq(
+    path: Path,
+    records: int,
+    read: int = 1,
+    length: int = 150,
+    seed: int = 0,
+    bgzf: bool = False,
+):
+    """
+    `records` valid FASTQ records; gzipped if path ends in .gz, as BGZF if bgzf;
+    bzip2 for .bz2; and for .zst a Zstandard frame per block of records.
+    """
+    rng = random.Random(seed)
+    if bgzf or path.suffix == ".zst":
+        if path.suffix == ".zst":
+            import zstandard
+
+            compress = zstandard.ZstdCompressor(level=1).compress
+        else:
+            compress = bgzf_compress
+        with open(path, "wb") as f:
+            for first in range(0, records, _RECORDS_PER_BLOCK):
+                count = min(_RECORDS_PER_BLOCK, records - first)
+                f.write(compress(_fastq_block(rng, first, count, read, length)))
+            if bgzf:
+                f.write(BGZF_EOF)
+        return
+    opener = {".gz": partial(gzip.open, compresslevel=1), ".bz2": bz2.open}.get(path.suffix, open)
+    with opener(path, "wb") as f:
+        for first in range(0, records, _RECORDS_PER_BLOCK):
+            f.write(
+                _fastq_block(rng, first, min(_RECORDS_PER_BLOCK, records - first), read, length)
+            )
+
+
+def fastq_groups(
+    directory: Path, groups: int, records: int, gz: bool = True, seed: int = 0
+) -> list[Path]:
+    """
+    Paired R1/R2 FASTQ files with equal record counts, named so that
+    FASTQValidator groups them.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    files = []
+    for group in range(groups):
+        for read in [1, 2]:
+            path = directory / f"sample{group:04d}_S1_L001_R{read}_001.fastq{'.gz' if gz else ''}"
+            write_fastq(path, records, read=read, seed=seed + group)
+            files.append(path)
+    return files
+
+
+def tiffs(
+    directory: Path,
+    count: int,
+    shape: tuple[int, int, int] = (2, 512, 512),
+    ome: bool = False,
+    tile: tuple[int, int] | None = None,
+    compression: str | None = None,
+    pyramid_levels: int = 0,
+    seed: int = 0,
+) -> list[Path]:
+    """
+    uint16 (OME-)TIFFs of `shape` (channels, height, width), optionally tiled,
+    compressed and with `pyramid_levels` halved resolutions as SubIFDs.
+    """
+    import numpy
+    import tifffile
+
+    directory.mkdir(parents=True, exist_ok=True)
+    data = numpy.random.default_rng(seed).integers(0, 4096, shape, dtype="uint16")
+    options = {"tile": tile, "compression": compression, "photometric": "minisblack"}
+    files = []
+    for i in range(count):
+        path = directory / f"image{i:05d}.{'ome.tif' if ome else 'tif'}"
+        metadata = {"axes": "CYX", "PhysicalSizeX": 0.5, "PhysicalSizeY": 0.5} if ome else None
+        with tifffile.TiffWriter(path, ome=ome) as tif:
+            tif.write(data, subifds=pyramid_levels or None, metadata=metadata, **options)
+            for level in range(1, pyramid_levels + 1):
+                tif.write(data[:, :: 2**level, :: 2**level], subfiletype=1, **options)
+        files.append(path)
+    return files
+
+
+def qptiff(directory: Path, name: str = "image", channels: int = 8, seed: int = 0) -> list[Path]:
+    """
+    A QPTIFF and its lab_processed channels CSV, laid out as
+    QptiffChannelValidator expects.
+    """
+    [image] = tiffs(directory / "raw/images", 1, shape=(channels, 256, 256), seed=seed)
+    image = image.rename(image.with_name(f"{name}.qptiff"))
+    csv = directory / f"lab_processed/images/{name}.qptiff.channels.csv"
+    csv.parent.mkdir(parents=True, exist_ok=True)
+    csv.write_text(
+        "channel_id,is_channel_used_for_nuclei_segmentation,"
+        "is_channel_used_for_cell_segmentation,is_antibody\n"
+        + "".join(
+            f"Channel:0:{i},{'Yes' if i == 0 else 'No'},{'Yes' if i == 1 else 'No'},"
+            f"{'No' if i == 0 else 'Yes'}\n"
+            for i in range(channels)
+        )
+    )
+    return [image, csv]
+
+
+def codex_tree(
+    directory: Path, cycles: int, regions: int = 1, tiles: int = 4, channels_per_cycle: int = 4
+) -> list[Path]:
+    """
+    A raw/ CODEX tree: channelnames.txt, segmentation.json and
+    cyc<NNN>_reg<NNN>_* directories of `tiles` small TIFF tiles each.
+    """
+    import numpy
+    import tifffile
+
+    raw = directory / "raw"
+    raw.mkdir(parents=True, exist_ok=True)
+    (raw / "segmentation.json").write_text("{}")
+    (raw / "channelnames.txt").write_text(
+        "".join(f"marker{i}\n" for i in range(cycles * channels_per_cycle))
+    )
+    tile_data = numpy.zeros((32, 32), dtype="uint16")
+    files = [raw / "segmentation.json", raw / "channelnames.txt"]
+    for cycle in range(1, cycles + 1):
+        for region in range(1, regions + 1):
+            cycle_dir = raw / f"cyc{cycle:03d}_reg{region:03d}_200101_000000"
+            cycle_dir.mkdir(exist_ok=True)
+            for tile in range(1, tiles + 1):
+                path = cycle_dir / f"{region}_{tile:05d}_Z001_CH1.tif"
+                tifffile.imwrite(path, tile_data)
+                files.append(path)
+    return files
+
+
+def vignettes(directory: Path, count: int, figures: int = 1) -> list[Path]:
+    """
+    Publication vignettes, each a description.md listing `figures` Vitessce
+    configs whose {{ base_url }} data files exist under data/.
+    """
+    (directory / "data").mkdir(parents=True, exist_ok=True)
+    files = []
+    for v in range(1, count + 1):
+        vignette = directory / f"vignettes/vignette_{v:02d}"
+        vignette.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for f in range(1, figures + 1):
+            config = vignette / f"figure_{f}.json"
+            data = directory / f"data/vignette_{v:02d}_figure_{f}.zarr"
+            data.write_text("synthetic")
+            config.write_text(
+                json.dumps(
+                    {
+                        "version": "1.0.15",
+                        "datasets": [{"files": [{"url": f"{{{{ base_url }}}}/{data.name}"}]}],
+                    }
+                )
+            )
+            entries.append(f'  - name: "figure {f}"\n    file: {config.name}\n')
+            files += [config, data]
+        description = vignette / "description.md"
+        description.write_text(
+            f"---\nname: vignette {v}\nfigures:\n{''.join(entries)}---\n\n## Vignette {v}\n"
+        )
+        files.append(description)
+    return files
+
+
+def _rewrite_fastq(path: Path, change):
+    """
+    Stream the FASTQ through change(lines of one record, is_last) -> lines.
+    """
+    temporary = path.with_name(f".{path.name}.tmp")
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as source, opener(temporary, "wb") as target:
+        record = [source.readline() for _ in range(4)]
+        while record[0]:
+            following = [source.readline() for _ in range(4)]
+            target.writelines(change(record, not following[0]))
+            record = following
+    temporary.replace(path)
+
+
+def _bad_quality(record: list[bytes], is_last: bool) -> list[bytes]:
+    if is_last:
+        record = record[:3] + [b"\x7f" + record[3][1:]]
+    return record
+
+
+def _drop_last(record: list[bytes], is_last: bool) -> list[bytes]:
+    return [] if is_last else record
+
+
+def _compressed(path: Path) -> bool:
+    if path.name.endswith(".gz"):
+        return True
+    import tifffile
+
+    with tifffile.TiffFile(path) as tif:
+        return tif.pages[0].compression != 1
+
+
+def inject_fault(path: Path, kind: str, seed: int = 0):
+    if kind == "truncate":
+        with open(path, "r+b") as f:
+            f.truncate(path.stat().st_size // 2)
+    elif kind == "bitflip":
+        start, length = 0, path.stat().st_size
+        if not path.name.endswith(".gz"):
+            import tifffile
+
+            # inside the first page's data, which every decode pass reads
+            with tifffile.TiffFile(path) as tif:
+                start, length = tif.pages[0].dataoffsets[0], tif.pages[0].databytecounts[0]
+        position = start + length // 2 + random.Random(seed).randrange(min(64, length // 2 or 1))
+        with open(path, "r+b") as f:
+            f.seek(position)
+            byte = f.read(1)[0]
+            f.seek(position)
+            f.write(bytes([byte ^ 0x10]))
+    elif kind == "bad_quality":
+        _rewrite_fastq(path, _bad_quality)
+    elif kind == "count_mismatch":
+        _rewrite_fastq(path, _drop_last)
+    else:
+        raise ValueError(f"Unknown fault {kind}; expected one of {', '.join(FAULTS)}")
+
+
+def inject_faults(files: list[Path], faults: dict[str, int], seed: int = 0) -> list[Fault]:
+    """
+    Apply each fault kind to `count` distinct files it applies to: FASTQ
+    faults to FASTQ files (count_mismatch to R2 only, so the pair disagrees),
+    truncate to gzip and TIFF files, and bitflip to those of them whose data
+    is compressed, where a decoder can notice it.
+    """
+    rng = random.Random(seed)
+    candidates = {
+        "truncate": [f for f in files if f.name.endswith((".gz", ".tif"))],
+        "bitflip": [f for f in files if f.name.endswith((".gz", ".tif")) and _compressed(f)],
+        "bad_quality": [f for f in files if ".fastq" in f.name],
+        "count_mismatch": [f for f in files if ".fastq" in f.name and "_R2_" in f.name],
+    }
+    used: set[Path] = set()
+    injected = []
+    for kind, count in faults.items():
+        if kind not in FAULTS:
+            raise ValueError(f"Unknown fault {kind}; expected one of {', '.join(FAULTS)}")
+        available = [f for f in candidates[kind] if f not in used]
+        if count > len(available):
+            raise ValueError(f"Only {len(available)} files can take fault {kind}, {count} asked")
+        for path in rng.sample(available, count):
+            inject_fault(path, kind, seed=rng.randrange(2**32))
+            used.add(path)
+            injected.append(Fault(path, kind))
+    return injected
+
+
+def make_upload(
+    directory: Path,
+    fastq_groups_count: int = 0,
+    fastq_records: int = 1000,
+    plain_fastq: bool = False,
+    tiff_count: int = 0,
+    ome_tiff_count: int = 0,
+    tiff_shape: tuple[int, int, int] = (2, 512, 512),
+    tile: tuple[int, int] | None = (256, 256),
+    compression: str | None = "zlib",
+    pyramid_levels: int = 0,
+    qptiff_channels: int = 0,
+    codex_cycles: int = 0,
+    codex_regions: int = 1,
+    codex_tiles: int = 4,
+    vignette_count: int = 0,
+    faults: dict[str, int] = {},
+    seed: int = 0,
+) -> list[Fault]:
+    """
+    Write the requested parts of an upload under `directory` and return the
+    faults injected.
+    """
+    directory = Path(directory)
+    files = []
+    if fastq_groups_count:
+        files += fastq_groups(
+            directory / "raw/fastq", fastq_groups_count, fastq_records, not plain_fastq, seed
+        )
+    image_options = {
+        "shape": tiff_shape,
+        "tile": tile,
+        "compression": compression,
+        "pyramid_levels": pyramid_levels,
+        "seed": seed,
+    }
+    if tiff_count:
+        files += tiffs(directory / "raw/images", tiff_count, **image_options)
+    if ome_tiff_count:
+        files += tiffs(directory / "raw/images", ome_tiff_count, ome=True, **image_options)
+    if qptiff_channels:
+        files += qptiff(directory, channels=qptiff_channels, seed=seed)
+    if codex_cycles:
+        files += codex_tree(directory, codex_cycles, codex_regions, codex_tiles)
+    if vignette_count:
+        files += vignettes(directory, vignette_count)
+    return inject_faults(files, faults, seed)
+
+
+def _fault(value: str) -> tuple[str, int]:
+    kind, _, count = value.partition("=")
+    if kind not in FAULTS:
+        raise argparse.ArgumentTypeError(f"unknown fault {kind}; expected one of {list(FAULTS)}")
+    return kind, int(count or 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--fastq-groups", type=int, default=0)
+    parser.add_argument("--fastq-records", type=int, default=1000)
+    parser.add_argument("--plain-fastq", action="store_true", help="do not gzip FASTQ files")
+    parser.add_argument("--tiffs", type=int, default=0)
+    parser.add_argument("--ome-tiffs", type=int, default=0)
+    parser.add_argument("--tiff-shape", type=int, nargs=3, default=[2, 512, 512])
+    parser.add_argument("--tile", type=int, nargs=2, default=[256, 256])
+    parser.add_argument("--strips", action="store_true", help="write strips, not tiles")
+    parser.add_argument("--compression", default="zlib", help="'none' for uncompressed")
+    parser.add_argument("--pyramid-levels", type=int, default=0)
+    parser.add_argument("--qptiff-channels", type=int, default=0)
+    parser.add_argument("--codex-cycles", type=int, default=0)
+    parser.add_argument("--codex-regions", type=int, default=1)
+    parser.add_argument("--codex-tiles", type=int, default=4)
+    parser.add_argument("--vignettes", type=int, default=0)
+    parser.add_argument(
+        "--fault",
+        type=_fault,
+        action="append",
+        default=[],
+        help=f"KIND[=COUNT], KIND one of: {', '.join(FAULTS)}",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    faults = make_upload(
+        args.directory,
+        fastq_groups_count=args.fastq_groups,
+        fastq_records=args.fastq_records,
+        plain_fastq=args.plain_fastq,
+        tiff_count=args.tiffs,
+        ome_tiff_count=args.ome_tiffs,
+        tiff_shape=tuple(args.tiff_shape),
+        tile=None if args.strips else tuple(args.tile),
+        compression=None if args.compression == "none" else args.compression,
+        pyramid_levels=args.pyramid_levels,
+        qptiff_channels=args.qptiff_channels,
+        codex_cycles=args.codex_cycles,
+        codex_regions=args.codex_regions,
+        codex_tiles=args.codex_tiles,
+        vignette_count=args.vignettes,
+        faults=dict(args.fault),
+        seed=args.seed,
+    )
+    for fault in faults:
+        print(f"{fault.path}\t{fault.kind}")
+
+
+if __name__ == "__main__":
+    main()
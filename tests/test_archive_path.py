@@ -0,0 +1,281 @@
+import gzip
+import json
+import re
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+
+import pandas as pd
+import pytest
+import requests
+from archive_path import ArchiveMemberError, ArchivePath, open_gzip, to_path
+from validator import validation_class_iter
+
+_GOOD_RECORDS = """\
+@A12345:123:A12BCDEFG:1:1234:1000:1234 1:N:0:NACTGACTGA+CTGACTGACT
+NACTGACTGA
++
+#FFFFFFFFF
+"""
+
+
+def _extract(test_data_fname: str, tmp_path: Path) -> Path:
+    test_data_path = Path(test_data_fname)
+    zipfile.ZipFile(test_data_path).extractall(tmp_path)
+    return tmp_path / test_data_path.stem
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["**/*", "**/*.[tT][iI][fF]", "dir1/*", "*/*.TIF*", "**/dir3/*", "**/*.gz"],
+)
+def test_glob_matches_pathlib(pattern, tmp_path):
+    extracted = _extract("test_data/tiff_tree_bad.zip", tmp_path)
+    archive_root = ArchivePath("test_data/tiff_tree_bad.zip", "tiff_tree_bad")
+    expected = sorted(str(path.relative_to(extracted)) for path in extracted.glob(pattern))
+    found = sorted(str(path.relative_to(archive_root)) for path in archive_root.glob(pattern))
+    assert found == expected
+
+
+def test_to_path():
+    assert to_path("test_data/tiff_tree_bad.zip/tiff_tree_bad") == ArchivePath(
+        "test_data/tiff_tree_bad.zip", "tiff_tree_bad"
+    )
+    assert to_path("test_data/tiff_tree_bad.zip") == ArchivePath("test_data/tiff_tree_bad.zip")
+    assert to_path("test_data/not_there.zip/x") == Path("test_data/not_there.zip/x")
+    assert isinstance(to_path("test_data"), Path)
+
+
+def test_path_api():
+    root = ArchivePath("test_data/tiff_tree_bad.zip", "tiff_tree_bad")
+    member = root / "dir1" / "notatiff.tif"
+    assert member.is_file() and not member.is_dir()
+    assert (root / "dir1").is_dir()
+    assert not (root / "missing").exists()
+    assert member.name == "notatiff.tif"
+    assert member.stem == "notatiff"
+    assert member.suffix == ".tif"
+    assert member.parent == root / "dir1"
+    assert root.parent.parent == Path("test_data")
+    assert member.relative_to(root.parent) == PurePosixPath("tiff_tree_bad/dir1/notatiff.tif")
+    assert sorted(path.name for path in (root / "dir1").iterdir()) == [
+        "dir3",
+        "notatiff.tif",
+        "tiffsample.tif",
+    ]
+    assert member.stat().st_size == 1679
+
+
+@pytest.mark.parametrize(
+    "member", ["tiff_tree_bad/notatiff.tiff", "tiff_tree_bad/tiffsample.tiff"]
+)
+def test_random_access_matches_extracted(member, tmp_path):
+    # notatiff.tiff is stored, tiffsample.tiff is deflated
+    _extract("test_data/tiff_tree_bad.zip", tmp_path)
+    expected = (tmp_path / member).read_bytes()
+    with ArchivePath("test_data/tiff_tree_bad.zip", member).open("rb") as f:
+        assert f.read() == expected
+        f.seek(100)
+        assert f.read(50) == expected[100:150]
+        f.seek(-10, 2)
+        assert f.read() == expected[-10:]
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz"])
+def test_tar_archives(mode, tmp_path):
+    extracted = _extract("test_data/fake_snrnaseq_tree_bad.zip", tmp_path)
+    tar_path = tmp_path / ("upload.tar" if mode == "w" else "upload.tar.gz")
+    with tarfile.open(tar_path, mode) as tar:
+        tar.add(extracted, arcname=extracted.name)
+    root = to_path(tar_path / extracted.name)
+    assert isinstance(root, ArchivePath)
+    assert sorted(path.name for path in root.glob("**/*.gz")) == [
+        "text.txt.gz",
+        "text2.txt.gz",
+        "text3.txt.gz",
+    ]
+    with open_gzip(root / "text.txt.gz") as g_f:
+        assert g_f.read() == gzip.open(extracted / "text.txt.gz").read()
+
+
+@pytest.mark.parametrize(
+    ("test_data_fname", "plugin", "msg_re_list", "assay_type"),
+    (
+        (
+            "test_data/fake_snrnaseq_tree_bad.zip",
+            "gz_validator.GZValidator",
+            [".*text2.txt.gz is not a valid gzipped file"],
+            "snRNAseq",
+        ),
+        (
+            "test_data/tiff_tree_bad.zip",
+            "tiff_validator.TiffValidator",
+            [".*notatiff.* is not a valid TIFF file.*"] * 4,
+            "codex",
+        ),
+        (
+            "test_data/codex_tree_ometiff_bad.zip",
+            "ome_tiff_validator.OmeTiffValidator",
+            [".*tubhiswt_C0_bad.ome.tif is not a valid OME.TIFF file.*"],
+            "CODEX",
+        ),
+        (
+            "test_data/fake_codex_tree_7.zip",
+            "codex_common_errors_validator.CodexCommonErrorsValidator",
+            [None],
+            "CODEX",
+        ),
+    ),
+)
+def test_plugins_read_archives_directly(test_data_fname, plugin, msg_re_list, assay_type):
+    module_name, class_name = plugin.split(".")
+    plugin_class = getattr(__import__(module_name), class_name)
+    base_path = Path(test_data_fname) / Path(test_data_fname).stem
+    validator = plugin_class(base_path, assay_type, coreuse=2)
+    assert isinstance(validator.paths[0], ArchivePath)
+    errors = validator.collect_errors()
+    assert len(errors) == len(msg_re_list)
+    for err_str, re_str in zip(sorted(errors, key=str), msg_re_list):
+        assert (err_str is None and re_str is None) or re.match(re_str, err_str)
+
+
+def test_fastq_in_archive(tmp_path):
+    from fastq_validator_logic import FASTQValidatorLogic
+
+    zip_path = tmp_path / "upload.zip"
+    with zipfile.ZipFile(zip_path, "w") as zfile:
+        zfile.writestr(
+            "upload/20147_Healthy_PA_S1_L001_R1_001.fastq.gz",
+            gzip.compress(_GOOD_RECORDS.encode()),
+        )
+        zfile.writestr(
+            "upload/20147_Healthy_PA_S1_L001_R2_001.fastq.gz",
+            gzip.compress((_GOOD_RECORDS * 2).encode()),
+        )
+    validator = FASTQValidatorLogic()
+    validator.validate_fastq_files_in_path([to_path(zip_path / "upload")], 2)
+    assert len(validator.errors) == 1
+    assert "Counts do not match" in validator.errors[0]
+    assert "R2_001.fastq.gz': 8" in validator.errors[0]
+
+
+def _fastq_zip(tmp_path: Path) -> Path:
+    zip_path = tmp_path / "fastq_upload.zip"
+    with zipfile.ZipFile(zip_path, "w") as zfile:
+        for read, records in [("R1", 1), ("R2", 2)]:
+            zfile.writestr(
+                f"fastq_upload/20147_Healthy_PA_S1_L001_{read}_001.fastq.gz",
+                gzip.compress((_GOOD_RECORDS * records).encode()),
+            )
+    return zip_path
+
+
+def _qptiff_zip(tmp_path: Path) -> Path:
+    zip_path = tmp_path / "qptiff_upload.zip"
+    with zipfile.ZipFile(zip_path, "w") as zfile:
+        zfile.write(
+            "test_data/qptiff_good.qptiff.channels.csv",
+            "qptiff_upload/lab_processed/images/qptiff_upload.qptiff.channels.csv",
+        )
+        zfile.writestr("qptiff_upload/raw/images/qptiff_upload.qptiff", b"")
+    return zip_path
+
+
+# every plugin, with an upload it finds files in: (plugin, test_data zip or a function
+# writing one, assay_type)
+_ARCHIVE_CASES = [
+    (
+        "codex_json_validator.CodexJsonValidator",
+        "good_codex_akoya_directory_v1_with_dataset_json_fails.zip",
+        "CODEX",
+    ),
+    (
+        "codex_common_errors_validator.CodexCommonErrorsValidator",
+        "fake_codex_tree_7.zip",
+        "CODEX",
+    ),
+    ("ome_tiff_validator.OmeTiffValidator", "codex_tree_ometiff_bad.zip", "CODEX"),
+    ("ome_tiff_field_validator.OmeTiffFieldValidator", "codex_tree_ometiff_bad.zip", "CODEX"),
+    ("tiff_validator.TiffValidator", "tiff_tree_bad.zip", "codex"),
+    (
+        "segmentation_mask_imagesize_validation.ImageSizeValidator",
+        "segmask_HBM787.DVDV.435_crop400.zip",
+        "segmentation mask",
+    ),
+    (
+        "segmentation_mask_validator.SegmentationMaskValidator",
+        "seg_mask_good.zip",
+        "Segmentation Mask",
+    ),
+    ("qptiff_channel_validator.QpTiffChannelValidator", "qptiff_both_missing.zip", "phenocycler"),
+    ("qptiff_channel_validator.QpTiffChannelComparisonValidator", _qptiff_zip, "phenocycler"),
+    (
+        "publication_vignettes_validator.PublicationVignettesValidator",
+        "publication_tree_good.zip",
+        "Publication",
+    ),
+    (
+        "publication_vignettes_validator.PublicationVignettesValidator",
+        "publication_tree_bad_6.zip",
+        "Publication",
+    ),
+    (
+        "publication_metadata_validator.PublicationMetadataValidator",
+        "publication_tree_good.zip",
+        "publication",
+    ),
+    ("gz_validator.GZValidator", "fake_snrnaseq_tree_bad.zip", "snRNAseq"),
+    ("fastq_validator.FASTQValidator", _fastq_zip, "snRNAseq"),
+]
+
+
+def test_archive_cases_cover_every_plugin():
+    plugins = {f"{cls.__module__}.{cls.__name__}" for cls in validation_class_iter()}
+    assert plugins == {plugin for plugin, _, _ in _ARCHIVE_CASES}
+
+
+@pytest.mark.parametrize(("plugin", "upload", "assay_type"), _ARCHIVE_CASES)
+def test_plugins_match_in_archive_and_extracted(monkeypatch, tmp_path, plugin, upload, assay_type):
+    module_name, class_name = plugin.split(".")
+    plugin_class = getattr(__import__(module_name), class_name)
+    zip_path = upload(tmp_path) if callable(upload) else Path(f"test_data/{upload}")
+    extracted = _extract(str(zip_path), tmp_path / "extracted")
+    kwargs = {"coreuse": 2}
+    if class_name == "ImageSizeValidator":
+        [metadata] = extracted.glob("*metadata.tsv")
+        kwargs["schema_rows"] = pd.read_csv(metadata, sep="\t").to_dict("records")
+        parent = _extract("test_data/pas_HBM847.ZQZH.768_crop512.zip", tmp_path / "parent")
+        monkeypatch.setattr("tests_utils.GetParentData.get_path", lambda self: parent.parent)
+    if class_name == "SegmentationMaskValidator":
+        response = requests.models.Response()
+        response.status_code = 200
+        response._content = b'{"status":"PASSED","reporting":[]}'
+        monkeypatch.setattr("segmentation_mask_validator.requests.post", lambda *a, **k: response)
+    if class_name == "QpTiffChannelComparisonValidator":
+        monkeypatch.setattr(plugin_class, "uuid", "test_uuid")
+        monkeypatch.setattr(plugin_class, "tmp_dir_base", tmp_path)
+        monkeypatch.setattr("qptiff_channel_validator.Engine.dependencies_checked", True)
+    if class_name == "PublicationMetadataValidator":
+        monkeypatch.setattr(plugin_class, "entity_data", {})
+        monkeypatch.setattr(plugin_class, "_make_request", lambda self, url: None)
+    results = []
+    for base_path, root in [
+        (extracted, extracted.parent),
+        (zip_path / zip_path.stem, zip_path),
+    ]:
+        validator = plugin_class(base_path, assay_type, **kwargs)
+        errors = sorted(validator.collect_errors(), key=str)
+        results.append(json.dumps(errors, default=str).replace(f"{root}/", ""))
+    assert isinstance(validator.paths[0], ArchivePath)
+    assert json.loads(results[0])
+    if class_name == "QpTiffChannelComparisonValidator":
+        # bioformats2raw reads the QPTIFF from disk
+        assert "extract the upload" in results[1]
+    else:
+        assert results[0] == results[1]
+
+
+def test_archive_member_has_no_file_system_path():
+    member = to_path("test_data/qptiff_good.zip/qptiff_good/lab_processed")
+    with pytest.raises(ArchiveMemberError, match="extract the upload"):
+        open(member)
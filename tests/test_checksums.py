@@ -0,0 +1,167 @@
+import gzip
+import hashlib
+import io
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+from checksums import HashingReader, hashing, read_sums_file
+from io_hints import open_sequential
+
+_GOOD_RECORDS = """\
+@A12345:123:A12BCDEFG:1:1234:1000:1234 1:N:0:NACTGACTGA+CTGACTGACT
+NACTGACTGA
++
+#FFFFFFFFF
+"""
+
+
+@pytest.fixture
+def gz_upload(tmp_path) -> Path:
+    upload = tmp_path / "upload"
+    (upload / "sub").mkdir(parents=True)
+    (upload / "a.txt.gz").write_bytes(gzip.compress(b"a" * 10000))
+    (upload / "sub" / "b.txt.gz").write_bytes(gzip.compress(os.urandom(10000)))
+    return upload
+
+
+def _digest(path: Path, algorithm: str) -> str:
+    return hashlib.new(algorithm, path.read_bytes()).hexdigest()
+
+
+def test_out_of_order_reads_hash_whole_file(tmp_path):
+    path = tmp_path / "data.bin"
+    data = os.urandom(5000)
+    path.write_bytes(data)
+    reader = HashingReader(io.FileIO(path), path, ("md5", "sha256"))
+    reader.seek(3000)
+    assert reader.read(100) == data[3000:3100]
+    reader.seek(10)
+    assert reader.read(50) == data[10:60]
+    reader.seek(4000)
+    assert reader.read(10) == data[4000:4010]
+    digests = reader.hexdigests()
+    reader.close()
+    assert reader.hexdigests() == {
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    assert digests != reader.hexdigests()
+
+
+def test_open_sequential_hashes_only_when_enabled(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"data")
+    with open_sequential(path) as f:
+        assert not isinstance(f.raw, HashingReader)
+    with hashing(["md5"]), open_sequential(path) as f:
+        assert isinstance(f.raw, HashingReader)
+        assert f.read() == b"data"
+
+
+def test_gz_manifest(gz_upload, tmp_path):
+    from gz_validator import GZValidator
+
+    manifest = tmp_path / "manifest.tsv"
+    validator = GZValidator(gz_upload, "snRNAseq", coreuse=2, checksum_manifest=manifest)
+    assert validator.collect_errors() == [None]
+    rows = [line.split("\t") for line in manifest.read_text().splitlines()]
+    assert rows[0] == ["path", "size", "md5", "sha256"]
+    expected = [
+        [name, str((gz_upload / name).stat().st_size)]
+        + [_digest(gz_upload / name, algorithm) for algorithm in ["md5", "sha256"]]
+        for name in ["a.txt.gz", "sub/b.txt.gz"]
+    ]
+    assert sorted(rows[1:]) == expected
+
+
+def test_gz_verifies_supplied_sums(gz_upload):
+    from gz_validator import GZValidator
+
+    (gz_upload / "md5sums.txt").write_text(
+        f"{_digest(gz_upload / 'a.txt.gz', 'md5')}  a.txt.gz\n"
+        f"{'0' * 32} *sub/b.txt.gz\n"
+        f"{'0' * 32}  not_checked_by_this_plugin.tiff\n"
+    )
+    errors = GZValidator(gz_upload, "snRNAseq", coreuse=2).collect_errors()
+    assert len(errors) == 1
+    assert errors[0].startswith(f"{gz_upload / 'sub' / 'b.txt.gz'}: md5 checksum ")
+    assert errors[0].endswith(f"listed in {gz_upload / 'md5sums.txt'}")
+    assert GZValidator(
+        gz_upload, "snRNAseq", coreuse=2, verify_checksums=False
+    ).collect_errors() == [None]
+
+
+def test_tiff_pass_hashes_without_second_read(tmp_path):
+    from tiff_validator import TiffValidator
+
+    test_data_path = Path("test_data/tiff_tree_bad.zip")
+    zipfile.ZipFile(test_data_path).extractall(tmp_path)
+    upload = tmp_path / test_data_path.stem
+    tiffs = sorted(upload.glob("**/*.tif"))
+    (upload / "sha256sums").write_text(
+        "".join(f"{_digest(tiff, 'sha256')}  {tiff.relative_to(upload)}\n" for tiff in tiffs)
+    )
+    validator = TiffValidator(upload, "codex", coreuse=2)
+    errors = validator.collect_errors()
+    assert len(errors) == 4 and not any("checksum" in error for error in errors)
+    for tiff in tiffs:
+        assert validator.checksums[str(tiff)] == {"sha256": _digest(tiff, "sha256")}
+
+
+def test_fastq_manifest(tmp_path):
+    from fastq_validator import FASTQValidator
+
+    upload = tmp_path / "upload"
+    upload.mkdir()
+    for read in ["R1", "R2"]:
+        (upload / f"20147_Healthy_PA_S1_L001_{read}_001.fastq.gz").write_bytes(
+            gzip.compress(_GOOD_RECORDS.encode())
+        )
+    manifest = tmp_path / "manifest.tsv"
+    FASTQValidator(
+        upload, "snRNAseq", coreuse=2, checksum_manifest=manifest, checksum_algorithms=["md5"]
+    ).collect_errors()
+    rows = manifest.read_text().splitlines()
+    assert rows[0] == "path\tsize\tmd5"
+    assert len(rows) == 3
+
+
+def test_fastq_sums_file_keeps_splitting(monkeypatch, tmp_path):
+    import fastq_validator_logic
+    from fastq_validator import FASTQValidator
+
+    monkeypatch.setattr(fastq_validator_logic, "SPLIT_MIN_BYTES", 1)
+    monkeypatch.setattr(fastq_validator_logic, "SPLIT_RANGE_BYTES", 1000)
+    split = fastq_validator_logic._split
+    items = []
+
+    def recording_split(file, threads):
+        items.extend(split(file, threads))
+        return split(file, threads)
+
+    monkeypatch.setattr(fastq_validator_logic, "_split", recording_split)
+    upload = tmp_path / "upload"
+    upload.mkdir()
+    fastq = upload / "20147_Healthy_PA_S1_L001_R1_001.fastq"
+    fastq.write_text(_GOOD_RECORDS * 200)
+    sums = upload / "md5sums.txt"
+    sums.write_text(f"{_digest(fastq, 'md5')}  {fastq.name}\n")
+    validator = FASTQValidator(upload, "snRNAseq", coreuse=4)
+    assert validator.collect_errors() == [None]
+    assert validator.checksums[str(fastq)] == {"md5": _digest(fastq, "md5")}
+    assert sum(isinstance(item, fastq_validator_logic.FileRange) for item in items) > 10
+    assert items[0] == fastq_validator_logic.FileHash(fastq)
+    sums.write_text(f"{'0' * 32}  {fastq.name}\n")
+    errors = FASTQValidator(upload, "snRNAseq", coreuse=4).collect_errors()
+    assert len(errors) == 1 and errors[0].startswith(f"{fastq}: md5 checksum ")
+
+
+def test_read_sums_file(tmp_path):
+    sums = tmp_path / "md5sums.txt"
+    sums.write_text("ABCDEF  dir/../a.txt\nnot a sums line\n012345 *b c.txt\n")
+    assert read_sums_file(sums) == {
+        str(tmp_path / "a.txt"): "abcdef",
+        str(tmp_path / "b c.txt"): "012345",
+    }
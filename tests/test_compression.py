@@ -0,0 +1,131 @@
+import bz2
+import io
+import os
+
+import compression
+import gzip_backend
+import pytest
+import zstandard
+from compression import ZstdFrames, open_decompressing
+
+from tests.synthetic_upload import write_fastq
+
+_DATA = os.urandom(100_000) + b"A" * 300_000
+
+
+def _zstd_inputs() -> dict:
+    compressor = zstandard.ZstdCompressor(write_checksum=True)
+    streaming = compressor.compressobj()
+    skippable = b"\x50\x2a\x4d\x18" + (3).to_bytes(4, "little") + b"abc"
+    return {
+        "frame": compressor.compress(_DATA),
+        "frames": b"".join(
+            compressor.compress(_DATA[i : i + 30_000]) for i in range(0, 400_000, 30_000)
+        ),
+        "skippable frames": skippable
+        + compressor.compress(_DATA[:1000])
+        + skippable
+        + compressor.compress(_DATA[1000:]),
+        "unknown size": streaming.compress(_DATA) + streaming.flush(),
+    }
+
+
+def _bz2_inputs() -> dict:
+    return {
+        "stream": bz2.compress(_DATA),
+        "streams": bz2.compress(_DATA[:1000]) + bz2.compress(_DATA[1000:]),
+        "trailing data": bz2.compress(_DATA) + b"garbage",
+    }
+
+
+def _read(data: bytes, suffix: str, backend: str, **kwargs) -> bytes:
+    with open_decompressing(io.BufferedReader(io.BytesIO(data)), suffix, backend, **kwargs) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", gzip_backend.GZIP_BACKENDS)
+@pytest.mark.parametrize("suffix, inputs", [(".zst", _zstd_inputs), (".bz2", _bz2_inputs)])
+def test_backends_decompress_alike(monkeypatch, backend, suffix, inputs):
+    # small chunks exercise frame and stream boundaries
+    monkeypatch.setattr(compression, "INFLATE_CHUNK_BYTES", 1000)
+    for data in inputs().values():
+        assert _read(data, suffix, backend, threads=3) == _DATA
+    assert _read(b"", suffix, backend) == b""
+
+
+@pytest.mark.parametrize("backend", ["stdlib", "threaded", "bgzf"])
+@pytest.mark.parametrize(
+    "suffix, inputs, name",
+    [
+        (".zst", _zstd_inputs, "frames"),
+        (".zst", _zstd_inputs, "unknown size"),
+        (".bz2", _bz2_inputs, "stream"),
+    ],
+)
+def test_truncation_is_an_eof_error(backend, suffix, inputs, name):
+    data = inputs()[name]
+    with pytest.raises(EOFError):
+        _read(data[:-5], suffix, backend)
+
+
+def test_bz2_errors_match_bz2_module():
+    data = bz2.compress(_DATA)
+    damaged = data[:1000] + b"\xff" * 100 + data[1100:]
+    with pytest.raises(OSError):
+        bz2.decompress(damaged)
+    with pytest.raises(OSError):
+        _read(damaged, ".bz2", "threaded")
+    assert bz2.decompress(data + b"garbage") == _read(data + b"garbage", ".bz2", "stdlib")
+
+
+def test_zstd_frames_are_decompressed_together(monkeypatch):
+    inputs = _zstd_inputs()
+    batches = []
+    decompress_frames = compression._decompress_frames
+
+    def counting(frames):
+        batches.append(len(frames))
+        return decompress_frames(frames)
+
+    monkeypatch.setattr(compression, "_decompress_frames", counting)
+    assert _read(inputs["frames"], ".zst", "bgzf", threads=2) == _DATA
+    assert sum(batches) == 14
+    batches.clear()
+    # no content size: streamed
+    assert _read(inputs["unknown size"], ".zst", "bgzf", threads=2) == _DATA
+    assert not batches
+
+
+def test_zstd_frames_follows_headers():
+    frame = zstandard.ZstdCompressor(write_checksum=True).compress(_DATA)
+    skippable = b"\x5f\x2a\x4d\x18" + (3).to_bytes(4, "little") + b"abc"
+    data = skippable + frame + frame
+    frames = ZstdFrames()
+    # a few bytes at a time, splitting headers
+    for i in range(0, len(data) - 1, 7):
+        frames.feed(data[i : min(i + 7, len(data) - 1)])
+    assert frames.ends == [11, 11 + len(frame)]
+    assert not frames.between_frames
+    frames.feed(data[-1:])
+    assert frames.ends[-1] == len(data)
+    assert frames.between_frames
+
+
+@pytest.mark.parametrize("suffix", [".bz2", ".zst"])
+def test_fastq_validation_matches_gzip(tmp_path, suffix):
+    from fastq_validator_logic import FASTQValidatorLogic
+
+    results = []
+    for compressed in [".gz", suffix]:
+        path = tmp_path / f"sample_S1_L001_R1_001.fastq{compressed}"
+        write_fastq(path, 10_000)
+        for gzip_backend_name in ["stdlib", "threaded", "bgzf"]:
+            validator = FASTQValidatorLogic(gzip_backend=gzip_backend_name)
+            validator.validate_fastq_file(path)
+            results.append((validator.errors, list(validator._file_record_counts.values())))
+        path.write_bytes(path.read_bytes()[:-20_000])
+        validator = FASTQValidatorLogic(gzip_backend="bgzf")
+        validator.validate_fastq_file(path)
+        assert validator.errors
+    assert all(result == results[0] for result in results)
+    assert not results[0][0]
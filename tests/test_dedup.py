@@ -0,0 +1,58 @@
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+from dedup import fan_out, group_duplicates
+
+
+@pytest.fixture
+def tiff_tree(tmp_path) -> Path:
+    test_data_path = Path("test_data/tiff_tree_bad.zip")
+    zipfile.ZipFile(test_data_path).extractall(tmp_path)
+    return tmp_path / test_data_path.stem
+
+
+def test_group_by_inode(tmp_path):
+    original = tmp_path / "a.tif"
+    original.write_bytes(b"data")
+    hardlink = tmp_path / "b.tif"
+    os.link(original, hardlink)
+    symlink = tmp_path / "c.tif"
+    symlink.symlink_to(original)
+    copy = tmp_path / "d.tif"
+    copy.write_bytes(b"data")
+    other = tmp_path / "e.tif"
+    other.write_bytes(b"atad")
+    files = [original, hardlink, symlink, copy, other]
+    assert group_duplicates(files) == {original: [hardlink, symlink], copy: [], other: []}
+    assert group_duplicates(files, by_content=True) == {
+        original: [hardlink, symlink, copy],
+        other: [],
+    }
+
+
+def test_fan_out():
+    assert fan_out("/a/x.tif is bad", "/a/x.tif", "/b/x.tif") == "/b/x.tif is bad"
+    assert fan_out(["/a/x.tif: e1", "e2"], "/a/x.tif", "/b/x.tif") == ["/b/x.tif: e1", "e2"]
+    assert fan_out(None, "/a/x.tif", "/b/x.tif") is None
+
+
+def test_tiff_validator_checks_copies_once(tiff_tree):
+    import tiff_validator
+
+    bad = tiff_tree / "notatiff.tiff"
+    os.link(bad, tiff_tree / "hardlink.tiff")
+    (tiff_tree / "symlink.tif").symlink_to(bad)
+    validator = tiff_validator.TiffValidator(tiff_tree, "codex", coreuse=2)
+    errors = validator.collect_errors()
+    tiff_paths = [
+        path for path in tiff_tree.glob("**/*") if path.suffix.lower() in {".tif", ".tiff"}
+    ]
+    assert validator.progress.files_total == len(tiff_paths) - 2
+    assert len(errors) == 6
+    assert {Path(error.split(" is not")[0]).name for error in errors} >= {
+        "notatiff.tiff",
+        "hardlink.tiff",
+        "symlink.tif",
+    }
@@ -0,0 +1,71 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+from fastq_qc import BASES, FastqQC
+
+
+def _records(rng: random.Random, count: int, lengths: list[int]) -> list[tuple[bytes, bytes]]:
+    records = []
+    for _ in range(count):
+        length = rng.choice(lengths)
+        sequence = bytes(rng.choice(b"ACGTNX") for _ in range(length))
+        records.append((sequence, bytes(rng.randrange(33, 75) for _ in range(length))))
+    return records
+
+
+def _expected(records: list[tuple[bytes, bytes]]) -> dict:
+    lengths = Counter(len(sequence) for sequence, _ in records)
+    longest = max(lengths)
+    composition = {base: [0] * longest for base in [*BASES, "other"]}
+    quality_sums = [0] * longest
+    quality_positions = [0] * longest
+    for sequence, quality in records:
+        for position, base in enumerate(sequence.decode()):
+            composition[base if base in BASES else "other"][position] += 1
+        for position, score in enumerate(quality):
+            quality_sums[position] += score - 33
+            quality_positions[position] += 1
+    return {
+        "records": len(records),
+        "length_distribution": {str(length): lengths[length] for length in sorted(lengths)},
+        "base_composition": composition,
+        "quality_histogram": {
+            str(score - 33): count
+            for score, count in sorted(Counter(b"".join(q for _, q in records)).items())
+        },
+        "mean_quality_by_position": [
+            round(total / count, 2) for total, count in zip(quality_sums, quality_positions)
+        ],
+    }
+
+
+@pytest.mark.parametrize("lengths", [[50], [0, 1, 30, 50]])
+def test_summary_matches_naive_count(lengths):
+    records = _records(random.Random(len(lengths)), 500, lengths)
+    qc = FastqQC()
+    for sequence, quality in records:
+        qc.add_record(sequence, quality)
+    summary = qc.summary()
+    assert {key: summary[key] for key in _expected(records)} == _expected(records)
+    bases = sum(len(sequence) for sequence, _ in records)
+    assert summary["bases"] == bases
+    assert summary["n_rate"] == sum(s.count(b"N") for s, _ in records) / bases
+
+
+def test_merge_adds_up():
+    records = _records(random.Random(0), 300, [10, 20])
+    whole, parts = FastqQC(), [FastqQC(), FastqQC()]
+    for index, (sequence, quality) in enumerate(records):
+        whole.add_record(sequence, quality)
+        parts[index < 100].add_record(sequence, quality)
+    parts[0].merge(parts[1])
+    assert parts[0].summary() == whole.summary()
+
+
+def test_empty():
+    summary = FastqQC().summary()
+    assert summary["records"] == 0 and summary["n_rate"] == 0.0
+    assert summary["mean_quality_by_position"] == []
+    assert np.isfinite(summary["gc_content"])
@@ -1,16 +1,27 @@
 import gzip
+import json
+import multiprocessing
+import os
+import random
 from operator import attrgetter
 from pathlib import Path, PosixPath
 from typing import TextIO
 
+import fastq_validator_logic
 import pytest
-
-from src.ingest_validation_tests.fastq_validator_logic import (
+from fastq_validator_logic import (
+    ENGINES,
     FASTQValidatorLogic,
+    FileResult,
+    count_fastq_lines,
     filename_pattern,
     get_prefix_read_type_and_set,
+    normalize_read_id,
+    validate_fastq_item,
 )
 
+from tests.synthetic_upload import fastq_groups
+
 _GOOD_RECORDS = """\
 @A12345:123:A12BCDEFG:1:1234:1000:1234 1:N:0:NACTGACTGA+CTGACTGACT
 NACTGACTGA
@@ -29,14 +40,38 @@ _GOOD_SEQUENCE_FOR_QUALITY = (
 )
 
 
+# edits the vectorized engine must report exactly as the reference engine does
+_MUTATIONS = [
+    b"$",
+    b" ",
+    b"\x1f",
+    b"\xe9",
+    b"\r",
+    b"\n",
+    b"\n\n",
+    b"@",
+    b"+",
+    b"",
+]
+
+
 def _open_output_file(filename: Path, use_gzip: bool) -> TextIO:
     return gzip.open(filename, "wt") if use_gzip else open(filename, "wt")
 
 
+def _mutated_records(rng: random.Random) -> bytes:
+    data = bytearray((_GOOD_RECORDS * 20).encode())
+    for _ in range(rng.randrange(4)):
+        position = rng.randrange(len(data))
+        replaced = rng.randrange(3)
+        data[position : position + replaced] = rng.choice(_MUTATIONS)
+    return bytes(data[: rng.choice([len(data), rng.randrange(len(data))])])
+
+
 class TestFASTQValidatorLogic:
-    @pytest.fixture
-    def fastq_validator(self) -> FASTQValidatorLogic:
-        return FASTQValidatorLogic()
+    @pytest.fixture(params=ENGINES)
+    def fastq_validator(self, request) -> FASTQValidatorLogic:
+        return FASTQValidatorLogic(engine=request.param)
 
     def test_fastq_validator_no_files(self, fastq_validator, tmp_path):
         fastq_validator.validate_fastq_files_in_path([tmp_path], 2)
@@ -177,6 +212,376 @@ NACTGACTGA
             "contains 9 characters which does not match line 2's 10" in fastq_validator.errors[0]
         )
 
+    @pytest.mark.parametrize("chunk_bytes", [7, 64, 2**20])
+    @pytest.mark.parametrize("use_gzip", [False, True])
+    def test_engines_agree(self, monkeypatch, tmp_path, chunk_bytes, use_gzip):
+        monkeypatch.setattr(fastq_validator_logic, "VECTOR_CHUNK_BYTES", chunk_bytes)
+        rng = random.Random(chunk_bytes)
+        test_file = tmp_path.joinpath("test.fastq.gz" if use_gzip else "test.fastq")
+        for _ in range(50):
+            data = _mutated_records(rng)
+            test_file.write_bytes(gzip.compress(data) if use_gzip else data)
+            results = []
+            for engine in ENGINES:
+                validator = FASTQValidatorLogic(engine=engine, qc_dir=tmp_path)
+                validator.validate_fastq_file(test_file)
+                qc = {file: qc.summary() for file, qc in validator.qc.items()}
+                results.append((validator.errors, dict(validator._file_record_counts), qc))
+                validator = FASTQValidatorLogic(engine=engine, max_errors=1)
+                validator.validate_fastq_file(test_file)
+                results.append(validator.errors)
+            assert results[0] == results[2] and results[1] == results[3], data
+
+    def test_counts_return_with_results(self, tmp_path):
+        for read in ["R1", "R2"]:
+            tmp_path.joinpath(f"SREQ-1_S1_L001_{read}_001.fastq").write_text(_GOOD_RECORDS)
+        validator = FASTQValidatorLogic()
+        # no Manager server processes for the shared containers
+        assert not multiprocessing.active_children()
+        validator.validate_fastq_files_in_path([tmp_path], 2)
+        assert validator._file_record_counts == {
+            str(tmp_path / f"SREQ-1_S1_L001_{read}_001.fastq"): 4 for read in ["R1", "R2"]
+        }
+
+    @pytest.mark.parametrize(
+        "line, read_id",
+        [
+            (b"@A1:2:3:1:1101:1000:1234 1:N:0:NACTGACTGA\n", b"A1:2:3:1:1101:1000:1234"),
+            (b"@SRR001.1/2\n", b"SRR001.1"),
+            (b"@read\tcomment\n", b"read"),
+            (b"@\n", b""),
+        ],
+    )
+    def test_normalize_read_id(self, line, read_id):
+        assert normalize_read_id(line) == read_id
+
+    @pytest.mark.parametrize("gz", [False, True])
+    def test_check_pairs(self, monkeypatch, tmp_path, gz):
+        files = fastq_groups(tmp_path, 2, 500, gz=gz)
+        r2 = files[1]
+        with (gzip.open if gz else open)(r2, "rt") as f:
+            records = f.read().split("\n")
+        # swap records 11 and 12, then damage the IDs from record 101 on
+        records[40:44], records[44:48] = records[44:48], records[40:44]
+        for line in range(400, 2000, 4):
+            records[line] = records[line].replace(":1000 ", ":1001 ")
+        with _open_output_file(r2, gz) as f:
+            f.write("\n".join(records))
+        monkeypatch.setattr(fastq_validator_logic, "PAIR_MISMATCH_LIMIT", 5)
+        weights = []
+
+        class WeighingPool(fastq_validator_logic.TaskPool):
+            def imap_unordered(self, func, items, *args, item_weight=None, **kwargs):
+                if func.func is fastq_validator_logic.check_read_pairs:
+                    weights.extend(item_weight(item) for item in items)
+                return super().imap_unordered(
+                    func, items, *args, item_weight=item_weight, **kwargs
+                )
+
+        monkeypatch.setattr(fastq_validator_logic, "TaskPool", WeighingPool)
+
+        validator = FASTQValidatorLogic(check_pairs=True)
+        validator.validate_fastq_files_in_path([tmp_path], 2)
+        assert len(validator.errors) == 6
+        assert validator.errors[0].startswith("Read IDs do not match in record 11 among")
+        assert "A12345:123:A12BCDEFG:1:1101:10:1000" in validator.errors[0]
+        assert validator.errors[2].startswith("Read IDs do not match in record 101 among")
+        assert validator.errors[5].startswith("Stopped comparing read IDs")
+        assert str(r2) in validator.errors[0] and "sample0001" not in str(validator.errors)
+        sizes = [file.stat().st_size for file in files]
+        assert sorted(weights) == sorted([sizes[0] + sizes[1], sizes[2] + sizes[3]])
+
+        validator = FASTQValidatorLogic()
+        validator.validate_fastq_files_in_path([tmp_path], 2)
+        assert not validator.errors
+
+    def test_errors_are_reported_once(self, tmp_path):
+        for name in ["A", "B", "C"]:
+            tmp_path.joinpath(f"{name}_S1_L001_R1_001.fastq").write_text(_GOOD_RECORDS[1:])
+        validator = FASTQValidatorLogic()
+        # one worker validates every file in turn
+        validator.validate_fastq_files_in_path([tmp_path], 1)
+        assert len(validator.errors) == 3
+        assert len(set(validator.errors)) == 3
+
+    def test_worker_result(self, tmp_path):
+        path = tmp_path / "A_S1_L001_R1_001.fastq"
+        path.write_text(_GOOD_RECORDS)
+        assert validate_fastq_item(path, "vectorized", "auto") == FileResult(path, 4, [])
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            FASTQValidatorLogic(engine="fast")
+
+    @pytest.mark.parametrize(
+        "edit",
+        [
+            # (position in the file, bytes replaced, replacement)
+            None,
+            (5000, 1, b"$"),
+            # a quality line starting with '@', as a record start would
+            (_GOOD_RECORDS.index("#"), 1, b"@"),
+            # one line too many: ranges after it resynchronise to the wrong line
+            (3000, 0, b"\n"),
+            (-10, 10, b""),
+        ],
+    )
+    def test_split_file_matches_one_pass(self, monkeypatch, tmp_path, edit):
+        data = bytearray((_GOOD_RECORDS * 200).encode())
+        if edit:
+            position, replaced, replacement = edit
+            data[position : position + replaced or None] = replacement
+        (tmp_path / "SREQ-1_S1_L001_R1_001.fastq").write_bytes(data)
+        results = []
+        for threads in [1, 4]:
+            monkeypatch.setattr(fastq_validator_logic, "SPLIT_MIN_BYTES", 1)
+            monkeypatch.setattr(fastq_validator_logic, "SPLIT_RANGE_BYTES", 1000)
+            validator = FASTQValidatorLogic(qc_dir=tmp_path / f"qc{threads}")
+            validator.validate_fastq_files_in_path([tmp_path], threads)
+            qc = {file: qc.summary() for file, qc in validator.qc.items()}
+            results.append((validator.errors, dict(validator._file_record_counts), qc))
+            validator = FASTQValidatorLogic(max_errors=1)
+            validator.validate_fastq_files_in_path([tmp_path], threads)
+            results.append(validator.errors)
+        assert results[0] == results[2] and results[1] == results[3]
+        assert (
+            fastq_validator_logic._split(tmp_path / "SREQ-1_S1_L001_R1_001.fastq", 4)[-1].count
+            > 10
+        )
+
+    def test_split_file_revalidated_in_a_worker(self, monkeypatch, tmp_path):
+        data = (_GOOD_RECORDS * 200).encode()
+        # one line too many: the file is validated again in one pass
+        path = tmp_path / "SREQ-1_S1_L001_R1_001.fastq"
+        path.write_bytes(data[:3000] + b"\n" + data[3000:])
+        monkeypatch.setattr(fastq_validator_logic, "SPLIT_MIN_BYTES", 1)
+        monkeypatch.setattr(fastq_validator_logic, "SPLIT_RANGE_BYTES", 1000)
+        validate_fastq_file = FASTQValidatorLogic.validate_fastq_file
+
+        def recording(validator, fastq_file):
+            with open(tmp_path / "pids", "a") as f:
+                f.write(f"{os.getpid()}\n")
+            validate_fastq_file(validator, fastq_file)
+
+        monkeypatch.setattr(FASTQValidatorLogic, "validate_fastq_file", recording)
+        validator = FASTQValidatorLogic()
+        validator.validate_fastq_files_in_path([tmp_path], 4)
+        assert validator.errors
+        pids = (tmp_path / "pids").read_text().split()
+        assert len(pids) == 1 and int(pids[0]) != os.getpid()
+
+    def test_qc_summaries(self, tmp_path):
+        upload = tmp_path / "upload"
+        (upload / "subdir").mkdir(parents=True)
+        (upload / "A_S1_L001_R1_001.fastq").write_text(_GOOD_RECORDS * 3)
+        with _open_output_file(upload / "subdir/A_S1_L001_R1_001.fastq.gz", True) as output:
+            output.write(_GOOD_RECORDS + _GOOD_RECORDS.replace("NACTGACTGA", "GGGGGGGG"))
+        (upload / "subdir/empty_S1_L001_R1_001.fastq").touch()
+
+        validator = FASTQValidatorLogic(qc_dir=tmp_path / "qc")
+        validator.validate_fastq_files_in_path([upload], 2)
+        assert sorted(path.name for path in (tmp_path / "qc").glob("**/*.json")) == [
+            "A_S1_L001_R1_001.fastq.gz.qc.json",
+            "A_S1_L001_R1_001.fastq.qc.json",
+        ]
+        with open(tmp_path / "qc/A_S1_L001_R1_001.fastq.qc.json") as f:
+            summary = json.load(f)
+        assert summary["records"] == 3 and summary["bases"] == 30
+        assert summary["length_distribution"] == {"10": 3}
+        assert summary["base_composition"]["N"] == [3] + [0] * 9
+        assert summary["base_composition"]["A"][1] == 3
+        assert summary["n_rate"] == 0.1
+        assert summary["quality_histogram"] == {"2": 3, "37": 27}
+        assert summary["mean_quality_by_position"] == [2.0] + [37.0] * 9
+        with open(tmp_path / "qc/subdir/A_S1_L001_R1_001.fastq.gz.qc.json") as f:
+            summary = json.load(f)
+        # the second record is malformed, and still counted
+        assert summary["length_distribution"] == {"8": 1, "10": 1}
+        assert summary["gc_content"] == 12 / 17
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_error_limit(self, tmp_path, engine):
+        bad_record = _GOOD_RECORDS.replace("NACTGACTGA", "NACTGAXTG ")
+        # an invalid character in every other record, and at the end a record whose
+        # trailing space is stripped, so that its line 4 is too long as well
+        data = (_GOOD_RECORDS + bad_record.replace(" ", "A")) * 500 + bad_record
+        path = tmp_path / "A_S1_L001_R1_001.fastq"
+        path.write_text(data)
+        validator = FASTQValidatorLogic(engine=engine, max_errors=None)
+        validator.validate_fastq_file(path)
+        assert len(validator.errors) == 502
+
+        validator = FASTQValidatorLogic(engine=engine, max_errors=10)
+        validator.validate_fastq_file(path)
+        assert len(validator.errors) == 11
+        assert (
+            validator.errors[9]
+            == f"A_S1_L001_R1_001.fastq:{19 * 4 + 2}: Line contains invalid character(s): X"
+        )
+        assert validator.errors[10] == (
+            "A_S1_L001_R1_001.fastq: 492 more errors not reported (limit 10 per file): "
+            """{"Line contains N characters which does not match line N's N characters.": 1, """
+            "'Line contains invalid character(s)': 491}"
+        )
+        assert validator._file_record_counts == {str(path): 4004}
+
+    @pytest.mark.parametrize(
+        "data",
+        [_GOOD_RECORDS * 3, _GOOD_RECORDS + "@no newline", "", "\n\n", _GOOD_RECORDS + "\n"],
+    )
+    @pytest.mark.parametrize("use_gzip", [False, True])
+    def test_count_lines_matches_validation(self, monkeypatch, tmp_path, data, use_gzip):
+        monkeypatch.setattr(fastq_validator_logic, "VECTOR_CHUNK_BYTES", 7)
+        path = tmp_path / f"A_S1_L001_R1_001.fastq{'.gz' if use_gzip else ''}"
+        with _open_output_file(path, use_gzip) as output:
+            output.write(data)
+        validator = FASTQValidatorLogic()
+        validator.validate_fastq_file(path)
+        assert count_fastq_lines(path) == (path, validator._file_record_counts.get(str(path), 0))
+
+    def test_count_lines_of_unreadable_file(self, tmp_path):
+        path = tmp_path / "A_S1_L001_R1_001.fastq.gz"
+        path.write_bytes(gzip.compress(_GOOD_RECORDS.encode())[:-10])
+        assert count_fastq_lines(path) == (path, None)
+
+    def _mismatched_groups(self, tmp_path):
+        for read, records in [("R1", _GOOD_RECORDS * 2), ("R2", _GOOD_RECORDS.replace("+", "-"))]:
+            tmp_path.joinpath(f"A_S1_L001_{read}_001.fastq").write_text(records)
+        for read in ["R1", "R2"]:
+            tmp_path.joinpath(f"B_S1_L001_{read}_001.fastq").write_text(_GOOD_RECORDS)
+        # could not be counted: left to validation
+        tmp_path.joinpath("C_S1_L001_R1_001.fastq.gz").write_bytes(b"\x1f\x8b")
+        tmp_path.joinpath("C_S1_L001_R2_001.fastq").write_text(_GOOD_RECORDS)
+
+    def test_count_first(self, tmp_path, capsys):
+        self._mismatched_groups(tmp_path)
+        validator = FASTQValidatorLogic()
+        validator.validate_fastq_files_in_path([tmp_path], 2)
+        capsys.readouterr()
+        counted = FASTQValidatorLogic(count_first=True)
+        counted.validate_fastq_files_in_path([tmp_path], 2)
+        # logged when counted, before any file is validated
+        assert "Counts do not match" in capsys.readouterr().out
+        assert sorted(counted.errors) == sorted(validator.errors)
+        assert counted._ungrouped_files == validator._ungrouped_files
+
+    def test_fail_fast(self, tmp_path):
+        self._mismatched_groups(tmp_path)
+        validator = FASTQValidatorLogic(fail_fast=True)
+        validator.validate_fastq_files_in_path([tmp_path], 2)
+        assert validator.errors == [
+            "Counts do not match among files matching pattern "
+            f"{tmp_path}/A_S1_L001_R#_001.fastq: "
+            f"{{'{tmp_path}/A_S1_L001_R1_001.fastq': 8, '{tmp_path}/A_S1_L001_R2_001.fastq': 4}}"
+        ]
+        assert not validator._file_record_counts
+
+        tmp_path.joinpath("A_S1_L001_R2_001.fastq").write_text(_GOOD_RECORDS * 2)
+        validator = FASTQValidatorLogic(fail_fast=True)
+        validator.validate_fastq_files_in_path([tmp_path], 2)
+        # counts match, so files are validated
+        assert len(validator._file_record_counts) == 5
+        assert any("C_S1_L001_R1_001.fastq.gz" in error for error in validator.errors)
+
+    def _sampled(self, monkeypatch, tmp_path, data: str, use_gzip: bool, **kwargs):
+        monkeypatch.setattr(fastq_validator_logic, "SAMPLE_BLOCK_BYTES", 2000)
+        monkeypatch.setattr(fastq_validator_logic, "SAMPLE_STREAM_PERIOD_BYTES", 7000)
+        path = tmp_path / f"A_S1_L001_R1_001.fastq{'.gz' if use_gzip else ''}"
+        with _open_output_file(path, use_gzip) as output:
+            output.write(data)
+        validators = []
+        for engine in ENGINES:
+            validator = FASTQValidatorLogic(engine=engine, sample_blocks=3, **kwargs)
+            validator.validate_fastq_file(path)
+            validators.append(validator)
+        assert validators[0].errors == validators[1].errors
+        return path, validators[0]
+
+    @pytest.mark.parametrize("use_gzip", [False, True])
+    def test_sample_errors_are_located(self, monkeypatch, tmp_path, use_gzip):
+        bad_record = _GOOD_RECORDS.replace("\nNACTGACTGA", "\nNACTGAXTGA")
+        data = bad_record * 500
+        path, validator = self._sampled(monkeypatch, tmp_path, data, use_gzip, max_errors=None)
+        coverage = validator.sampled[str(path)]
+        # every 7000 bytes of a stream, then the last 3500 (a tail merged with the
+        # window that starts there); the head, tail and 3 random windows of a plain file
+        assert coverage.windows == (7 if use_gzip else 5)
+        assert coverage.sampled_bytes < coverage.total_bytes == len(data)
+        assert not validator._file_record_counts
+        lines = data.split("\n")
+        offsets = set()
+        for error in validator.errors:
+            location, line, message = error.split(":", 2)
+            assert message == " Line contains invalid character(s): X"
+            offset = int(location.partition("@")[2] or 0)
+            assert data[offset] == "@" and data[offset - 1 : offset] in ["\n", ""]
+            assert data[offset:].split("\n")[int(line) - 1] == lines[1]
+            offsets.add(offset)
+        # the head, the tail, and the windows between
+        assert 0 in offsets and len(offsets) == coverage.windows
+
+    @pytest.mark.parametrize("use_gzip", [False, True])
+    def test_sample_finds_truncation(self, monkeypatch, tmp_path, use_gzip):
+        data = _GOOD_RECORDS * 500
+        # cut after the last record's line 2
+        path, validator = self._sampled(monkeypatch, tmp_path, data[:-20], use_gzip)
+        [error] = validator.errors
+        assert error.endswith(": File ends in the middle of a record, after line 2 of 4.")
+        assert str(path) in validator.sampled
+
+        # within two windows, so validated whole
+        path, validator = self._sampled(monkeypatch, tmp_path, _GOOD_RECORDS * 40, use_gzip)
+        assert not validator.sampled
+        assert validator._file_record_counts == {str(path): 160}
+
+    def test_sample_restarts_with_reference_engine(self, monkeypatch, tmp_path):
+        # non-ASCII in the tail: the vectorized engine starts over from the head
+        data = _GOOD_RECORDS.replace("\n+\n", "\n-\n") + _GOOD_RECORDS * 500 + "@é\n"
+        path, validator = self._sampled(monkeypatch, tmp_path, data, False)
+        assert validator.errors[0] == "A_S1_L001_R1_001.fastq:3: Line does not begin with '+'."
+        assert validator.errors[1].endswith(
+            ": File ends in the middle of a record, after line 1 of 4."
+        )
+
+    def test_sampled_groups_are_not_compared(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(fastq_validator_logic, "SAMPLE_BLOCK_BYTES", 2000)
+        tmp_path.joinpath("A_S1_L001_R1_001.fastq").write_text(_GOOD_RECORDS * 400)
+        tmp_path.joinpath("A_S1_L001_R2_001.fastq").write_text(_GOOD_RECORDS * 500)
+        validator = FASTQValidatorLogic(sample_blocks=2)
+        validator.validate_fastq_files_in_path([tmp_path], 2)
+        assert validator.errors == []
+        assert sorted(validator.sampled) == sorted(str(path) for path in tmp_path.iterdir())
+
+    def test_sampled_run_reports_coverage(self, monkeypatch, tmp_path, capsys):
+        from fastq_validator import FASTQValidator
+
+        monkeypatch.setattr(fastq_validator_logic, "SAMPLE_BLOCK_BYTES", 2000)
+        path = tmp_path / "A_S1_L001_R1_001.fastq"
+        path.write_text(_GOOD_RECORDS * 400)
+        validator = FASTQValidator(
+            tmp_path, "snRNAseq", coreuse=2, verbose=True, fastq_sample_blocks=2
+        )
+        # errors only: coverage is in sampled, and logged
+        assert validator.collect_errors() == [None]
+        coverage = validator.sampled[str(path)]
+        assert coverage.windows == 4 and coverage.total_bytes == path.stat().st_size
+        assert (
+            f"{path} was only sampled: 4 windows, {coverage.sampled_bytes} "
+            f"of {coverage.total_bytes} bytes validated"
+        ) in capsys.readouterr().out
+        validator = FASTQValidator(tmp_path, "snRNAseq", coreuse=2)
+        assert validator.collect_errors() == [None]
+        assert not validator.sampled
+
+    def test_record_start(self):
+        data = (_GOOD_RECORDS.replace("#", "@") * 2).encode()
+        second_record = len(data) // 2
+        # the quality line starting with '@' is skipped
+        assert fastq_validator_logic._record_start(data, 1, True) == second_record
+        assert fastq_validator_logic._record_start(data, second_record, True) == second_record
+        assert fastq_validator_logic._record_start(data, len(data), True) == len(data)
+        assert fastq_validator_logic._record_start(data[: second_record + 5], 1, False) is None
+
     def test_fastq_validator_record_counts_good(self, fastq_validator, tmp_path):
         for filename in [
             "SREQ-1_1-ACTGACTGAC-TGACTGACTG_S1_L001_I1_001.fastq",
@@ -0,0 +1,123 @@
+import zipfile
+
+import numpy as np
+import pytest
+import tifffile
+from archive_path import ArchivePath
+from file_system import CachedRangeFile, FileSystem, LocalFileSystem, MemoryFileSystem
+from segmentation_mask_imagesize_validation import get_ometiff_size
+from validator import check_ome_tiff_file
+
+_DATA = bytes(range(256)) * 1024
+
+
+@pytest.fixture(params=["local", "memory"])
+def fs_and_path(request, tmp_path):
+    if request.param == "local":
+        path = tmp_path / "data.bin"
+        path.write_bytes(_DATA)
+        return LocalFileSystem(), path
+    return MemoryFileSystem({"data.bin": _DATA}), "data.bin"
+
+
+@pytest.fixture(params=["local", "memory"])
+def ome_tiff_fs_and_path(request, tmp_path):
+    path = tmp_path / "large.ome.tif"
+    tifffile.imwrite(
+        path,
+        np.zeros((4, 1024, 1024), dtype=np.uint16),
+        ome=True,
+        metadata={"axes": "ZYX", "PhysicalSizeX": 0.5, "PhysicalSizeY": 0.5},
+    )
+    if request.param == "local":
+        return LocalFileSystem(), path
+    return MemoryFileSystem({str(path): path.read_bytes()}), path
+
+
+def test_cat_ranges_coalesces(fs_and_path):
+    fs, path = fs_and_path
+    ranges = [(0, 10), (100, 200), (150, 300), (200_000, 200_010)]
+    results = fs.cat_ranges(
+        [path] * len(ranges), [start for start, _ in ranges], [end for _, end in ranges]
+    )
+    assert results == [_DATA[start:end] for start, end in ranges]
+    # the first three are within max_gap of each other
+    assert fs.requests == 2
+
+
+def test_cached_range_file_matches_data(fs_and_path):
+    fs, path = fs_and_path
+    with CachedRangeFile(fs, path, block_size=4096, readahead_blocks=2) as f:
+        assert f.read(10) == _DATA[:10]
+        f.seek(5000)
+        assert f.read(5000) == _DATA[5000:10000]
+        f.seek(-100, 2)
+        assert f.read() == _DATA[-100:]
+        f.seek(0)
+        assert f.read() == _DATA
+
+
+def test_cached_range_file_readahead(fs_and_path):
+    fs, path = fs_and_path
+    with CachedRangeFile(fs, path, block_size=4096, readahead_blocks=3) as f:
+        for offset in range(0, 4 * 4096, 512):
+            f.seek(offset)
+            f.read(16)
+    # one miss fetches the block plus three blocks of read-ahead
+    assert fs.requests == 1
+    assert fs.bytes_read == 4 * 4096
+
+
+def test_cached_range_file_prefetch(fs_and_path):
+    fs, path = fs_and_path
+    with CachedRangeFile(fs, path, block_size=4096) as f:
+        f.prefetch([(0, 100), (8192, 8200), (200_000, 200_100)])
+        assert fs.requests == 3
+        f.seek(8192)
+        assert f.read(8) == _DATA[8192:8200]
+        assert fs.requests == 3
+
+
+def test_file_system_is_abstract():
+    with pytest.raises(TypeError):
+        FileSystem()
+
+
+def test_cached_range_file_opens_archive_member_once(monkeypatch, tmp_path):
+    archive = tmp_path / "data.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("data.bin", _DATA)
+    member = ArchivePath(archive, "data.bin")
+    opened = []
+    open_member = ArchivePath.open
+
+    def counting_open(self, *args, **kwargs):
+        opened.append(self)
+        return open_member(self, *args, **kwargs)
+
+    monkeypatch.setattr(ArchivePath, "open", counting_open)
+    fs = LocalFileSystem()
+    with CachedRangeFile(fs, member, block_size=4096, readahead_blocks=0) as f:
+        for offset in range(0, len(_DATA), 20_000):
+            f.seek(offset)
+            assert f.read(16) == _DATA[offset : offset + 16]
+    assert fs.requests > 1
+    assert len(opened) == 1
+    assert f._handle is None
+
+
+def test_ome_tiff_header_only_reads(ome_tiff_fs_and_path):
+    fs, path = ome_tiff_fs_and_path
+    file_size = fs.size(path)
+    xml_document = check_ome_tiff_file(path, fs=fs)
+    assert xml_document.schema
+    assert fs.bytes_read < file_size / 20
+    size = get_ometiff_size(path, fs=fs)
+    assert isinstance(size, dict)
+    assert size["XPix"] == 1024 and size["ZPix"] == 4
+
+
+def test_ome_tiff_header_only_bad_file():
+    fs = MemoryFileSystem({"bad.ome.tif": b"not a tiff at all" * 100})
+    with pytest.raises(Exception, match="bad.ome.tif is not a valid OME.TIFF file"):
+        check_ome_tiff_file("bad.ome.tif", fs=fs)
@@ -30,3 +30,22 @@ def test_gz_validator(test_data_fname, msg_re_list, assay_type, tmp_path):
         assert (err_str is None and re_str is None) or (
             re.match(re_str, err_str, flags=re.MULTILINE)
         )
+
+
+@pytest.mark.parametrize(
+    "suffix, kind", [(".bz2", "bzip2-compressed"), (".zst", "zstd-compressed")]
+)
+def test_gz_validator_checks_other_formats(tmp_path, suffix, kind):
+    from gz_validator import GZValidator
+
+    from tests.synthetic_upload import write_fastq
+
+    write_fastq(tmp_path / f"good.txt{suffix}", 10_000)
+    bad = tmp_path / f"bad.txt{suffix}"
+    write_fastq(bad, 10_000)
+    bad.write_bytes(bad.read_bytes()[:-1000])
+    # left to the FASTQ plugin
+    write_fastq(tmp_path / f"sample_S1_L001_R1_001.fastq{suffix}", 10)
+    (tmp_path / f"sample_S1_L001_R2_001.fastq{suffix}").write_bytes(b"damaged")
+    validator = GZValidator(tmp_path, "snRNAseq", coreuse=2)
+    assert validator.collect_errors() == [f"{bad} is not a valid {kind} file"]
@@ -0,0 +1,90 @@
+import gzip
+import io
+import os
+
+import gzip_backend
+import pytest
+from gzip_backend import bgzf_block_size, open_inflating
+
+from tests.synthetic_upload import BGZF_EOF, bgzf_compress, write_fastq
+
+_DATA = os.urandom(100_000) + b"A" * 300_000
+
+_INPUTS = {
+    "member": gzip.compress(_DATA),
+    "members": gzip.compress(_DATA[:1000]) + gzip.compress(_DATA[1000:]),
+    "padded": gzip.compress(_DATA) + b"\0\0\0",
+    "bgzf": bgzf_compress(_DATA) + BGZF_EOF,
+    "bgzf then member": bgzf_compress(_DATA[:200_000]) + gzip.compress(_DATA[200_000:]),
+}
+
+
+def _read(data: bytes, backend: str, **kwargs) -> bytes:
+    with open_inflating(io.BufferedReader(io.BytesIO(data)), backend, **kwargs) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", gzip_backend.GZIP_BACKENDS)
+@pytest.mark.parametrize("name", _INPUTS)
+def test_backends_decompress_alike(monkeypatch, backend, name):
+    # small chunks exercise block and member boundaries
+    monkeypatch.setattr(gzip_backend, "INFLATE_CHUNK_BYTES", 1000)
+    assert _read(_INPUTS[name], backend, threads=3) == _DATA
+
+
+@pytest.mark.parametrize("backend", ["threaded", "bgzf"])
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        (_INPUTS["member"][:-5], EOFError),
+        (_INPUTS["bgzf"][:-100], EOFError),
+        (_INPUTS["member"] + b"garbage", gzip.BadGzipFile),
+        (b"\0\0", gzip.BadGzipFile),
+    ],
+)
+def test_errors_match_gzip_module(backend, data, error):
+    with pytest.raises(error):
+        gzip.decompress(data)
+    with pytest.raises(error):
+        _read(data, backend)
+
+
+def test_empty_file():
+    assert _read(b"", "threaded") == b""
+
+
+def test_bgzf_blocks_are_inflated_together(monkeypatch):
+    batches = []
+    inflate_blocks = gzip_backend._inflate_blocks
+
+    def counting(library, blocks):
+        batches.append(len(blocks))
+        return inflate_blocks(library, blocks)
+
+    monkeypatch.setattr(gzip_backend, "_inflate_blocks", counting)
+    assert _read(_INPUTS["bgzf"], "bgzf", threads=2) == _DATA
+    assert sum(batches) == len(_DATA) // 65280 + 2
+    assert bgzf_block_size(_INPUTS["bgzf"]) is not None
+    assert bgzf_block_size(_INPUTS["member"]) is None
+
+
+def test_close_before_end_stops_thread():
+    f = open_inflating(io.BufferedReader(io.BytesIO(_INPUTS["member"])), "threaded")
+    assert f.read(10) == _DATA[:10]
+    f.close()
+    assert f.raw._thread.is_alive() is False
+
+
+@pytest.mark.parametrize("backend", ["threaded", "bgzf"])
+def test_fastq_errors_match_stdlib_backend(tmp_path, backend):
+    from fastq_validator_logic import FASTQValidatorLogic
+
+    path = tmp_path / "sample_S1_L001_R1_001.fastq.gz"
+    write_fastq(path, 5000, bgzf=backend == "bgzf")
+    path.write_bytes(path.read_bytes()[:-20_000])
+    errors = []
+    for gzip_backend_name in ["stdlib", backend]:
+        validator = FASTQValidatorLogic(gzip_backend=gzip_backend_name)
+        validator.validate_fastq_file(path)
+        errors.append(validator.errors)
+    assert errors[0] and errors[0] == errors[1]
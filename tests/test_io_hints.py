@@ -0,0 +1,92 @@
+import gzip
+import os
+
+import io_hints
+import pytest
+from io_hints import SequentialFile, open_sequential, read_hints
+
+
+class _AdviceLog:
+    """
+    Records posix_fadvise calls in a file, so calls made in forked pool
+    workers are seen too.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self) -> list[tuple[int, int, int]]:
+        if not self.path.exists():
+            return []
+        return [tuple(map(int, line.split())) for line in self.path.read_text().splitlines()]
+
+
+@pytest.fixture
+def advice(monkeypatch, tmp_path) -> _AdviceLog:
+    log = _AdviceLog(tmp_path / "fadvise.log")
+    real_fadvise = os.posix_fadvise
+
+    def fadvise(fd, offset, length, advice):
+        with open(log.path, "a") as f:
+            f.write(f"{offset} {length} {advice}\n")
+        real_fadvise(fd, offset, length, advice)
+
+    monkeypatch.setattr(os, "posix_fadvise", fadvise)
+    return log
+
+
+def test_sequential_pass_drops_consumed_runs(advice, tmp_path):
+    path = tmp_path / "data.bin"
+    data = os.urandom(1000)
+    path.write_bytes(data)
+    with open_sequential(path) as f:
+        assert isinstance(f.raw, SequentialFile)
+        f.raw.drop_behind = 300
+        read = b""
+        while chunk := f.raw.read(100):
+            read += chunk
+    assert read == data
+    assert advice()[0] == (0, 0, os.POSIX_FADV_SEQUENTIAL)
+    assert advice()[1:] == [
+        (0, 300, os.POSIX_FADV_DONTNEED),
+        (300, 300, os.POSIX_FADV_DONTNEED),
+        (600, 300, os.POSIX_FADV_DONTNEED),
+        (900, 100, os.POSIX_FADV_DONTNEED),
+    ]
+
+
+def test_seek_starts_new_run(advice, tmp_path):
+    path = tmp_path / "data.bin"
+    data = os.urandom(1000)
+    path.write_bytes(data)
+    with SequentialFile(path) as f:
+        assert f.read(100) == data[:100]
+        f.seek(800)
+        assert f.read(50) == data[800:850]
+        f.seek(0, os.SEEK_CUR)
+    assert advice()[1:] == [
+        (0, 100, os.POSIX_FADV_DONTNEED),
+        (800, 50, os.POSIX_FADV_DONTNEED),
+    ]
+
+
+def test_hints_switchable_per_run(advice, tmp_path):
+    from gz_validator import GZValidator
+
+    (tmp_path / "upload").mkdir()
+    (tmp_path / "upload" / "a.txt.gz").write_bytes(gzip.compress(b"data" * 1000))
+    with read_hints(False):
+        with open_sequential(tmp_path / "upload" / "a.txt.gz") as f:
+            assert not isinstance(f.raw, SequentialFile)
+    assert io_hints.hints_enabled()
+    GZValidator(tmp_path / "upload", "snRNAseq", coreuse=1, io_hints=False).collect_errors()
+    assert not advice()
+    GZValidator(tmp_path / "upload", "snRNAseq", coreuse=1).collect_errors()
+    assert advice()
+
+
+def test_text_mode(tmp_path):
+    path = tmp_path / "reads.fastq"
+    path.write_text("@id\nACGT\n+\n!!!!\n")
+    with open_sequential(path, "rt") as f:
+        assert f.readlines() == ["@id\n", "ACGT\n", "+\n", "!!!!\n"]
@@ -0,0 +1,159 @@
+"""
+Streaming checks (FASTQ, gzip, per-page TIFF decoding) run on a generated input
+and on one SCALE times larger, and their peak memory must stay flat: tracemalloc
+for the check itself, Validator.peak_worker_rss_mb for a whole plugin run.
+Memory that legitimately grows with the input is not covered: error lists of
+files with many errors, and Vitessce configs, which are loaded whole.
+"""
+
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from tests.synthetic_upload import fastq_groups, tiffs, write_fastq
+
+SCALE = 4
+"""int: how much larger the large input is than the small one
+"""
+
+
+def _traced_peak_mb(func, *args) -> float:
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _fastq(directory: Path, scale: int, suffix: str, bgzf: bool = False) -> Path:
+    path = directory / f"sample_S1_L001_R1_001.fastq{suffix}"
+    write_fastq(path, 5000 * scale, bgzf=bgzf)
+    return path
+
+
+def _gz(directory: Path, scale: int) -> Path:
+    # not *.fastq.gz, which the gzip plugin leaves to the FASTQ plugin
+    path = directory / "data.txt.gz"
+    write_fastq(path, 20000 * scale)
+    return path
+
+
+def _fastq_check(path: Path, gzip_backend: str = "stdlib", qc: bool = False):
+    from fastq_validator_logic import FASTQValidatorLogic
+
+    validator = FASTQValidatorLogic(gzip_backend=gzip_backend, qc_dir=path.parent if qc else None)
+    validator.validate_fastq_file(path)
+    assert not validator.errors
+
+
+def _pairs_check(files: list[Path]):
+    from fastq_validator_logic import check_read_pairs
+
+    assert check_read_pairs(files) == []
+
+
+def _gz_check(path: Path):
+    from gz_validator import Engine
+
+    assert Engine()(path) is None
+
+
+def _tiff_check(path: Path):
+    from tiff_validator import _check_tiff_file
+
+    assert _check_tiff_file(path) is None
+
+
+# (make input at a scale, check, ceiling in MB)
+STREAMING_CHECKS = {
+    # the vectorized engine holds a chunk and a few per-byte arrays of it
+    "fastq": (lambda d, scale: _fastq(d, scale, ""), _fastq_check, 8),
+    "fastq.gz": (lambda d, scale: _fastq(d, scale, ".gz"), _fastq_check, 8),
+    # plus the QC counters' index arrays for a chunk
+    "fastq qc": (lambda d, scale: _fastq(d, scale, ""), partial(_fastq_check, qc=True), 16),
+    # inputs large enough to fill the queue of inflated chunks between threads
+    "fastq.gz threaded": (
+        lambda d, scale: _fastq(d, 4 * scale, ".gz"),
+        partial(_fastq_check, gzip_backend="threaded"),
+        16,
+    ),
+    # plus up to INFLATE_THREADS + 1 batches of blocks in flight
+    "fastq.gz bgzf": (
+        lambda d, scale: _fastq(d, 4 * scale, ".gz", bgzf=True),
+        partial(_fastq_check, gzip_backend="bgzf"),
+        48,
+    ),
+    # plus the bzip2 decompressor's own state, a few MB for 900k blocks
+    "fastq.bz2": (lambda d, scale: _fastq(d, scale, ".bz2"), _fastq_check, 16),
+    # plus zstandard's window and buffers; in parallel, up to ZSTD_THREADS + 1 batches
+    # of frames in flight
+    "fastq.zst": (lambda d, scale: _fastq(d, scale, ".zst"), _fastq_check, 16),
+    "fastq.zst parallel": (
+        lambda d, scale: _fastq(d, 8 * scale, ".zst"),
+        partial(_fastq_check, gzip_backend="bgzf"),
+        32,
+    ),
+    # one buffered line at a time from each file of the group
+    "fastq pairs": (lambda d, scale: fastq_groups(d, 1, 5000 * scale), _pairs_check, 4),
+    "gz": (_gz, _gz_check, 8),
+    # pages are decoded one at a time: memory follows page size, not page count
+    "tiff pages": (
+        lambda d, scale: tiffs(d, 1, shape=(2 * scale, 1024, 1024), compression="zlib")[0],
+        _tiff_check,
+        16,
+    ),
+}
+
+
+@pytest.mark.parametrize("name", STREAMING_CHECKS)
+def test_streaming_check_memory_is_independent_of_input_size(tmp_path, name, capsys):
+    make_input, check, ceiling_mb = STREAMING_CHECKS[name]
+    peaks = []
+    for scale in [1, SCALE]:
+        directory = tmp_path / str(scale)
+        directory.mkdir()
+        peaks.append(_traced_peak_mb(check, make_input(directory, scale)))
+    small, large = peaks
+    assert large < ceiling_mb, peaks
+    assert large < small * 1.25 + 1, peaks
+
+
+@pytest.mark.parametrize(
+    "plugin, assay_type, make_input",
+    [
+        (
+            "tiff_validator.TiffValidator",
+            "codex",
+            lambda d, scale: tiffs(d, 1, shape=(2 * scale, 2048, 2048), compression="zlib"),
+        ),
+        (
+            "fastq_validator.FASTQValidator",
+            "snRNAseq",
+            lambda d, scale: fastq_groups(d, 1, 20000 * scale),
+        ),
+        (
+            "gz_validator.GZValidator",
+            "snRNAseq",
+            _gz,
+        ),
+    ],
+)
+def test_plugin_worker_memory_is_independent_of_input_size(
+    tmp_path, plugin, assay_type, make_input, capsys
+):
+    module, name = plugin.split(".")
+    plugin_class = getattr(__import__(module), name)
+    peaks = []
+    for scale in [1, SCALE]:
+        directory = tmp_path / str(scale)
+        directory.mkdir()
+        make_input(directory, scale)
+        validator = plugin_class([directory], assay_type, coreuse=1, verbose=False)
+        assert validator.collect_errors() == [None]
+        peaks.append(validator.peak_worker_rss_mb)
+    small, large = peaks
+    # workers share the test process's pages, so compare rather than bound
+    assert 0 < small and large < small + 16, peaks
@@ -0,0 +1,95 @@
+import re
+import zipfile
+from pathlib import Path
+
+import pytest
+from products import OME_XML, ProductStore
+from validator import Validator, order_by_dependencies, validation_class_iter
+
+
+@pytest.fixture
+def ometiff_tree(tmp_path) -> Path:
+    test_data_path = Path("test_data/codex_tree_ometiff_bad.zip")
+    zipfile.ZipFile(test_data_path).extractall(tmp_path)
+    return tmp_path / test_data_path.stem
+
+
+def _plugin(name: str, produces: list[str] = [], consumes: list[str] = []) -> type:
+    return type(name, (Validator,), {"produces": produces, "consumes": consumes})
+
+
+def test_order_by_dependencies():
+    consumer = _plugin("Consumer", consumes=["a"])
+    independent = _plugin("Independent")
+    producer = _plugin("Producer", produces=["a"], consumes=["b"])
+    upstream = _plugin("Upstream", produces=["b"])
+    assert order_by_dependencies([consumer, independent, producer, upstream]) == [
+        upstream,
+        producer,
+        consumer,
+        independent,
+    ]
+    with pytest.raises(Exception, match="cycle"):
+        order_by_dependencies(
+            [
+                _plugin("X", produces=["x"], consumes=["y"]),
+                _plugin("Y", produces=["y"], consumes=["x"]),
+            ]
+        )
+
+
+def test_plugin_order_respects_products():
+    names = [cls.__name__ for cls in validation_class_iter()]
+    assert names.index("OmeTiffValidator") < names.index("OmeTiffFieldValidator")
+
+
+def test_store_roundtrip(ometiff_tree):
+    with ProductStore.temporary() as products:
+        file = ometiff_tree / "sample1.ome.tif"
+        assert products.get(OME_XML, file) is None
+        products.put(OME_XML, file, "value")
+        assert ProductStore(products.directory).get(OME_XML, file) == "value"
+        file.write_bytes(file.read_bytes() + b"\0")
+        # a changed file does not see stale products
+        assert ProductStore(products.directory).get(OME_XML, file) is None
+
+
+def test_downstream_plugins_reuse_ome_xml(ometiff_tree, monkeypatch):
+    import validator
+    from ome_tiff_field_validator import OmeTiffFieldValidator
+    from ome_tiff_validator import OmeTiffValidator
+    from segmentation_mask_imagesize_validation import get_ometiff_size
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("file re-read")
+
+    with ProductStore.temporary() as products:
+        errors = OmeTiffValidator(
+            ometiff_tree, "CODEX", coreuse=2, products=products
+        ).collect_errors()
+        assert len(errors) == 1 and "tubhiswt_C0_bad" in errors[0]
+        monkeypatch.setattr(validator, "open_tiff", no_reads)
+        errors = OmeTiffFieldValidator(
+            ometiff_tree, "CODEX", coreuse=2, products=products
+        ).collect_errors()
+        # the file OmeTiffValidator rejected is not reported again
+        assert len(errors) == 2
+        for error in errors:
+            assert re.match(".*sample[12].ome.tif is not a valid OME.TIFF file per schema", error)
+        assert get_ometiff_size(ometiff_tree / "sample1.ome.tif", products=products)["XPix"]
+
+
+def test_plugins_share_default_store(ometiff_tree, monkeypatch):
+    import validator
+    from ome_tiff_field_validator import OmeTiffFieldValidator
+    from ome_tiff_validator import OmeTiffValidator
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("file re-read")
+
+    producer = OmeTiffValidator(ometiff_tree, "CODEX", coreuse=2)
+    assert producer.products is ProductStore.default()
+    assert len(producer.collect_errors()) == 1
+    monkeypatch.setattr(validator, "open_tiff", no_reads)
+    errors = OmeTiffFieldValidator(ometiff_tree, "CODEX", coreuse=2).collect_errors()
+    assert len(errors) == 2
@@ -0,0 +1,140 @@
+import gzip
+import os
+from pathlib import Path
+
+import pytest
+from progress import Progress
+from task_pool import TaskPool, report_progress
+
+_GOOD_RECORDS = """\
+@A12345:123:A12BCDEFG:1:1234:1000:1234 1:N:0:NACTGACTGA+CTGACTGACT
+NACTGACTGA
++
+#FFFFFFFFF
+"""
+
+
+def _report_thrice(x):
+    for _ in range(3):
+        report_progress(10)
+    return x
+
+
+@pytest.fixture
+def files(tmp_path) -> list[Path]:
+    paths = []
+    for name, size in [("a", 100), ("b", 300)]:
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        paths.append(path)
+    return paths
+
+
+def test_progress_counts_and_eta(files):
+    seen = []
+    progress = Progress("Plugin", files, lambda p: seen.append(p.as_dict()), min_interval=0)
+    assert (progress.files_total, progress.bytes_total) == (2, 400)
+    assert progress.eta is None
+    progress.advance(files[1], 100)
+    assert progress.bytes_done == 100 and progress.eta > 0
+    # intra-file reports never count past the file's size
+    progress.advance(files[1], 1000)
+    assert progress.bytes_done == 300
+    progress.file_done(files[1])
+    assert (progress.files_done, progress.bytes_done) == (1, 300)
+    progress.file_done(files[0])
+    assert progress.eta == 0.0
+    assert seen[0]["files_done"] == 0
+    assert seen[-1] == {
+        "plugin": "Plugin",
+        "files_done": 2,
+        "files_total": 2,
+        "bytes_done": 400,
+        "bytes_total": 400,
+        "bytes_per_second": seen[-1]["bytes_per_second"],
+        "eta_seconds": 0.0,
+    }
+
+
+def test_callback_is_rate_limited(files):
+    seen = []
+    progress = Progress("Plugin", files, seen.append, min_interval=3600)
+    for _ in range(5):
+        progress.advance(files[1], 1)
+    progress.file_done(files[0])
+    assert len(seen) == 1
+    progress.file_done(files[1])
+    assert len(seen) == 2
+
+
+def test_task_pool_relays_worker_progress():
+    progress_by_item: dict[int, int] = {}
+    done = []
+
+    def on_progress(item, nbytes):
+        progress_by_item[item] = progress_by_item.get(item, 0) + nbytes
+
+    with TaskPool(2) as pool:
+        results = list(
+            pool.imap_unordered(
+                _report_thrice, range(4), on_progress=on_progress, on_done=done.append
+            )
+        )
+    assert sorted(results) == sorted(done) == [0, 1, 2, 3]
+    assert progress_by_item == {item: 30 for item in range(4)}
+
+
+def test_report_progress_outside_worker_is_noop():
+    report_progress(10)
+
+
+def test_gz_engine_reports_compressed_bytes(tmp_path):
+    from gz_validator import Engine
+
+    path = tmp_path / "random.gz"
+    path.write_bytes(gzip.compress(os.urandom(3 * 2**20)))
+    reports = []
+    with TaskPool(1) as pool:
+        list(pool.imap_unordered(Engine(), [path], on_progress=lambda _, n: reports.append(n)))
+    assert len(reports) > 1
+    assert sum(reports) == path.stat().st_size
+
+
+def test_fastq_stream_reports_progress(monkeypatch, tmp_path):
+    import fastq_validator_logic
+    from fastq_validator import FASTQValidator
+
+    monkeypatch.setattr(fastq_validator_logic, "PROGRESS_INTERVAL_LINES", 40)
+    monkeypatch.setattr(fastq_validator_logic, "VECTOR_CHUNK_BYTES", 1024)
+    for read in ["R1", "R2"]:
+        (tmp_path / f"20147_Healthy_PA_S1_L001_{read}_001.fastq").write_text(_GOOD_RECORDS * 100)
+    seen = []
+    advanced = []
+    monkeypatch.setattr(Progress, "advance", lambda self, file, nbytes: advanced.append(nbytes))
+    validator = FASTQValidator(
+        tmp_path, "snRNAseq", coreuse=2, progress_callback=lambda p: seen.append(p.as_dict())
+    )
+    assert validator.collect_errors() == [None]
+    assert advanced
+    assert seen[-1]["files_done"] == seen[-1]["files_total"] == 2
+    assert seen[-1]["bytes_done"] == seen[-1]["bytes_total"] > 0
+
+
+def test_validator_progress(tmp_path):
+    from gz_validator import GZValidator
+
+    for name in ["one.txt.gz", "two.txt.gz"]:
+        (tmp_path / name).write_bytes(gzip.compress(b"data" * 1000))
+    seen = []
+    validator = GZValidator(
+        tmp_path, "snRNAseq", coreuse=2, progress_callback=lambda p: seen.append(p.as_dict())
+    )
+    validator.collect_errors()
+    assert validator.progress.plugin == "GZValidator"
+    assert seen[0]["files_done"] == 0
+    assert seen[-1]["files_done"] == 2
+    assert (
+        seen[-1]["bytes_done"]
+        == seen[-1]["bytes_total"]
+        == sum(path.stat().st_size for path in tmp_path.glob("*.gz"))
+    )
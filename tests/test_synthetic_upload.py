@@ -0,0 +1,57 @@
+import pytest
+
+from tests.synthetic_upload import FAULTS, inject_faults, make_upload
+
+_UPLOAD = {
+    "fastq_groups_count": 4,
+    "fastq_records": 500,
+    "tiff_count": 3,
+    "tiff_shape": (2, 256, 256),
+    "pyramid_levels": 1,
+    "codex_cycles": 2,
+    "vignette_count": 1,
+}
+
+
+def _errors(upload) -> str:
+    from codex_common_errors_validator import CodexCommonErrorsValidator
+    from fastq_validator import FASTQValidator
+    from publication_vignettes_validator import PublicationVignettesValidator
+    from tiff_validator import TiffValidator
+
+    errors = []
+    for plugin, assay_type in [
+        (FASTQValidator, "snRNAseq"),
+        (TiffValidator, "codex"),
+        (CodexCommonErrorsValidator, "CODEX"),
+        (PublicationVignettesValidator, "publication"),
+    ]:
+        errors += [
+            str(error)
+            for error in plugin([upload], assay_type, coreuse=2, verbose=False).collect_errors()
+            if error
+        ]
+    return "\n".join(errors)
+
+
+def test_clean_upload_passes(tmp_path):
+    assert make_upload(tmp_path, **_UPLOAD) == []
+    assert _errors(tmp_path) == ""
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_every_injected_fault_is_reported(tmp_path, seed):
+    faults = make_upload(
+        tmp_path, **_UPLOAD, faults={kind: 1 for kind in FAULTS} | {"truncate": 2}, seed=seed
+    )
+    assert len(faults) == 5 and len({fault.path for fault in faults}) == 5
+    errors = _errors(tmp_path)
+    for fault in faults:
+        assert fault.path.name in errors, fault
+
+
+def test_too_many_faults(tmp_path):
+    files = make_upload(tmp_path / "upload", fastq_groups_count=1, fastq_records=10)
+    assert files == []
+    with pytest.raises(ValueError, match="count_mismatch"):
+        inject_faults(list((tmp_path / "upload").glob("**/*")), {"count_mismatch": 2})
@@ -0,0 +1,243 @@
+import os
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+from task_pool import TaskFailure, TaskPool
+
+
+def _square(x):
+    return x * x
+
+
+def _pid(_):
+    return os.getpid()
+
+
+def _sometimes_hangs(x):
+    if x == 3:
+        time.sleep(60)
+    return x
+
+
+def _sometimes_crashes(x):
+    if x == 2:
+        os._exit(13)
+    return x
+
+
+def _sometimes_raises(x):
+    if x == 1:
+        raise ValueError("bad input")
+    return x
+
+
+def _allocate(mb):
+    return len(bytearray(mb * 2**20))
+
+
+def _hang_on_notatiff(path):
+    if "notatiff" in str(path):
+        time.sleep(60)
+
+
+def _sleep_then_return(x):
+    time.sleep(0.05)
+    return x
+
+
+def _sleep_seconds(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+_LOCK_PATH = "/tmp/test_task_pool_serial.lock"
+
+
+def _serial_sleep(x):
+    import fcntl
+
+    with open(_LOCK_PATH, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        time.sleep(0.02)
+    return x
+
+
+def _timed(item):
+    start = time.monotonic()
+    time.sleep(0.2)
+    return item[0], start, time.monotonic()
+
+
+def _max_overlap(intervals: list[tuple[float, float]]) -> int:
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    running = peak = 0
+    for _, change in events:
+        running += change
+        peak = max(peak, running)
+    return peak
+
+
+def test_results():
+    with TaskPool(3) as pool:
+        assert sorted(pool.imap_unordered(_square, range(10))) == [x * x for x in range(10)]
+
+
+def test_timeout_is_reported_and_run_continues():
+    start = time.monotonic()
+    with TaskPool(2, task_timeout=1) as pool:
+        results = list(pool.imap_unordered(_sometimes_hangs, range(6)))
+    assert time.monotonic() - start < 30
+    failures = [rslt for rslt in results if isinstance(rslt, TaskFailure)]
+    assert failures == [TaskFailure(3, "timed out after 1s")]
+    assert sorted(rslt for rslt in results if not isinstance(rslt, TaskFailure)) == [0, 1, 2, 4, 5]
+
+
+def test_crash_is_reported_and_run_continues():
+    with TaskPool(2) as pool:
+        results = list(pool.imap_unordered(_sometimes_crashes, range(5)))
+    failures = [rslt for rslt in results if isinstance(rslt, TaskFailure)]
+    assert failures == [TaskFailure(2, "worker exited unexpectedly (exit code 13)")]
+    assert len(results) == 5
+
+
+def test_exception_is_reported():
+    with TaskPool(2) as pool:
+        results = list(pool.imap_unordered(_sometimes_raises, range(3)))
+    assert TaskFailure(1, "ValueError: bad input") in results
+
+
+def test_memory_limit():
+    with TaskPool(1, memory_limit_mb=1024) as pool:
+        results = list(pool.imap_unordered(_allocate, [1, 4096]))
+    assert 2**20 in results
+    assert TaskFailure(4096, "exceeded worker memory limit of 1024 MB") in results
+
+
+def test_max_tasks_per_child_recycles_workers():
+    with TaskPool(1, max_tasks_per_child=2) as pool:
+        pids = list(pool.imap_unordered(_pid, range(6)))
+        assert pool.workers_started == 3
+    assert len(set(pids)) == 3
+
+
+def test_max_worker_rss_recycles_workers():
+    with TaskPool(1, max_worker_rss_mb=1) as pool:
+        pids = list(pool.imap_unordered(_pid, range(3)))
+    assert len(set(pids)) == 3
+
+
+def test_peak_worker_rss_includes_freed_memory():
+    with TaskPool(1) as pool:
+        list(pool.imap_unordered(_allocate, [1]))
+        baseline = pool.peak_worker_rss_mb
+    with TaskPool(1) as pool:
+        list(pool.imap_unordered(_allocate, [256]))
+        assert pool.peak_worker_rss_mb > baseline + 200
+
+
+def test_plugin_reports_hung_file(monkeypatch, tmp_path):
+    import tiff_validator
+
+    monkeypatch.setattr(tiff_validator, "_check_tiff_file", _hang_on_notatiff)
+    test_data_path = Path("test_data/tiff_tree_bad.zip")
+    zipfile.ZipFile(test_data_path).extractall(tmp_path)
+    validator = tiff_validator.TiffValidator(
+        tmp_path / test_data_path.stem, "codex", coreuse=4, task_timeout=1
+    )
+    errors = validator.collect_errors()
+    assert len(errors) == 4
+    for error in errors:
+        assert "notatiff" in error and error.endswith("could not be validated: timed out after 1s")
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_fewer_items_than_workers(threads):
+    with TaskPool(threads) as pool:
+        assert list(pool.imap_unordered(_square, [3])) == [9]
+        assert pool.workers_started == 1
+
+
+def test_adaptive_pool_backs_off_when_throughput_does_not_drop(monkeypatch):
+    import task_pool
+
+    monkeypatch.setattr(task_pool, "ADAPT_INTERVAL", 0.2)
+    # a shared lock makes the work effectively serial, like a saturated disk
+    with TaskPool(4, adaptive=True) as pool:
+        results = list(pool.imap_unordered(_serial_sleep, range(40)))
+        assert pool.active_limit < 4
+    assert sorted(results) == list(range(40))
+
+
+def test_adaptive_pool_keeps_workers_that_add_throughput(monkeypatch):
+    import task_pool
+
+    monkeypatch.setattr(task_pool, "ADAPT_INTERVAL", 0.2)
+    with TaskPool(4, adaptive=True) as pool:
+        results = list(pool.imap_unordered(_sleep_then_return, range(80)))
+        assert pool.active_limit == 4
+    assert sorted(results) == list(range(80))
+
+
+def _busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+    return seconds
+
+
+@pytest.mark.parametrize(
+    "work",
+    [
+        # independent waits stand in for CPU-bound items on separate cores
+        _sleep_seconds,
+        pytest.param(
+            _busy,
+            marks=pytest.mark.skipif(
+                __import__("worker_sizing").available_cpus() < 4, reason="needs 4 CPUs"
+            ),
+        ),
+    ],
+)
+def test_adaptive_pool_is_not_slower_than_fixed_width(work):
+    seconds = []
+    for adaptive in [False, True]:
+        start = time.monotonic()
+        with TaskPool(4, adaptive=adaptive) as pool:
+            assert sorted(pool.imap_unordered(work, [1.5] * 4)) == [1.5] * 4
+        seconds.append(time.monotonic() - start)
+    fixed, adaptive = seconds
+    assert adaptive < fixed * 1.25, seconds
+
+
+def test_device_limits_cap_readers_per_device():
+    items = [(1, i) for i in range(4)] + [(2, i) for i in range(4)]
+    with TaskPool(4, device_limits={1: 1}) as pool:
+        results = list(pool.imap_unordered(_timed, items, item_device=lambda item: item[0]))
+    intervals = {
+        device: [(start, end) for dev, start, end in results if dev == device] for device in [1, 2]
+    }
+    assert _max_overlap(intervals[1]) == 1
+    assert _max_overlap(intervals[2]) > 1
+
+
+def test_max_readers_per_device_and_mount_keys(tmp_path):
+    pool = TaskPool(4, device_limits={str(tmp_path): 3}, max_readers_per_device=2)
+    assert pool.device_limits == {os.stat(tmp_path).st_dev: 3}
+    items = [(1, i) for i in range(6)]
+    with pool:
+        results = list(pool.imap_unordered(_timed, items, item_device=lambda item: item[0]))
+    assert _max_overlap([(start, end) for _, start, end in results]) == 2
+
+
+def test_plugin_with_device_limit(tmp_path):
+    import tiff_validator
+
+    test_data_path = Path("test_data/tiff_tree_bad.zip")
+    zipfile.ZipFile(test_data_path).extractall(tmp_path)
+    validator = tiff_validator.TiffValidator(
+        tmp_path / test_data_path.stem, "codex", coreuse=4, max_readers_per_device=1
+    )
+    errors = validator.collect_errors()
+    assert len(errors) == 4
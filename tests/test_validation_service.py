@@ -0,0 +1,147 @@
+import re
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+from validation_service import ValidationServer, run_job, submit_job
+from validator import Validator
+
+
+@pytest.fixture
+def snrnaseq_bad(tmp_path) -> Path:
+    test_data_path = Path("test_data/fake_snrnaseq_tree_bad.zip")
+    zipfile.ZipFile(test_data_path).extractall(tmp_path)
+    return tmp_path / test_data_path.stem
+
+
+def _sleep(file):
+    time.sleep(30)
+
+
+class _SlowValidator(Validator):
+    description = "Sleeps in pool workers, catching errors as the plugins do"
+    cost = 1.0
+    version = "1.0"
+
+    def _collect_errors(self):
+        try:
+            return self._map_files(_sleep, self.paths)
+        except Exception as e:
+            return [f"Error {e}"]
+
+
+class _MarkerValidator(Validator):
+    description = "Records that it ran"
+    cost = 2.0
+    version = "1.0"
+
+    def _collect_errors(self):
+        (self.paths[0] / "ran").touch()
+        return [None]
+
+
+def _serve(socket_path: Path, plugin_classes: list) -> ValidationServer:
+    server = ValidationServer(socket_path, max_jobs=2, check_docker=False)
+    server.plugin_classes = plugin_classes
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_run_job(snrnaseq_bad):
+    job = {
+        "base_paths": [str(snrnaseq_bad)],
+        "assay_type": "snRNAseq",
+        "plugins": ["GZValidator"],
+        "plugin_kwargs": {"coreuse": 2},
+    }
+    events = list(run_job(job))
+    assert [event["event"] for event in events] == ["result", "done"]
+    assert events[0]["plugin"] == "GZValidator"
+    assert len(events[0]["errors"]) == 1
+    assert re.match(".*text2.txt.gz is not a valid gzipped file", events[0]["errors"][0])
+
+
+def test_run_job_plugin_exception(tmp_path):
+    job = {"base_paths": 12, "assay_type": "snRNAseq", "plugins": ["GZValidator"]}
+    events = list(run_job(job))
+    assert [event["event"] for event in events] == ["error", "done"]
+    assert "base_paths arg as type" in events[0]["message"]
+
+
+def test_server_streams_results(snrnaseq_bad, tmp_path):
+    socket_path = tmp_path / "ivt.sock"
+    server = ValidationServer(socket_path, max_jobs=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        job = {
+            "base_paths": [str(snrnaseq_bad)],
+            "assay_type": "snRNAseq",
+            "plugins": ["GZValidator", "TiffValidator"],
+            "plugin_kwargs": {"coreuse": 2},
+            "limits": {"wall_seconds": 60},
+        }
+        for _ in range(2):
+            # same warm server handles consecutive jobs
+            events = list(submit_job(socket_path, job))
+            assert [event["event"] for event in events] == [
+                "accepted",
+                "result",
+                "result",
+                "done",
+            ]
+            results = {event["plugin"]: event["errors"] for event in events[1:3]}
+            assert len(results["GZValidator"]) == 1
+            assert results["TiffValidator"] == []
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not socket_path.exists()
+
+
+def test_wall_clock_limit_ends_job(tmp_path):
+    server = _serve(tmp_path / "ivt.sock", [_SlowValidator, _MarkerValidator])
+    try:
+        job = {
+            "base_paths": [str(tmp_path)],
+            "assay_type": "snRNAseq",
+            "plugin_kwargs": {"coreuse": 2},
+            "limits": {"wall_seconds": 1},
+        }
+        start = time.monotonic()
+        events = list(submit_job(tmp_path / "ivt.sock", job))
+        assert time.monotonic() - start < 10
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [event["event"] for event in events] == ["accepted", "error"]
+    assert events[-1]["message"] == "Job exceeded wall-clock limit of 1s"
+    assert not (tmp_path / "ran").exists()
+
+
+def test_warm_caches_checks_dependencies(monkeypatch, capsys):
+    import qptiff_channel_validator
+    from validation_service import warm_caches
+    from validator import get_http_session
+
+    def missing(self):
+        raise Exception("no docker")
+
+    monkeypatch.setattr(qptiff_channel_validator.Engine, "dependencies_checked", False)
+    monkeypatch.setattr(qptiff_channel_validator.Engine, "check_dependencies", missing)
+    get_http_session.cache_clear()
+    warm_caches()
+    assert (
+        "Docker dependency check failed, will retry per job: no docker" in capsys.readouterr().out
+    )
+    assert get_http_session.cache_info().currsize == 1
+
+    def found(self):
+        qptiff_channel_validator.Engine.dependencies_checked = True
+
+    monkeypatch.setattr(qptiff_channel_validator.Engine, "check_dependencies", found)
+    warm_caches()
+    # inherited by forked jobs, so their Engines skip the check
+    assert qptiff_channel_validator.Engine.dependencies_checked
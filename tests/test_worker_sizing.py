@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+import worker_sizing
+from worker_sizing import (
+    cgroup_cpu_limit,
+    cgroup_memory_limit_mb,
+    default_worker_count,
+)
+
+
+def _write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def proc_cgroup_v2(tmp_path) -> Path:
+    path = tmp_path / "proc_cgroup"
+    path.write_text("0::/kubepods/pod1/container1\n")
+    return path
+
+
+@pytest.fixture
+def proc_cgroup_v1(tmp_path) -> Path:
+    path = tmp_path / "proc_cgroup"
+    path.write_text("4:memory:/kubepods/pod1\n2:cpu,cpuacct:/kubepods/pod1\n0::/\n")
+    return path
+
+
+def test_cgroup_v2_limits(tmp_path, proc_cgroup_v2):
+    root = tmp_path / "cgroup"
+    _write(root / "cpu.max", "max 100000\n")
+    _write(root / "kubepods/pod1/cpu.max", "750000 100000\n")
+    _write(root / "kubepods/pod1/container1/cpu.max", "max 100000\n")
+    _write(root / "kubepods/pod1/container1/memory.max", f"{8 * 2**30}\n")
+    assert cgroup_cpu_limit(root, proc_cgroup_v2) == 8
+    assert cgroup_memory_limit_mb(root, proc_cgroup_v2) == 8192
+
+
+def test_cgroup_v1_limits(tmp_path, proc_cgroup_v1):
+    root = tmp_path / "cgroup"
+    _write(root / "cpu,cpuacct/kubepods/pod1/cpu.cfs_quota_us", "400000\n")
+    _write(root / "cpu,cpuacct/kubepods/pod1/cpu.cfs_period_us", "100000\n")
+    _write(root / "memory/memory.limit_in_bytes", "9223372036854771712\n")
+    _write(root / "memory/kubepods/pod1/memory.limit_in_bytes", f"{2**30}\n")
+    assert cgroup_cpu_limit(root, proc_cgroup_v1) == 4
+    assert cgroup_memory_limit_mb(root, proc_cgroup_v1) == 1024
+
+
+def test_no_limits(tmp_path, proc_cgroup_v1):
+    root = tmp_path / "cgroup"
+    _write(root / "cpu/cpu.cfs_quota_us", "-1\n")
+    _write(root / "cpu/cpu.cfs_period_us", "100000\n")
+    _write(root / "memory/memory.limit_in_bytes", "9223372036854771712\n")
+    assert cgroup_cpu_limit(root, proc_cgroup_v1) is None
+    assert cgroup_memory_limit_mb(root, proc_cgroup_v1) is None
+    assert cgroup_cpu_limit(tmp_path / "missing", tmp_path / "missing") is None
+
+
+@pytest.mark.parametrize(
+    ("cpus", "memory_mb", "task_memory_mb", "expected"),
+    [
+        (128, None, None, 32),
+        (8, None, None, 2),
+        (3, None, None, 1),
+        (0, None, None, 1),
+        (128, 4096, 1024, 4),
+        (128, 512, 1024, 1),
+    ],
+)
+def test_default_worker_count(monkeypatch, cpus, memory_mb, task_memory_mb, expected):
+    monkeypatch.setattr(worker_sizing, "available_memory_mb", lambda: memory_mb)
+    assert default_worker_count(cpus, task_memory_mb) == expected
+
+
+def test_available_cpus_honors_quota(monkeypatch):
+    monkeypatch.setattr(worker_sizing.os, "sched_getaffinity", lambda _: set(range(128)))
+    monkeypatch.setattr(worker_sizing, "cgroup_cpu_limit", lambda: 8)
+    assert worker_sizing.available_cpus() == 8
+    monkeypatch.setattr(worker_sizing, "cgroup_cpu_limit", lambda: None)
+    assert worker_sizing.available_cpus() == 128